@@ -0,0 +1,16 @@
+# digestion_model/__main__.py
+
+"""
+Punto de entrada de python -m digestion_model (ver cli.py).
+Los módulos del modelo se importan entre sí por nombre (from parameters import ...),
+por lo que este directorio se agrega a sys.path antes de cargar la CLI.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from cli import main
+
+sys.exit(main())
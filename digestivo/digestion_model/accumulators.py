@@ -0,0 +1,164 @@
+# digestion_model/accumulators.py
+
+"""
+Acumuladores de flujos integrados durante la simulación y modo sólo-resumen.
+Las digestibilidades calculadas con np.trapz sobre el contenido de los pools
+obligan a guardar trayectorias densas. Aquí el vector de estado se amplía con un
+acumulador por flujo de model.FLUX_NAMES (hidrólisis, absorción, fermentación,
+crecimiento microbiano y pasaje, por pool y compartimento), integrado por el mismo
+solver: dA/dt = flux_SYSTEM(y). Los acumuladores no realimentan al modelo, así que
+en el jacobiano sus filas se dejan en cero (la iteración de Newton converge igual).
+simulate_summary integra sólo hasta t_end, sin salida densa, y retorna los totales
+y las métricas de resumen (digestibilidades aparentes, VFA, CH4, masa microbiana).
+Las métricas sólo tienen sentido con el sistema acoplado (graph.py): sin acoplar la
+ingesta no llega nunca al intestino. simulate_summary acopla por defecto y
+FluxSummary.metrics rechaza resúmenes sin acoplar.
+"""
+
+from dataclasses import dataclass
+from functools import partial
+
+import numpy as np
+
+from herd import band_blocks, herd_bandwidths, jac_HERD_blocks
+from model import FLUX_NAMES, dSYSTEM_dt, flux_SYSTEM, jac_SYSTEM
+from parameters import ModelParams, current_params
+from simulation import integrate_piecewise
+
+N_STATE = 30
+N_FLUX = len(FLUX_NAMES)
+FLUX_INDEX = {name: i for i, name in enumerate(FLUX_NAMES)}
+
+# Pools que cuentan como N o C en las heces (pasaje de LI); en mol N y mol C. La masa
+# microbiana (mol C) cuenta en ambos: en N con la relación N:C CMM_P / CMM_CHO
+_FECAL_N = ['LI.pas.DP', 'LI.pas.EP', 'LI.pas.NAPN', 'LI.pas.AA']
+_FECAL_C = ['LI.pas.ST', 'LI.pas.DDF', 'LI.pas.LD', 'LI.pas.SU', 'LI.pas.FA', 'LI.pas.MM']
+# Flujo ileal (pasaje de SI2 a LI)
+_ILEAL_N = ['SI2.pas.DP', 'SI2.pas.EP', 'SI2.pas.NAPN', 'SI2.pas.AA']
+_ILEAL_C = ['SI2.pas.ST', 'SI2.pas.LD', 'SI2.pas.SU', 'SI2.pas.FA']
+
+@dataclass
+class FluxSummary:
+    t0: float
+    t_end: float
+    state: np.ndarray      # Estado final, (30,) o (N, 30)
+    totals: np.ndarray     # Flujos acumulados en [t0, t_end], (57,) o (N, 57)
+    coupled: bool = True   # Sistema acoplado (sin acoplar las métricas no tienen sentido)
+
+    def total(self, name: str) -> float | np.ndarray:
+        """Total acumulado de un flujo ('LI.ferm.CH4') o de un prefijo ('SI1.abs')."""
+        if name in FLUX_INDEX:
+            return self.totals.T[FLUX_INDEX[name]]
+        cols = [i for n, i in FLUX_INDEX.items() if n.startswith(name + '.')]
+        if not cols:
+            raise KeyError(name)
+        return self.totals.T[cols].sum(axis=0)
+
+    def metrics(self, params: ModelParams | None = None) -> dict:
+        """
+        Métricas de resumen:
+        digestibilidad_N / digestibilidad_C: 1 - heces / ingesta, con la ingesta
+            según la composición de la dieta (params.diet) y las heces como el
+            pasaje de LI de los pools nitrogenados / carbonados, incluida la masa
+            microbiana (su N según CMM_P / CMM_CHO).
+        digestibilidad_ileal_N / digestibilidad_ileal_C: igual, con el pasaje de SI2
+            (el C ileal excluye la fibra, que no pasa por el intestino delgado).
+        VFA, CH4: producción total en LI (mol C).
+        MM: masa microbiana producida (mol C).
+        absorcion_SI: productos absorbidos en SI1 + SI2.
+        Lanza ValueError si el resumen es del sistema sin acoplar.
+        """
+        if not self.coupled:
+            raise ValueError('las métricas requieren el sistema acoplado (coupled=True): '
+                             'sin acoplar la ingesta no llega al intestino')
+        params = current_params() if params is None else params
+        d, mp = params.diet, params.microbial
+        ingested = self.total('STO.ingestion')
+        N_in = ingested * (d.CDIET_DP + d.CDIET_NAPN + d.CDIET_AA)
+        C_in = ingested * (d.CDIET_ST + d.CDIET_LD + d.CDIET_SU + d.CDIET_FA + d.CDIET_DDF)
+        N_out = sum(self.total(n) for n in _FECAL_N) + self.total('LI.pas.MM') * mp.CMM_P / mp.CMM_CHO
+        C_out = sum(self.total(n) for n in _FECAL_C)
+        C_in_SI = C_in - ingested * d.CDIET_DDF
+        return {
+            'digestibilidad_N': 1 - N_out / (N_in + 1e-9),
+            'digestibilidad_C': 1 - C_out / (C_in + 1e-9),
+            'digestibilidad_ileal_N': 1 - sum(self.total(n) for n in _ILEAL_N) / (N_in + 1e-9),
+            'digestibilidad_ileal_C': 1 - sum(self.total(n) for n in _ILEAL_C) / (C_in_SI + 1e-9),
+            'VFA': self.total('LI.ferm.VFA'),
+            'CH4': self.total('LI.ferm.CH4'),
+            'MM': self.total('LI.growth'),
+            'absorcion_SI': self.total('SI1.abs') + self.total('SI2.abs'),
+        }
+
+def _rhs_augmented(z, t, t_mid, n, params, system):
+    if n is None:
+        y = z[:N_STATE]
+        dy = dSYSTEM_dt(y, t_mid, params) if system is None else system.rhs(y, t_mid)
+        return np.concatenate([dy, flux_SYSTEM(y, t_mid, params)])
+
+    Z = z.reshape(n, -1)
+    y = Z[:, :N_STATE]
+    if system is None:
+        dy = dSYSTEM_dt(y, t_mid, params)
+    else:
+        dy = system.rhs(y.ravel(), t_mid).reshape(n, N_STATE)
+    return np.concatenate([dy, flux_SYSTEM(y, t_mid, params)], axis=1).ravel()
+
+def _jac_augmented(z, t, t_mid, n, params, system):
+    # Filas de los acumuladores en cero: sólo el bloque del modelo es exacto
+    J = np.zeros((z.size, z.size))
+    y = z[:N_STATE]
+    J[:N_STATE, :N_STATE] = jac_SYSTEM(y, t_mid, params) if system is None else system.jac(y, t_mid)
+    return J
+
+def _jac_augmented_banded(z, t, t_mid, n, params, system, ml, mu):
+    # Rebaño: el bloque 30x30 del modelo de cada animal en formato de banda de odeint;
+    # filas de acumuladores en cero como en _jac_augmented
+    width = N_STATE + N_FLUX
+    J = jac_HERD_blocks(z.reshape(n, width)[:, :N_STATE], t_mid, n, params, system)
+    return band_blocks(J, z.size, ml, mu, stride=width)
+
+def simulate_with_fluxes(state0: np.ndarray, t: np.ndarray, params: ModelParams | None = None,
+                         coupled: bool = False, **odeint_kwargs):
+    """
+    Como simulation.simulate_piecewise, pero retorna además los flujos acumulados
+    desde t[0]: (estados (len(t), 30), acumulados (len(t), 57)), o con un eje de
+    animales (len(t), N, ...) para un estado (N, 30).
+    """
+    state0 = np.asarray(state0, dtype=float)
+    n = state0.shape[0] if state0.ndim == 2 else None
+    z0 = np.concatenate([state0, np.zeros(state0.shape[:-1] + (N_FLUX,))], axis=-1)
+
+    system = None
+    if coupled:
+        from graph import CoupledSystem
+        system = CoupledSystem(params, n_animals=n)
+
+    if n is None:
+        Dfun = odeint_kwargs.pop('Dfun', _jac_augmented)
+    elif 'Dfun' in odeint_kwargs:
+        Dfun = odeint_kwargs.pop('Dfun')
+    else:
+        # Jacobiano analítico en banda: cada animal sólo se acopla consigo mismo
+        # (ml = 21, mu = 12 acoplado; 12 sin acoplar, el bloque de LI)
+        ml, mu = herd_bandwidths(system)
+        odeint_kwargs.setdefault('ml', ml)
+        odeint_kwargs.setdefault('mu', mu)
+        Dfun = partial(_jac_augmented_banded, ml=odeint_kwargs['ml'], mu=odeint_kwargs['mu'])
+    z = integrate_piecewise(_rhs_augmented, z0, t, args=(n, params, system), Dfun=Dfun,
+                            params=params, **odeint_kwargs)
+    if n is not None:
+        z = z.reshape(len(t), n, -1)
+    return z[..., :N_STATE], z[..., N_STATE:]
+
+def simulate_summary(state0: np.ndarray, t_end: float, t0: float = 0.0,
+                     params: ModelParams | None = None, coupled: bool = True,
+                     **odeint_kwargs) -> FluxSummary:
+    """
+    Modo sólo-resumen: integra de t0 a t_end guardando únicamente el estado final y
+    los flujos acumulados (sin trayectorias). Ver FluxSummary.metrics, que requiere
+    coupled=True.
+    """
+    states, totals = simulate_with_fluxes(state0, np.array([t0, t_end], dtype=float), params,
+                                          coupled=coupled, **odeint_kwargs)
+    return FluxSummary(t0=t0, t_end=t_end, state=states[-1], totals=totals[-1], coupled=coupled)
@@ -0,0 +1,263 @@
+# digestion_model/benchmarks.py
+
+"""
+Suite de benchmarks de rendimiento del modelo.
+Mide:
+    Evaluaciones por segundo de cada compartimento (dStomach_dt, dSI1_dt, dSI2_dt,
+    dLI_dt), de dSYSTEM_dt y del lado derecho generado (codegen.fused_rhs).
+    Tiempo de pared del escenario de 96 h de test_digestibilidad.simulate_96h con
+    cada integrador (sin caché).
+    Escalamiento con el tamaño del rebaño y con la longitud del horizonte.
+    Integración completa contra la cuasi-estacionaria (qssa.py): tiempo, pasos y error.
+    Tiempo de arranque en frío de la CLI (python -m digestion_model).
+Los resultados se guardan en JSON junto con metadatos de la máquina y del código
+(versiones, CPU, commit de git), para comparar corridas en el tiempo:
+    python benchmarks.py --output bench.json
+    python benchmarks.py --quick --compare bench.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import timeit
+from datetime import datetime, timezone
+
+import numpy as np
+import scipy
+from scipy.integrate import odeint, solve_ivp
+
+from codegen import fused_rhs
+from herd import replicate_params
+from li import dLI_dt
+from model import IDX, dSYSTEM_dt, jac_SYSTEM
+from qssa import compare_qssa
+from si1 import dSI1_dt
+from si2 import dSI2_dt
+from simulation import simulate_piecewise
+from stomach import dStomach_dt
+
+def scenario_96h():
+    """Condiciones de test_digestibilidad.simulate_96h: (t, state0)."""
+    t = np.linspace(0, 96, 2000)
+    state0 = np.zeros(30)
+    state0[IDX['SI1']] = [1.0, 0.5, 0.5, 2.0, 1.5, 0, 0, 0]
+    state0[IDX['SI2']] = [0.5, 0.3, 0.3, 1.0, 0.8, 0, 0, 0]
+    state0[IDX['LI']] = [0.3, 0.2, 0.2, 0.5, 0.8, 0.3, 0, 0, 0, 0, 0, 0, 0]
+    return t, state0
+
+def machine_metadata() -> dict:
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except OSError:
+        commit = ''
+    return {
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'git_commit': commit,
+        'python': sys.version.split()[0],
+        'numpy': np.__version__,
+        'scipy': scipy.__version__,
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'processor': platform.processor(),
+        'cpu_count': os.cpu_count(),
+    }
+
+def _best_time(func, repeat: int) -> float:
+    """Mejor tiempo de pared de `repeat` ejecuciones de func() (s)."""
+    best = np.inf
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+def _rate(func, repeat: int) -> float:
+    """Llamadas por segundo de func(), con el mejor de `repeat` bloques autoajustados."""
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    return number / min(timer.repeat(repeat=repeat, number=number))
+
+def bench_rhs(repeat: int = 5) -> dict:
+    """Evaluaciones por segundo de cada lado derecho, en el estado inicial de 96 h."""
+    _, y = scenario_96h()
+    y = y + 0.1
+    out = np.empty(30)
+    rhs = fused_rhs()
+    funcs = {
+        'dStomach_dt': lambda: dStomach_dt(y[IDX['STO']], 5.0),
+        'dSI1_dt': lambda: dSI1_dt(y[IDX['SI1']], 5.0),
+        'dSI2_dt': lambda: dSI2_dt(y[IDX['SI2']], 5.0),
+        'dLI_dt': lambda: dLI_dt(y[IDX['LI']], 5.0),
+        'dSYSTEM_dt': lambda: dSYSTEM_dt(y, 5.0),
+        'jac_SYSTEM': lambda: jac_SYSTEM(y, 5.0),
+        'fused_rhs': lambda: rhs(5.0, y, out),
+    }
+    return {name: {'evals_per_s': _rate(f, repeat)} for name, f in funcs.items()}
+
+def bench_solvers(repeat: int = 3) -> dict:
+    """Tiempo de pared y evaluaciones del escenario de 96 h con cada integrador."""
+    t, state0 = scenario_96h()
+    results = {}
+
+    def record(name, run):
+        info = {}
+        def timed():
+            info.update(run())
+        results[name] = {'wall_s': _best_time(timed, repeat), **info}
+
+    def odeint_run(**kw):
+        _, info = odeint(dSYSTEM_dt, state0, t, full_output=True, **kw)
+        return {'nfe': int(info['nfe'][-1]), 'nje': int(info['nje'][-1])}
+
+    def piecewise_run(**kw):
+        _, stats = simulate_piecewise(state0, t, full_output=True, **kw)
+        return {'nfe': stats['nfe'], 'nje': stats['nje']}
+
+    def ivp_run(method):
+        sol = solve_ivp(lambda ti, y: dSYSTEM_dt(y, ti), (t[0], t[-1]), state0, method=method,
+                        t_eval=t, jac=lambda ti, y: jac_SYSTEM(y, ti))
+        return {'nfe': int(sol.nfev), 'nje': int(sol.njev)}
+
+    record('odeint', lambda: odeint_run())
+    record('odeint+jac', lambda: odeint_run(Dfun=jac_SYSTEM))
+    record('simulate_piecewise', lambda: piecewise_run())
+    record('simulate_piecewise+fused', lambda: piecewise_run(fused=True))
+    for method in ['LSODA', 'BDF', 'Radau']:
+        record(f'solve_ivp {method}+jac', lambda: ivp_run(method))
+    return results
+
+def bench_herd_scaling(sizes=(1, 10, 100, 1000), hours: float = 24.0, repeat: int = 1) -> dict:
+    """Tiempo de una evaluación del lado derecho y de una simulación por tamaño de rebaño."""
+    _, state0 = scenario_96h()
+    t = np.linspace(0, hours, int(hours) + 1)
+    results = {}
+    for n in sizes:
+        params = replicate_params(n)
+        y = np.tile(state0, (n, 1))
+        rhs_rate = _rate(lambda: dSYSTEM_dt(y + 0.1, 5.0, params), repeat=3)
+        # Camino por defecto: jacobiano analítico por bloques en banda (herd.herd_bandwidths)
+        wall = _best_time(lambda: simulate_piecewise(y, t, params), repeat)
+        results[str(n)] = {'rhs_s': 1 / rhs_rate, 'wall_s': wall, 'wall_per_animal_s': wall / n}
+    return results
+
+def bench_horizon_scaling(horizons=(24, 96, 384), repeat: int = 1) -> dict:
+    """Tiempo de simulate_piecewise de un animal según el horizonte (h), salida horaria."""
+    _, state0 = scenario_96h()
+    results = {}
+    for hours in horizons:
+        t = np.linspace(0, hours, int(hours) + 1)
+        wall = _best_time(lambda: simulate_piecewise(state0, t), repeat)
+        results[str(hours)] = {'wall_s': wall, 'wall_per_day_s': wall / (hours / 24)}
+    return results
+
+def bench_qssa(horizons=(96, 384), repeat: int = 1) -> dict:
+    """simulate_piecewise contra qssa.simulate_qssa, sin acoplar y acoplado, salida cada 15 min."""
+    _, state0 = scenario_96h()
+    results = {}
+    for coupled in (False, True):
+        for hours in horizons:
+            t = np.linspace(0, hours, 4 * int(hours) + 1)
+            report = compare_qssa(state0, t, coupled=coupled, repeat=repeat, warmup=12.0)
+            name = f"{'coupled' if coupled else 'uncoupled'}_{hours}"
+            results[name] = {'full_wall_s': report.wall_full, 'qssa_wall_s': report.wall_qssa,
+                             'speedup': report.speedup, 'full_nst': report.stats_full['nst'],
+                             'qssa_nst': report.stats_qssa['nst'],
+                             'max_rel_error': float(report.max_rel_error.max())}
+    return results
+
+def bench_startup(repeat: int = 5) -> dict:
+    """Tiempo de arranque en frío de python -m digestion_model (proceso nuevo)."""
+    parent = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    cases = {'--help': ['--help'], 'si1': ['si1', '--points', '2'],
+             'system': ['system', '--points', '2', '--hours', '1']}
+    results = {}
+    for name, args in cases.items():
+        run = lambda: subprocess.run([sys.executable, '-m', 'digestion_model', *args], cwd=parent,
+                                     stdout=subprocess.DEVNULL, check=True)
+        results[name] = {'wall_s': _best_time(run, repeat)}
+    return results
+
+def run_benchmarks(quick: bool = False) -> dict:
+    """Ejecuta toda la suite. quick=True usa tamaños chicos (para pruebas rápidas)."""
+    if quick:
+        return {
+            'metadata': machine_metadata(),
+            'rhs': bench_rhs(repeat=1),
+            'solvers': bench_solvers(repeat=1),
+            'herd_scaling': bench_herd_scaling(sizes=(1, 10)),
+            'horizon_scaling': bench_horizon_scaling(horizons=(24, 48)),
+            'qssa': bench_qssa(horizons=(24,)),
+            'startup': bench_startup(repeat=1),
+        }
+    return {
+        'metadata': machine_metadata(),
+        'rhs': bench_rhs(),
+        'solvers': bench_solvers(),
+        'herd_scaling': bench_herd_scaling(),
+        'horizon_scaling': bench_horizon_scaling(),
+        'qssa': bench_qssa(),
+        'startup': bench_startup(),
+    }
+
+def save_results(results: dict, path: str):
+    with open(path, 'w') as fh:
+        json.dump(results, fh, indent=2)
+
+def compare(old: dict, new: dict, tolerance: float = 0.2) -> list[str]:
+    """
+    Regresiones de `new` respecto de `old`: métricas de tiempo (*_s) que crecieron o
+    de velocidad (evals_per_s) que cayeron más que `tolerance` (fracción).
+    """
+    regressions = []
+    for section in ['rhs', 'solvers', 'herd_scaling', 'horizon_scaling', 'qssa', 'startup']:
+        for case, metrics in new.get(section, {}).items():
+            for metric, value in metrics.items():
+                before = old.get(section, {}).get(case, {}).get(metric)
+                if before is None or not before:
+                    continue
+                if metric == 'evals_per_s':
+                    worse = value < before * (1 - tolerance)
+                elif metric.endswith('_s'):
+                    worse = value > before * (1 + tolerance)
+                else:
+                    continue
+                if worse:
+                    regressions.append(f'{section}/{case}/{metric}: {before:.4g} -> {value:.4g}')
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmarks del modelo digestivo porcino')
+    parser.add_argument('--output', default='bench_results.json', help='archivo JSON de salida')
+    parser.add_argument('--quick', action='store_true', help='tamaños reducidos')
+    parser.add_argument('--compare', metavar='JSON', help='resultado anterior para detectar regresiones')
+    parser.add_argument('--tolerance', type=float, default=0.2)
+    args = parser.parse_args()
+
+    results = run_benchmarks(quick=args.quick)
+    save_results(results, args.output)
+
+    for name, r in results['rhs'].items():
+        print(f"{name:<26}{r['evals_per_s']:>14,.0f} eval/s")
+    for name, r in results['solvers'].items():
+        print(f"{name:<26}{r['wall_s']:>10.3f} s  nfe={r['nfe']}")
+    for n, r in results['herd_scaling'].items():
+        print(f"rebaño {n:<19}{r['wall_s']:>10.3f} s  ({r['wall_per_animal_s'] * 1e3:.2f} ms/animal)")
+    for hours, r in results['horizon_scaling'].items():
+        print(f"horizonte {hours + ' h':<16}{r['wall_s']:>10.3f} s")
+    for name, r in results['startup'].items():
+        print(f"arranque {name:<17}{r['wall_s']:>10.3f} s")
+
+    if args.compare:
+        with open(args.compare) as fh:
+            regressions = compare(json.load(fh), results, args.tolerance)
+        print('\n'.join(regressions) if regressions else 'Sin regresiones')
+        if regressions:
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
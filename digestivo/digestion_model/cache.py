@@ -0,0 +1,178 @@
+# digestion_model/cache.py
+
+"""
+Caché de resultados de simulación direccionada por contenido.
+La clave es un hash SHA-256 estable de:
+    todos los campos de ModelParams (valores y forma),
+    el estado inicial, la grilla de tiempos y los ajustes del integrador,
+    y el código fuente de los módulos del modelo, de parameters.py, herd.py y
+    codegen.py (un cambio en las ecuaciones también invalida las entradas).
+Dos niveles:
+    memoria: LRU acotado por número de entradas.
+    disco (opcional): un archivo .npz por clave, con desalojo de los menos usados
+    cuando el directorio supera max_bytes.
+cached_simulate envuelve simulation.simulate_piecewise con esta caché.
+"""
+
+import hashlib
+import os
+from collections import OrderedDict
+from dataclasses import fields, is_dataclass
+
+import numpy as np
+
+from parameters import ModelParams, current_params
+from simulation import simulate_piecewise
+
+# Módulos que determinan lo que se integra: ecuaciones, compilación de parámetros
+# (parameters.compiled), rebaño y lado derecho generado (fused=True). Se leen del
+# disco porque codegen importa este módulo
+_CODE_MODULES = ['stomach', 'feeding', 'si1', 'si2', 'li', 'model', 'graph', 'simulation',
+                 'parameters', 'herd', 'codegen']
+
+def _code_hash() -> str:
+    h = hashlib.sha256()
+    for name in _CODE_MODULES:
+        with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), name + '.py'), 'rb') as fh:
+            h.update(fh.read())
+    return h.hexdigest()
+
+_CODE_HASH = _code_hash()
+
+def _update_array(h, value):
+    if is_dataclass(value):
+        # Campos compuestos (p.ej. StomachParams.schedule): todos sus campos
+        for f in fields(value):
+            _update_array(h, getattr(value, f.name))
+        return
+    a = np.ascontiguousarray(value, dtype=float)
+    h.update(repr(a.shape).encode())
+    h.update(a.tobytes())
+
+def _update_params(h, params: ModelParams | None):
+    params = current_params() if params is None else params
+    for g in fields(params):
+        group = getattr(params, g.name)
+        for f in fields(group):
+            h.update(f'{g.name}.{f.name}'.encode())
+            _update_array(h, getattr(group, f.name))
+
+def params_key(params: ModelParams | None) -> str:
+    """Hash estable de los valores de todos los campos de ModelParams."""
+    h = hashlib.sha256()
+    _update_params(h, params)
+    return h.hexdigest()
+
+def _setting_repr(name: str, value) -> str:
+    # repr de una función incluye su dirección en memoria: distinta en cada proceso
+    if not callable(value):
+        return repr(value)
+    qualname = getattr(value, '__qualname__', None)
+    if qualname is None or '<' in qualname:
+        raise TypeError(f'{name}: sólo funciones importables (módulo.nombre) tienen una clave '
+                        f'estable, no {value!r}')
+    return f'{value.__module__}.{qualname}'
+
+def simulation_key(params: ModelParams | None, state0, t, **solver_settings) -> str:
+    """
+    Hash estable de todo lo que determina el resultado de una simulación. Las funciones
+    (p.ej. Dfun) entran por módulo y nombre; lambdas y funciones locales lanzan TypeError.
+    """
+    h = hashlib.sha256(_CODE_HASH.encode())
+    _update_params(h, params)
+    _update_array(h, state0)
+    _update_array(h, t)
+    settings = [(k, _setting_repr(k, v)) for k, v in sorted(solver_settings.items())]
+    h.update(repr(settings).encode())
+    return h.hexdigest()
+
+class SimulationCache:
+    """
+    LRU en memoria (maxsize entradas) más almacén .npz opcional en `directory`,
+    limitado a max_bytes. Los arrays devueltos son de sólo lectura.
+    """
+    def __init__(self, maxsize: int = 32, directory: str | None = None,
+                 max_bytes: int = 1 << 30):
+        self.maxsize = maxsize
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._memory = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + '.npz')
+
+    def get(self, key: str):
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            self.hits += 1
+            return self._memory[key]
+
+        if self.directory is not None and os.path.exists(self._path(key)):
+            with np.load(self._path(key)) as data:
+                result = data['result']
+            os.utime(self._path(key))  # marca de uso para el desalojo
+            self._remember(key, result)
+            self.hits += 1
+            return result
+
+        self.misses += 1
+        return None
+
+    def put(self, key: str, result: np.ndarray):
+        self._remember(key, result)
+        if self.directory is not None:
+            # Un nombre temporal por proceso: dos procesos pueden escribir la misma clave
+            tmp = f'{self._path(key)}.{os.getpid()}.tmp.npz'
+            np.savez_compressed(tmp, result=result)
+            os.replace(tmp, self._path(key))
+            self._evict_disk()
+
+    def clear(self):
+        self._memory.clear()
+        if self.directory is not None:
+            for name in os.listdir(self.directory):
+                if name.endswith('.npz'):
+                    os.remove(os.path.join(self.directory, name))
+
+    def _remember(self, key: str, result: np.ndarray):
+        result.flags.writeable = False
+        self._memory[key] = result
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.maxsize:
+            self._memory.popitem(last=False)
+
+    def _evict_disk(self):
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith('.npz') and not name.endswith('.tmp.npz'):
+                st = os.stat(os.path.join(self.directory, name))
+                entries.append((st.st_mtime, st.st_size, name))
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            os.remove(os.path.join(self.directory, name))
+            total -= size
+
+default_cache = SimulationCache()
+
+def cached_simulate(state0, t, params: ModelParams | None = None,
+                    cache: SimulationCache | None = None, **odeint_kwargs) -> np.ndarray:
+    """
+    simulate_piecewise con caché: entradas idénticas devuelven el resultado guardado.
+    El array devuelto es de sólo lectura (se comparte entre llamadas). No admite
+    full_output: sólo se guarda el array de estados.
+    """
+    if odeint_kwargs.get('full_output'):
+        raise ValueError('cached_simulate no admite full_output=True')
+    cache = default_cache if cache is None else cache
+    key = simulation_key(params, state0, t, **odeint_kwargs)
+    result = cache.get(key)
+    if result is None:
+        result = simulate_piecewise(state0, t, params, **odeint_kwargs)
+        cache.put(key, result)
+    return result
@@ -0,0 +1,197 @@
+# digestion_model/calibration.py
+
+"""
+Calibración de parámetros contra datos de ensayos: digestibilidades ileales y
+totales, producción de VFA y CH4.
+Este módulo:
+    Define Trial: un ensayo (parámetros base con su dieta e ingesta, horizonte,
+    estado inicial) con sus observaciones y desvíos estándar, expresadas con los
+    nombres de accumulators.FluxSummary.metrics.
+    Define CalibrationProblem: residuos ponderados (simulado - observado) / sd de un
+    subconjunto de campos 'grupo.campo', y su jacobiano por diferencias finitas.
+    Resuelve el problema con cotas (calibrate, scipy.optimize.least_squares 'trf').
+    Con residuos divididos por sd, el mínimo de mínimos cuadrados es el estimador
+    de máxima verosimilitud gaussiano; loss='soft_l1' o 'huber' lo hacen robusto.
+Rendimiento:
+    Las n+1 simulaciones de cada jacobiano (por ensayo) se reparten entre un pool
+    de procesos, como en montecarlo.py.
+    Cada evaluación se guarda en un cache.SimulationCache (memoria y, opcionalmente,
+    disco) con clave cache.simulation_key: el punto base de cada jacobiano, los
+    pasos repetidos y las corridas siguientes no se vuelven a simular.
+    Cada simulación es sólo-resumen (accumulators.simulate_summary): sin trayectorias.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+
+import numpy as np
+from scipy.optimize import least_squares
+
+from accumulators import simulate_summary
+from cache import SimulationCache, simulation_key
+from montecarlo import animal_params
+from parameters import ModelParams, current_params
+
+@dataclass
+class Trial:
+    observed: dict[str, float]           # {'digestibilidad_ileal_N': 0.78, 'CH4': 0.12, ...}
+    sd: dict[str, float] = field(default_factory=dict)  # Desvío estándar por métrica (1.0 si falta)
+    params: ModelParams | None = None    # Parámetros base del ensayo (dieta, ingesta)
+    hours: float = 96.0                  # Horizonte; VFA, CH4 y MM son totales en [0, hours]
+    state0: np.ndarray | None = None     # Estado inicial (30,); ceros por defecto
+
+    @property
+    def metrics(self) -> list[str]:
+        return sorted(self.observed)
+
+    @property
+    def values(self) -> np.ndarray:
+        return np.array([self.observed[m] for m in self.metrics])
+
+    @property
+    def sds(self) -> np.ndarray:
+        return np.array([self.sd.get(m, 1.0) for m in self.metrics])
+
+@dataclass
+class CalibrationResult:
+    names: list[str]          # Parámetros calibrados, como 'grupo.campo'
+    x: np.ndarray             # Valores óptimos
+    stderr: np.ndarray        # Error estándar aproximado, sqrt(diag((JᵀJ)⁻¹))
+    residuals: np.ndarray     # (simulado - observado) / sd en el óptimo
+    cost: float               # 0.5 * Σ residuos² (con la función loss elegida)
+    log_likelihood: float     # Log-verosimilitud gaussiana en el óptimo
+    success: bool
+    message: str
+    nfev: int                 # Evaluaciones de residuos pedidas por el optimizador
+    simulations: int          # Simulaciones realmente ejecutadas (sin contar el caché)
+    cache_hits: int
+
+    @property
+    def values(self) -> dict[str, float]:
+        return dict(zip(self.names, self.x.tolist()))
+
+    def apply(self, base: ModelParams | None = None) -> ModelParams:
+        """Copia de `base` con los valores calibrados."""
+        return animal_params(current_params() if base is None else base, self.names, self.x)
+
+def _evaluate(job) -> np.ndarray:
+    params, state0, hours, metrics, coupled, odeint_kwargs = job
+    summary = simulate_summary(state0, hours, params=params, coupled=coupled, **odeint_kwargs)
+    values = summary.metrics(params)
+    return np.array([values[m] for m in metrics], dtype=float)
+
+class CalibrationProblem:
+    """
+    Residuos y jacobiano del ajuste de `names` a `trials`.
+    pool: Executor para las simulaciones (None: en este proceso).
+    """
+    def __init__(self, trials: list[Trial], names: list[str], coupled: bool = True,
+                 cache: SimulationCache | None = None, pool=None, **odeint_kwargs):
+        self.trials = trials
+        self.names = list(names)
+        self.coupled = coupled
+        self.cache = SimulationCache(maxsize=4096) if cache is None else cache
+        self.pool = pool
+        self.odeint_kwargs = odeint_kwargs
+        self.simulations = 0
+        self._observed = np.concatenate([trial.values for trial in trials])
+        self._sd = np.concatenate([trial.sds for trial in trials])
+
+    def simulate(self, points) -> np.ndarray:
+        """Métricas simuladas de todos los ensayos en cada punto, (len(points), n_obs)."""
+        jobs, keys, pending, out = [], [], {}, []
+        for x in points:
+            row = []
+            for trial in self.trials:
+                params = animal_params(current_params() if trial.params is None else trial.params,
+                                       self.names, x)
+                state0 = np.zeros(30) if trial.state0 is None else np.asarray(trial.state0, dtype=float)
+                key = simulation_key(params, state0, [0.0, trial.hours], calibration=trial.metrics,
+                                     coupled=self.coupled, **self.odeint_kwargs)
+                values = pending.get(key)
+                if values is None:
+                    values = self.cache.get(key)
+                if values is None:
+                    # Puntos repetidos dentro del lote comparten la misma simulación
+                    values = pending[key] = len(jobs)
+                    jobs.append((params, state0, trial.hours, trial.metrics, self.coupled, self.odeint_kwargs))
+                    keys.append(key)
+                row.append(values)
+            out.append(row)
+
+        if jobs:
+            mapper = map if self.pool is None else self.pool.map
+            results = list(mapper(_evaluate, jobs))
+            self.simulations += len(jobs)
+            for key, values in zip(keys, results):
+                self.cache.put(key, values)
+        return np.array([np.concatenate([results[v] if isinstance(v, int) else v for v in row])
+                         for row in out])
+
+    def residuals(self, x: np.ndarray) -> np.ndarray:
+        return (self.simulate([x])[0] - self._observed) / self._sd
+
+    def jacobian(self, x: np.ndarray, lower=-np.inf, upper=np.inf, diff_step: float = 1e-3) -> np.ndarray:
+        """
+        Diferencias finitas hacia adelante (hacia atrás junto a la cota superior),
+        con paso relativo diff_step; los n+1 puntos se simulan en un solo lote.
+        """
+        x = np.asarray(x, dtype=float)
+        h = diff_step * np.maximum(np.abs(x), 1e-8)
+        h = np.where(x + h > upper, -h, h)
+        points = [x] + [x + np.eye(len(x))[j] * h[j] for j in range(len(x))]
+        sim = self.simulate(points)
+        return ((sim[1:] - sim[0]) / self._sd).T / h
+
+    def log_likelihood(self, residuals: np.ndarray) -> float:
+        return float(-0.5 * np.sum(residuals**2) - np.sum(np.log(self._sd))
+                     - 0.5 * len(residuals) * np.log(2 * np.pi))
+
+def calibrate(trials: list[Trial], bounds: dict[str, tuple[float, float]],
+              x0: dict[str, float] | None = None, coupled: bool = True,
+              cache: SimulationCache | None = None, workers: int | None = None,
+              loss: str = 'linear', diff_step: float = 1e-3, max_nfev: int | None = None,
+              **odeint_kwargs) -> CalibrationResult:
+    """
+    Ajusta los parámetros de `bounds` ({'si1.CSI1_DP_hyv': (0.1, 1.0), ...}) a `trials`.
+
+    x0: valores iniciales (por defecto los de los parámetros base del primer ensayo,
+        recortados a las cotas).
+    cache: SimulationCache a reutilizar entre corridas (p.ej. con directory= en disco).
+    workers: procesos para las simulaciones (por defecto os.cpu_count()); con 1 se
+             ejecuta en este proceso.
+    loss, max_nfev: se pasan a scipy.optimize.least_squares.
+    """
+    names = sorted(bounds)
+    lower = np.array([bounds[n][0] for n in names], dtype=float)
+    upper = np.array([bounds[n][1] for n in names], dtype=float)
+    base = current_params() if trials[0].params is None else trials[0].params
+    start = np.array([(x0 or {}).get(n, getattr(getattr(base, n.split('.')[0]), n.split('.')[1]))
+                      for n in names], dtype=float)
+    start = np.clip(start, lower, upper)
+    workers = os.cpu_count() if workers is None else workers
+
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        problem = CalibrationProblem(trials, names, coupled=coupled, cache=cache, pool=pool,
+                                     **odeint_kwargs)
+        hits = problem.cache.hits
+        fit = least_squares(problem.residuals, start,
+                            jac=lambda x: problem.jacobian(x, lower, upper, diff_step),
+                            bounds=(lower, upper), method='trf', x_scale='jac', loss=loss,
+                            max_nfev=max_nfev)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    residuals = fit.fun
+    J = fit.jac
+    cov = np.linalg.pinv(J.T @ J)
+    return CalibrationResult(
+        names=names, x=fit.x, stderr=np.sqrt(np.clip(np.diag(cov), 0, None)),
+        residuals=residuals, cost=float(fit.cost),
+        log_likelihood=problem.log_likelihood(residuals),
+        success=bool(fit.success), message=fit.message, nfev=fit.nfev,
+        simulations=problem.simulations, cache_hits=problem.cache.hits - hits,
+    )
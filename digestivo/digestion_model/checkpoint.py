@@ -0,0 +1,185 @@
+# digestion_model/checkpoint.py
+
+"""
+Checkpoints periódicos y re-simulación incremental.
+En estudios de escenarios (p.ej. cambiar la ración desde el día 30 de una corrida de
+100 días) la trayectoria anterior al cambio no depende de él: no hace falta
+recalcularla desde t = 0.
+simulate_checkpointed integra por segmentos entre checkpoints (por defecto cada
+medianoche del ciclo de alimentación, múltiplos del período del horario) y guarda el
+estado en cada uno. Como cada segmento arranca odeint desde el estado guardado,
+reanudar desde cualquier checkpoint reproduce exactamente la corrida original.
+Con el horario por defecto la medianoche ya es un borde de comida de
+simulation.integrate_piecewise, así que el resultado coincide también con
+simulate_piecewise.
+resimulate(run, params) detecta el primer tiempo desde el que los nuevos parámetros
+cambian la dinámica (earliest_change: cualquier parámetro cinético cambia desde t[0];
+un horario de alimentación, desde el primer tramo donde difiere la ingestión),
+reutiliza las filas y checkpoints anteriores al último checkpoint previo a ese tiempo
+e integra sólo el resto.
+Con path, la corrida se escribe en un directorio para poder reanudarla tras una caída:
+    checkpoints.npz: tiempos y estados de los checkpoints, comprimido y reescrito
+    atómicamente tras cada segmento, con la clave de cache.simulation_key.
+    trajectory.npy: salida (len(t), ...) mapeada en memoria, como streaming.py.
+Llamar de nuevo a simulate_checkpointed con el mismo path y las mismas entradas
+continúa desde el último checkpoint guardado; con otras entradas la sobrescribe.
+"""
+
+import os
+from dataclasses import dataclass, fields
+
+import numpy as np
+
+from cache import simulation_key
+from parameters import ModelParams, current_params
+from simulation import simulate_piecewise
+
+# Campos de StomachParams que sólo intervienen a través del horario de alimentación
+_SCHEDULE_FIELDS = {'schedule', 'TFEED', 'FFEED', 'DMI'}
+
+@dataclass
+class CheckpointedRun:
+    t: np.ndarray
+    result: np.ndarray        # Estados en t, (len(t), 30) o (len(t), N, 30)
+    params: ModelParams
+    every: float              # Intervalo entre checkpoints (h)
+    times: np.ndarray         # Tiempos de los checkpoints, desde t[0] hasta t[-1]
+    states: np.ndarray        # Estado en cada checkpoint, (len(times), ...)
+    coupled: bool
+    odeint_kwargs: dict
+    resumed_from: float       # Checkpoint desde el que se integró (t[0] si se integró todo)
+
+    def checkpoint_before(self, time: float) -> int:
+        """Índice del último checkpoint con tiempo <= time."""
+        return max(int(np.searchsorted(self.times, time, side='right')) - 1, 0)
+
+def checkpoint_times(t0: float, t_end: float, every: float) -> np.ndarray:
+    """t0, los múltiplos de `every` en (t0, t_end) y t_end."""
+    inner = np.arange(np.floor(t0 / every) + 1, np.ceil(t_end / every)) * every
+    return np.concatenate([[t0], inner[(inner > t0) & (inner < t_end)], [t_end]])
+
+def earliest_change(old: ModelParams, new: ModelParams, t0: float, t_end: float) -> float | None:
+    """
+    Primer tiempo de [t0, t_end] desde el que `new` da otra dinámica que `old`, o None
+    si son equivalentes. Un parámetro cinético distinto cuenta desde t0; un horario
+    distinto, desde el inicio del primer tramo entre bordes de comidas donde la
+    ingestión difiere.
+    """
+    for g in fields(old):
+        group_old, group_new = getattr(old, g.name), getattr(new, g.name)
+        for f in fields(group_old):
+            if g.name == 'stomach' and f.name in _SCHEDULE_FIELDS:
+                continue
+            if not np.array_equal(getattr(group_old, f.name), getattr(group_new, f.name)):
+                return t0
+
+    s_old, s_new = old.stomach.compiled(), new.stomach.compiled()
+    edges = np.union1d(s_old.breakpoints(t0, t_end), s_new.breakpoints(t0, t_end))
+    bounds = np.concatenate([[t0], edges, [t_end]])
+    mids = 0.5 * (bounds[:-1] + bounds[1:])
+    differ = np.asarray(s_old.intake(mids) != s_new.intake(mids)).reshape(len(mids), -1).any(axis=1)
+    changed = np.nonzero(differ)[0]
+    return float(bounds[changed[0]]) if len(changed) else None
+
+class _Store:
+    """Directorio de una corrida: checkpoints.npz comprimido y trajectory.npy mapeado."""
+
+    def __init__(self, path: str, key: str, shape: tuple):
+        os.makedirs(path, exist_ok=True)
+        self.key = key
+        self._checkpoints = os.path.join(path, 'checkpoints.npz')
+        trajectory = os.path.join(path, 'trajectory.npy')
+        self.times, self.states = None, None
+        if os.path.exists(self._checkpoints) and os.path.exists(trajectory):
+            with np.load(self._checkpoints) as data:
+                if str(data['key']) == key:
+                    self.times, self.states = data['times'], data['states']
+        mode = 'r+' if self.times is not None else 'w+'
+        self.trajectory = np.lib.format.open_memmap(trajectory, mode=mode, dtype=float, shape=shape)
+
+    def save(self, rows: slice, result: np.ndarray, times: list, states: list):
+        # Primero la salida y después los checkpoints que la declaran válida
+        self.trajectory[rows] = result[rows]
+        self.trajectory.flush()
+        tmp = f'{self._checkpoints}.{os.getpid()}.tmp.npz'
+        np.savez_compressed(tmp, key=self.key, times=np.array(times), states=np.array(states))
+        os.replace(tmp, self._checkpoints)
+
+def _key(run: CheckpointedRun) -> str:
+    return simulation_key(run.params, run.states[0], run.t, every=run.every, coupled=run.coupled,
+                          **run.odeint_kwargs)
+
+def _integrate(run: CheckpointedRun, start: int, store: _Store | None) -> CheckpointedRun:
+    # Integra desde el checkpoint `start` hasta t[-1], completando run
+    t, result = run.t, run.result
+    schedule = checkpoint_times(t[0], t[-1], run.every)
+    times, states = list(run.times[:start + 1]), list(run.states[:start + 1])
+    y = states[-1]
+    for a, b in zip(schedule[start:-1], schedule[start + 1:]):
+        inside = np.nonzero((t > a) & (t < b))[0]
+        t_seg = np.concatenate([[a], t[inside], [b]])
+        sol = simulate_piecewise(y, t_seg, run.params, coupled=run.coupled, **run.odeint_kwargs)
+        result[inside] = sol[1:-1]
+        y = sol[-1]
+        result[t == b] = y
+        times.append(b)
+        states.append(y)
+        if store is not None:
+            rows = slice(int(np.searchsorted(t, a, side='right')), int(np.searchsorted(t, b, side='right')))
+            store.save(rows, result, times, states)
+    run.times, run.states = np.array(times), np.array(states)
+    return run
+
+def simulate_checkpointed(state0: np.ndarray, t: np.ndarray, params: ModelParams | None = None,
+                          every: float | None = None, path: str | None = None,
+                          coupled: bool = False, **odeint_kwargs) -> CheckpointedRun:
+    """
+    Como simulation.simulate_piecewise, con un checkpoint cada `every` horas (por
+    defecto el período del horario de alimentación, o 24 h si no es periódico).
+    Con path escribe la corrida en ese directorio y, si ya contiene una corrida
+    interrumpida con las mismas entradas, la continúa desde su último checkpoint.
+    """
+    params = current_params() if params is None else params
+    state0 = np.asarray(state0, dtype=float)
+    t = np.asarray(t, dtype=float)
+    if every is None:
+        every = params.stomach.compiled().period or 24.0
+
+    result = np.empty((len(t),) + state0.shape)
+    result[0] = state0
+    run = CheckpointedRun(t=t, result=result, params=params, every=float(every),
+                          times=t[:1].copy(), states=state0[None], coupled=coupled,
+                          odeint_kwargs=odeint_kwargs, resumed_from=float(t[0]))
+    store = None
+    if path is not None:
+        store = _Store(path, _key(run), result.shape)
+        if store.times is not None:
+            rows = int(np.searchsorted(t, store.times[-1], side='right'))
+            result[:rows] = store.trajectory[:rows]
+            run.times, run.states = store.times, store.states
+            run.resumed_from = float(store.times[-1])
+        else:
+            store.save(slice(0, 1), result, list(run.times), list(run.states))
+    return _integrate(run, len(run.times) - 1, store)
+
+def resimulate(run: CheckpointedRun, params: ModelParams, changed_from: float | None = None,
+               path: str | None = None) -> CheckpointedRun:
+    """
+    Corrida de `run` con otros parámetros, reutilizando todo lo anterior al último
+    checkpoint previo al cambio (changed_from, o earliest_change si es None).
+    El resultado es idéntico al de simulate_checkpointed con los nuevos parámetros.
+    """
+    t = run.t
+    if changed_from is None:
+        changed_from = earliest_change(run.params, params, t[0], t[-1])
+    k = len(run.times) - 1 if changed_from is None else run.checkpoint_before(changed_from)
+
+    new = CheckpointedRun(t=t, result=run.result.copy(), params=params, every=run.every,
+                          times=run.times[:k + 1], states=run.states[:k + 1], coupled=run.coupled,
+                          odeint_kwargs=run.odeint_kwargs, resumed_from=float(run.times[k]))
+    store = None
+    if path is not None:
+        store = _Store(path, _key(new), new.result.shape)
+        rows = int(np.searchsorted(t, new.resumed_from, side='right'))
+        store.save(slice(0, rows), new.result, list(new.times), list(new.states))
+    return _integrate(new, k, store)
@@ -0,0 +1,121 @@
+# digestion_model/cli.py
+
+"""
+Interfaz de línea de comandos sin gráficos: python -m digestion_model (desde digestivo/).
+Subcomandos:
+    system    sistema completo (simulacion_TOTAL.simulate)
+    stomach   estómago (simu_stomach.simulate)
+    si1, si2  intestino delgado (simu_si1, simu_si2)
+    li        intestino grueso (simu_li)
+Salida: CSV o JSON (a stdout o a --output) o NPZ (--output obligatorio); por defecto
+CSV, y JSON con --summary. --summary integra siempre el sistema acoplado: sin acoplar
+la ingesta no llega al intestino y las métricas no tienen sentido.
+--plot grafica en lugar de escribir; matplotlib sólo se importa en ese caso.
+Para arrancar rápido (p.ej. en pools de procesos) los módulos del modelo, numpy y
+scipy se importan sólo dentro del subcomando elegido: --help no los carga.
+Ejemplos:
+    python -m digestion_model system --hours 96 --format csv -o sistema.csv
+    python -m digestion_model system --summary
+    python -m digestion_model li --format npz -o li.npz
+"""
+
+import argparse
+import importlib
+import json
+import sys
+
+# Subcomando -> (módulo con simulate/plot/NAMES, descripción)
+COMMANDS = {
+    'system': ('simulacion_TOTAL', 'Sistema completo STO → SI1 → SI2 → LI'),
+    'stomach': ('simu_stomach', 'Contenido estomacal'),
+    'si1': ('simu_si1', 'Intestino delgado proximal (SI1)'),
+    'si2': ('simu_si2', 'Intestino delgado distal (SI2)'),
+    'li': ('simu_li', 'Intestino grueso (LI)'),
+}
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog='python -m digestion_model',
+        description='Modelo digestivo porcino (Strathe et al. 2008), sin gráficos por defecto.')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    for name, (_, help_text) in COMMANDS.items():
+        p = sub.add_parser(name, help=help_text, description=help_text)
+        p.add_argument('--hours', type=float, help='horizonte de simulación (h)')
+        p.add_argument('--points', type=int, help='número de tiempos de salida')
+        p.add_argument('--format', choices=['csv', 'json', 'npz'],
+                       help='formato de salida (por defecto csv; json con --summary)')
+        p.add_argument('-o', '--output', default='-', help="archivo de salida ('-' = stdout)")
+        p.add_argument('--plot', action='store_true', help='graficar (importa matplotlib)')
+        if name == 'system':
+            p.add_argument('--fused', action='store_true', help='lado derecho generado (codegen)')
+            p.add_argument('--coupled', action='store_true', help='sistema acoplado (graph)')
+            p.add_argument('--summary', action='store_true',
+                           help='sólo métricas de resumen (accumulators), sin trayectorias; '
+                                'siempre con el sistema acoplado')
+    return parser
+
+def write_output(t, result, names, fmt: str, output: str):
+    """Escribe (t, result) con una columna por nombre en CSV, JSON o NPZ."""
+    import numpy as np
+
+    result = np.asarray(result).reshape(len(t), -1)
+    if fmt == 'npz':
+        if output == '-':
+            raise SystemExit('--format npz requiere --output')
+        np.savez_compressed(output, t=t, result=result, names=np.array(names))
+        return
+
+    stream = sys.stdout if output == '-' else open(output, 'w', newline='')
+    try:
+        if fmt == 'csv':
+            np.savetxt(stream, np.column_stack([t, result]), delimiter=',',
+                       header=','.join(['t'] + list(names)), comments='', fmt='%.10g')
+        else:
+            data = {'t': t.tolist(), **{n: result[:, j].tolist() for j, n in enumerate(names)}}
+            json.dump(data, stream)
+            stream.write('\n')
+    finally:
+        if stream is not sys.stdout:
+            stream.close()
+
+def run_summary(args) -> int:
+    from accumulators import simulate_summary
+    from simulacion_TOTAL import initial_state
+
+    hours = 96.0 if args.hours is None else args.hours
+    summary = simulate_summary(initial_state(), hours, coupled=True)
+    metrics = {k: float(v) for k, v in summary.metrics().items()}
+    fmt = args.format or 'json'
+    if fmt != 'json':
+        # Una fila: el horizonte y una columna por métrica
+        import numpy as np
+        write_output(np.array([hours]), np.array([list(metrics.values())]), list(metrics), fmt, args.output)
+        return 0
+    text = json.dumps({'hours': hours, **metrics}, indent=2)
+    if args.output == '-':
+        print(text)
+    else:
+        with open(args.output, 'w') as fh:
+            fh.write(text + '\n')
+    return 0
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    if args.command == 'system' and args.summary:
+        return run_summary(args)
+
+    module = importlib.import_module(COMMANDS[args.command][0])
+    kwargs = {k: v for k, v in [('hours', args.hours), ('points', args.points)] if v is not None}
+    if args.command == 'system':
+        kwargs.update(fused=args.fused, coupled=args.coupled)
+    t, result = module.simulate(**kwargs)
+
+    if args.plot:
+        module.plot(t, result)
+    else:
+        write_output(t, result, module.NAMES, args.format or 'csv', args.output)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
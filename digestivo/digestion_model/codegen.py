@@ -0,0 +1,248 @@
+# digestion_model/codegen.py
+
+"""
+Generación de un lado derecho fusionado y especializado para un conjunto de parámetros.
+dSYSTEM_dt recorre cuatro módulos, 21 cinéticas Michaelis–Menten y varias listas y
+arrays intermedios en cada evaluación. generate_source escribe una única función
+    rhs(t, y, out)
+en línea recta, con todas las constantes de los parámetros insertadas como literales,
+sin listas intermedias, que escribe en el buffer `out` ya reservado.
+Las operaciones siguen el mismo orden que el camino escalar de cada módulo, por lo
+que el resultado coincide bit a bit con dSYSTEM_dt.
+generate_qssa_source escribe del mismo modo el lado derecho del sistema reducido de
+qssa.py (24 pools lentos, pools solubles del intestino delgado en equilibrio).
+Los módulos generados se guardan en disco, nombrados por el hash de los parámetros
+(cache.params_key) y de este generador: las corridas siguientes los importan sin
+regenerarlos.
+"""
+
+import hashlib
+import importlib.util
+import inspect
+import os
+import sys
+
+import numpy as np
+
+from cache import params_key
+from feeding import FeedingSchedule
+from model import IDX
+from parameters import ModelParams, current_params
+
+DEFAULT_DIRECTORY = os.environ.get(
+    'DIGESTION_CODEGEN_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'digestion_model', 'codegen'))
+
+# Más comidas que esto (p.ej. registros de comedero) se buscan con bisect en el código generado
+_INLINE_MEALS = 16
+
+def _mm(name: str, S: str, vmax: float, km: float) -> str:
+    return f'    {name} = {vmax!r} * {S} / ({km!r} + {S} + 1e-9)'
+
+def _sum(*terms: str) -> str:
+    """Suma de términos con signo, omitiendo constantes nulas (x + 0.0 == x)."""
+    out = ''
+    for term in terms:
+        if term in ('+ 0.0', '- 0.0'):
+            continue
+        out = term.lstrip('+ ') if not out else f'{out} {term}'
+    return out
+
+def _scalars(params: ModelParams):
+    compiled = [params.si1.compiled(), params.si2.compiled(),
+                params.li.compiled(), params.microbial.compiled()]
+    stomach = [params.stomach.TFEED, params.stomach.FFEED, params.stomach.DMI,
+               params.stomach.CSTO_pa, params.li.CLI_OM_0, params.li.CLI_pa_kn]
+    if (any(c.scalar is None for c in compiled) or any(np.ndim(v) for v in stomach)
+            or params.stomach.compiled().n_animals is not None):
+        raise ValueError('codegen requiere parámetros escalares (un solo animal)')
+    return [c.scalar for c in compiled]
+
+def _ingestion(schedule: FeedingSchedule) -> tuple[list[str], list[str]]:
+    """
+    (cabecera, cuerpo) que calculan `ing`. Pocas comidas: condiciones en línea;
+    registros largos: búsqueda binaria sobre tuplas del módulo.
+    """
+    starts, ends, rates = (a.tolist() for a in (schedule.starts, schedule.ends, schedule.rates))
+    t_mod = 't' if schedule.period is None else f't % {float(schedule.period)!r}'
+    body = [f'    t_mod = {t_mod}']
+    if not starts:
+        return [], body + ['    ing = 0.0']
+    if len(starts) > _INLINE_MEALS:
+        header = ['from bisect import bisect_right as _bisect',
+                  f'_STARTS = {tuple(starts)!r}', f'_ENDS = {tuple(ends)!r}', f'_RATES = {tuple(rates)!r}']
+        return header, body + ['    i = _bisect(_STARTS, t_mod) - 1',
+                               '    ing = _RATES[i] if i >= 0 and t_mod < _ENDS[i] else 0.0']
+    if len(set(rates)) == 1:
+        windows = ' or '.join(f'{a!r} <= t_mod < {b!r}' for a, b in zip(starts, ends))
+        return [], body + [f'    ing = {rates[0]!r} if ({windows}) else 0.0']
+    chain = ' else '.join(f'{r!r} if {a!r} <= t_mod < {b!r}' for a, b, r in zip(starts, ends, rates))
+    return [], body + [f'    ing = {chain} else 0.0']
+
+def _li(params: ModelParams, li_c, mic_c, X: list[str]) -> tuple[list[str], list[str]]:
+    """(líneas previas, expresión de la derivada de cada pool) del intestino grueso."""
+    lp = params.li
+    vmax, km, _, sc = li_c
+    CMM, fr_VFA, fr_CO2, fr_CH4 = mic_c
+    h = ['li_DP', 'li_EP', 'li_NAPN', 'li_ST', 'li_DDF', 'li_LD']
+    lines = ['', '    # LI',
+             f'    OM = {" + ".join(X[:9])}',
+             f'    k_li = {float(lp.CLI_pa_0)!r} * float(_exp(-({float(lp.CLI_OM_0)!r}) * OM**{float(lp.CLI_pa_kn)!r}))']
+    lines += [_mm(h[k], X[k], vmax[k], km[k]) for k in range(6)]
+    lines += [
+        '    C_source = li_ST + li_DDF + li_LD',
+        '    N_source = li_DP + li_EP + li_NAPN',
+        f'    growth = {CMM!r} * (C_source if C_source <= N_source else N_source)',
+        f'    C_remaining = C_source - growth / {CMM!r}',
+    ]
+    exprs = [
+        _sum('- ' + h[0], f'- {X[0]} * k_li'),
+        _sum('- ' + h[1], f'- {X[1]} * k_li', f'+ {sc[1]!r}'),
+        _sum('- ' + h[2], f'- {X[2]} * k_li', f'+ {sc[2]!r}'),
+        _sum('- ' + h[3], f'- {X[3]} * k_li'),
+        _sum('- ' + h[4], f'- {X[4]} * k_li'),
+        _sum('- ' + h[5], f'- {X[5]} * k_li'),
+        _sum('+ ' + h[3], f'- {X[6]} * k_li'),
+        _sum('+ ' + h[5], f'- {X[7]} * k_li'),
+        _sum('+ N_source', f'- {X[8]} * k_li'),
+        _sum(f'+ {fr_VFA!r} * C_remaining', f'- {X[9]} * k_li'),
+        _sum(f'+ {fr_CO2!r} * C_remaining', f'- {X[10]} * k_li'),
+        _sum(f'+ {fr_CH4!r} * C_remaining', f'- {X[11]} * k_li'),
+        _sum('+ growth', f'- k_li * {X[12]}'),
+    ]
+    return lines, exprs
+
+def generate_source(params: ModelParams | None = None) -> str:
+    """Código fuente del módulo especializado para `params` (escalares)."""
+    params = current_params() if params is None else params
+    si1_c, si2_c, li_c, mic_c = _scalars(params)
+    st = params.stomach
+    header, ingestion = _ingestion(st.compiled())
+
+    y = [f'y{i}' for i in range(30)]
+    lines = [
+        '# Generado por digestion_model/codegen.py: no editar',
+        'from numpy import exp as _exp',
+        *header,
+        '',
+        'def rhs(t, y, out):',
+        f'    ({", ".join(y)},) = y.tolist()',
+        '',
+        '    # STO',
+        *ingestion,
+        f'    out[0] = ing - {float(st.CSTO_pa)!r} * y0',
+    ]
+
+    for comp, (vmax, km, pa, sc) in [('SI1', si1_c), ('SI2', si2_c)]:
+        X = y[IDX[comp]]
+        r = [f'{comp.lower()}_{k}' for k in range(8)]
+        lines += ['', f'    # {comp}']
+        lines += [_mm(r[k], X[k], vmax[k], km[k]) for k in range(8)]
+        produced = {5: ['+ ' + r[3]], 6: ['+ ' + r[4]], 7: ['+ ' + r[0], '+ ' + r[1], '+ ' + r[2]]}
+        for k in range(8):
+            if k < 5:
+                terms = ['- ' + r[k]]
+            else:
+                terms = produced[k] + ['- ' + r[k]]
+            expr = _sum(*terms, f'+ {sc[k]!r}', f'- {pa!r} * {X[k]}')
+            lines.append(f'    out[{IDX[comp].start + k}] = {expr}')
+
+    li_lines, exprs = _li(params, li_c, mic_c, y[IDX['LI']])
+    lines += li_lines
+    lines += [f'    out[{IDX["LI"].start + k}] = {e}' for k, e in enumerate(exprs)]
+    lines += ['    return out', '']
+    return '\n'.join(lines)
+
+def generate_qssa_source(params: ModelParams | None = None, flows: tuple = ()) -> str:
+    """
+    Código fuente de rhs(t, slow, out) del sistema reducido de qssa.py: los 24 pools
+    lentos en `slow` y `out`, con SU, FA y AA de SI1 y SI2 fijados en su equilibrio
+    (steady_state.mm_balance_scalar) antes de usarlos. flows: (destino, origen, tasa)
+    de graph.CoupledSystem.T, sumados a las entradas y derivadas (sistema acoplado).
+    """
+    params = current_params() if params is None else params
+    si1_c, si2_c, li_c, mic_c = _scalars(params)
+    st = params.stomach
+    header, ingestion = _ingestion(st.compiled())
+
+    y = [f'y{i}' for i in range(30)]
+    fast = [IDX[comp].start + k for comp in ('SI1', 'SI2') for k in (5, 6, 7)]
+    slow = [i for i in range(30) if i not in fast]
+    position = {row: j for j, row in enumerate(slow)}
+    inflow = {row: [f'+ {rate!r} * {y[col]}' for r, col, rate in flows if r == row and rate]
+              for row in range(30)}
+
+    def write(row: int, expr: str) -> str:
+        return f'    out[{position[row]}] = {" ".join([expr] + inflow[row])}'
+
+    lines = [
+        '# Generado por digestion_model/codegen.py: no editar',
+        'from numpy import exp as _exp',
+        'from steady_state import mm_balance_scalar as _balance',
+        *header,
+        '',
+        'def rhs(t, slow, out):',
+        f'    ({", ".join(y[i] for i in slow)},) = slow.tolist()',
+        '',
+        '    # STO',
+        *ingestion,
+        write(0, f'ing - {float(st.CSTO_pa)!r} * y0'),
+    ]
+
+    for comp, (vmax, km, pa, sc) in [('SI1', si1_c), ('SI2', si2_c)]:
+        start = IDX[comp].start
+        X = y[IDX[comp]]
+        r = [f'{comp.lower()}_{k}' for k in range(5)]
+        lines += ['', f'    # {comp}']
+        lines += [_mm(r[k], X[k], vmax[k], km[k]) for k in range(5)]
+        # Pools rápidos: entrada = secreción + hidrólisis (+ pasaje), en equilibrio con MM + pa X
+        produced = {5: r[3], 6: r[4], 7: f'({r[0]} + {r[1]} + {r[2]})'}
+        for k in (5, 6, 7):
+            entrada = _sum(f'+ {sc[k]!r}', '+ ' + produced[k], *inflow[start + k])
+            lines.append(f'    {X[k]} = _balance({entrada}, {vmax[k]!r}, {km[k] + 1e-9!r}, {pa!r})')
+        for k in range(5):
+            lines.append(write(start + k, _sum('- ' + r[k], f'+ {sc[k]!r}', f'- {pa!r} * {X[k]}')))
+
+    li_lines, exprs = _li(params, li_c, mic_c, y[IDX['LI']])
+    lines += li_lines
+    lines += [write(IDX['LI'].start + k, e) for k, e in enumerate(exprs)]
+    lines += ['    return out', '']
+    return '\n'.join(lines)
+
+_GENERATOR_HASH = hashlib.sha256(inspect.getsource(sys.modules[__name__]).encode()).hexdigest()[:16]
+_loaded = {}
+
+def _load(name: str, source, directory: str | None):
+    # Módulo generado `name` (source() da su código), en memoria o en el caché en disco
+    if name in _loaded:
+        return _loaded[name]
+    if directory is None:
+        module = type(sys)(name)
+        exec(compile(source(), name, 'exec'), module.__dict__)
+    else:
+        path = os.path.join(directory, name + '.py')
+        if not os.path.exists(path):
+            os.makedirs(directory, exist_ok=True)
+            tmp = f'{path}.{os.getpid()}.tmp'
+            with open(tmp, 'w') as fh:
+                fh.write(source())
+            os.replace(tmp, path)
+        spec = importlib.util.spec_from_file_location(name, path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+    _loaded[name] = module
+    return module
+
+def fused_rhs(params: ModelParams | None = None, directory: str | None = DEFAULT_DIRECTORY):
+    """
+    Retorna rhs(t, y, out) especializado para `params`, importándolo del caché en
+    disco si ya fue generado (directory=None: sólo en memoria, sin escribir archivos).
+    """
+    key = hashlib.sha256((params_key(params) + _GENERATOR_HASH).encode()).hexdigest()[:32]
+    return _load(f'_fused_rhs_{key}', lambda: generate_source(params), directory).rhs
+
+def fused_qssa_rhs(params: ModelParams | None = None, flows: tuple = (),
+                   directory: str | None = DEFAULT_DIRECTORY):
+    """Como fused_rhs, para rhs(t, slow, out) de generate_qssa_source."""
+    tag = params_key(params) + _GENERATOR_HASH + repr(tuple(flows))
+    key = hashlib.sha256(tag.encode()).hexdigest()[:32]
+    return _load(f'_qssa_rhs_{key}', lambda: generate_qssa_source(params, flows), directory).rhs
@@ -0,0 +1,43 @@
+# digestion_model/comparar_jacobiano.py
+
+"""
+Compara el costo de integrar 96 h con y sin el jacobiano analítico (jac_SYSTEM).
+Sin Dfun, LSODA aproxima el jacobiano por diferencias finitas (≈30 evaluaciones
+extra de dSYSTEM_dt por cada reconstrucción).
+Reporta evaluaciones del lado derecho (nfe), del jacobiano (nje) y tiempo de pared.
+"""
+
+import time
+
+import numpy as np
+from scipy.integrate import odeint, solve_ivp
+
+from model import dSYSTEM_dt, jac_SYSTEM, IDX
+
+# Mismas condiciones que test_digestibilidad.simulate_96h
+t = np.linspace(0, 96, 2000)
+state0 = np.zeros(30)
+state0[IDX['SI1']] = [1.0, 0.5, 0.5, 2.0, 1.5, 0, 0, 0]
+state0[IDX['SI2']] = [0.5, 0.3, 0.3, 1.0, 0.8, 0, 0, 0]
+state0[IDX['LI']] = [0.3, 0.2, 0.2, 0.5, 0.8, 0.3, 0, 0, 0, 0, 0, 0, 0]
+
+print(f"{'Integrador':<22}{'nfe':>8}{'nje':>6}{'tiempo (s)':>12}")
+
+for nombre, Dfun in [("odeint (dif. finitas)", None), ("odeint + jac_SYSTEM", jac_SYSTEM)]:
+    t0 = time.perf_counter()
+    _, info = odeint(dSYSTEM_dt, state0, t, Dfun=Dfun, full_output=True)
+    dt = time.perf_counter() - t0
+    print(f"{nombre:<22}{info['nfe'][-1]:>8}{info['nje'][-1]:>6}{dt:>12.3f}")
+
+def rhs(ti, y):
+    return dSYSTEM_dt(y, ti)
+
+def jac(ti, y):
+    return jac_SYSTEM(y, ti)
+
+for metodo in ["LSODA", "BDF", "Radau"]:
+    for nombre, J in [("dif. finitas", None), ("jac_SYSTEM", jac)]:
+        t0 = time.perf_counter()
+        sol = solve_ivp(rhs, (t[0], t[-1]), state0, method=metodo, t_eval=t, jac=J)
+        dt = time.perf_counter() - t0
+        print(f"{metodo + ' ' + nombre:<22}{sol.nfev:>8}{sol.njev:>6}{dt:>12.3f}")
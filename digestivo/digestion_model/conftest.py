@@ -0,0 +1,38 @@
+# digestion_model/conftest.py
+
+"""
+Fixtures compartidas por las pruebas: el estado inicial de referencia (intestinos
+con contenido, estómago vacío) y un directorio temporal para los módulos generados
+por codegen.py, para que las pruebas no escriban en ~/.cache.
+"""
+
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pytest
+
+from model import IDX
+
+_CODEGEN_DIR = None
+
+def pytest_configure(config):
+    # Antes de importar codegen: su directorio por defecto sale de DIGESTION_CODEGEN_DIR
+    global _CODEGEN_DIR
+    if 'DIGESTION_CODEGEN_DIR' not in os.environ:
+        _CODEGEN_DIR = tempfile.mkdtemp(prefix='digestion_codegen_')
+        os.environ['DIGESTION_CODEGEN_DIR'] = _CODEGEN_DIR
+
+def pytest_unconfigure(config):
+    if _CODEGEN_DIR is not None:
+        shutil.rmtree(_CODEGEN_DIR, ignore_errors=True)
+
+@pytest.fixture
+def estado_inicial() -> np.ndarray:
+    """Estado (30,) con contenido en SI1, SI2 y LI; uno nuevo por prueba."""
+    state0 = np.zeros(30)
+    state0[IDX['SI1']] = [1.0, 0.5, 0.5, 2.0, 1.5, 0, 0, 0]
+    state0[IDX['SI2']] = [0.5, 0.3, 0.3, 1.0, 0.8, 0, 0, 0]
+    state0[IDX['LI']] = [0.3, 0.2, 0.2, 0.5, 0.8, 0.3, 0, 0, 0, 0, 0, 0, 0]
+    return state0
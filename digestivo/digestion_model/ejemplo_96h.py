@@ -7,9 +7,9 @@ Simula el sistema completo durante 96 h y calcula digestibilidades aparentes.
 
 import numpy as np
 import matplotlib.pyplot as plt
-from scipy.integrate import odeint
 
-from model import dSYSTEM_dt, IDX
+from model import IDX
+from result import simulate
 
 # Tiempo de simulación
 t = np.linspace(0, 96, 2000)
@@ -21,12 +21,12 @@ state0[IDX['SI2']] = [0.5, 0.3, 0.3, 1.0, 0.8, 0.0, 0.0, 0.0]
 state0[IDX['LI']]  = [0.3, 0.2, 0.2, 0.5, 0.8, 0.3, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0]
 
 # Integrar el sistema
-result = odeint(dSYSTEM_dt, state0, t)
+res = simulate(state0, t)
 
 # Graficar curva total de VFA, MM y CH4
-VFA = result[:, IDX['LI'].start + 9]
-MM = result[:, IDX['LI'].start + 12]
-CH4 = result[:, IDX['LI'].start + 11]
+VFA = res.LI.VFA
+MM = res.LI.MM
+CH4 = res.LI.CH4
 
 plt.figure(figsize=(10, 5))
 plt.plot(t, VFA, label='Ácidos Grasos Volátiles (VFA)')
@@ -40,10 +40,8 @@ plt.grid()
 plt.tight_layout()
 plt.show()
 
-# Digestibilidad aparente de la proteína (ejemplo)
-entrada_DP = np.trapz(result[:, IDX['SI1'].start], t)  # DP en SI1
-salida_DP = np.trapz(result[:, IDX['LI'].start], t)    # DP en LI
-digestibilidad_prot = 1 - (salida_DP / (entrada_DP + 1e-9))
+# Digestibilidad aparente de la proteína (ejemplo): 1 - ∫DP(LI) / ∫DP(SI1)
+digestibilidad_prot = res.digestibilidad_proteica
 print(f"Digestibilidad aparente de la proteína: {digestibilidad_prot:.2%}")
 # digestion_model/ejemplo.py
 
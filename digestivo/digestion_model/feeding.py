@@ -0,0 +1,170 @@
+# digestion_model/feeding.py
+
+"""
+Horario de alimentación precalculado.
+FeedingSchedule guarda las comidas como ventanas [inicio, fin) con su tasa de
+ingestión (kg DM/h), ordenadas y sin superposición, opcionalmente repetidas con
+un período (24 h para un horario diario; None para un registro de comidas único,
+p.ej. de un comedero electrónico).
+    Se construye una sola vez: desde StomachParams (f comidas iguales y equiespaciadas
+    de TFEED horas, como el modelo original) o desde una lista arbitraria de eventos
+    con su cantidad y duración (from_events), o continuo a tasa constante (continuous).
+    intake(t) busca la ventana por búsqueda binaria: bisect para un t escalar,
+    np.searchsorted para arrays de tiempos.
+    Un horario por animal (stack) tiene arrays (N, k); las filas con menos comidas
+    se completan con ventanas vacías en +inf, y la búsqueda binaria se vectoriza
+    sobre los animales.
+    breakpoints(t0, t1) da los bordes de las ventanas, donde la ingestión es
+    discontinua, para el driver por tramos (simulation.py).
+"""
+
+from bisect import bisect_right
+from dataclasses import dataclass
+
+import numpy as np
+
+@dataclass(frozen=True, eq=False)
+class FeedingSchedule:
+    starts: np.ndarray           # Inicio de cada comida (h), (k,) o (N, k), crecientes
+    ends: np.ndarray             # Fin de cada comida (h), misma forma
+    rates: np.ndarray            # Tasa de ingestión durante la comida (kg DM/h)
+    period: float | None = 24.0  # Repetición del horario (h); None: eventos únicos
+
+    def __post_init__(self):
+        starts, ends, rates = (np.array(a, dtype=float) for a in (self.starts, self.ends, self.rates))
+        if not starts.shape == ends.shape == rates.shape or starts.ndim not in (1, 2):
+            raise ValueError('starts, ends y rates deben tener la misma forma (k,) o (N, k)')
+        finite = np.isfinite(starts)
+        if np.any(ends[finite] <= starts[finite]):
+            raise ValueError('cada comida debe durar más de 0 h (su tasa es cantidad / duración)')
+        if np.any(ends[..., :-1] > starts[..., 1:]):
+            raise ValueError('las comidas deben estar ordenadas y no superponerse')
+        if self.period is not None and np.any(ends[finite] > self.period):
+            raise ValueError(f'las comidas deben terminar dentro del período ({self.period} h)')
+        for a in (starts, ends, rates):
+            a.flags.writeable = False
+        object.__setattr__(self, 'starts', starts)
+        object.__setattr__(self, 'ends', ends)
+        object.__setattr__(self, 'rates', rates)
+        if starts.ndim == 1:
+            # Listas de floats de Python para la búsqueda escalar (bisect)
+            object.__setattr__(self, '_lists', (starts.tolist(), ends.tolist(), rates.tolist()))
+
+    # ---------------------------------------------------
+    # CONSTRUCCIÓN
+    # ---------------------------------------------------
+    @classmethod
+    def from_params(cls, p) -> 'FeedingSchedule':
+        """
+        Horario diario de StomachParams: FFEED comidas iguales cada 24/FFEED h, de
+        TFEED horas, a tasa DMI/(FFEED*TFEED). Con campos arrays (N,), un horario por animal.
+        Si TFEED > 24/FFEED cada comida se corta en el inicio de la siguiente y la
+        última a las 24 h, como hacía stomach.ingestion_schedule original (la tasa no
+        se suma donde las ventanas se superponen y no pasa al día siguiente); un
+        horario explícito con esas comidas lanza ValueError.
+        """
+        T, f, DMI = p.TFEED, p.FFEED, p.DMI
+        if np.ndim(T) or np.ndim(f) or np.ndim(DMI):
+            T, f, DMI = np.broadcast_arrays(T, f, DMI)
+            if all(np.all(a == a.flat[0]) for a in (T, f, DMI)):
+                # Todos los animales comen igual: un solo horario, la ingestión se difunde
+                return cls.from_params(_Meals(*(float(a.flat[0]) for a in (T, f, DMI))))
+            return cls.stack([cls.from_params(_Meals(T_i, f_i, D_i))
+                              for T_i, f_i, D_i in zip(T.tolist(), f.tolist(), DMI.tolist())])
+        starts = np.linspace(0, 24, int(f) + 1)[:-1]
+        ends = np.minimum(starts + T, np.append(starts[1:], 24.0))
+        return cls(starts, ends, np.full(len(starts), DMI / (f * T)), period=24.0)
+
+    @classmethod
+    def from_events(cls, times, amounts, durations, period: float | None = None) -> 'FeedingSchedule':
+        """
+        Comidas individuales: inicio (h), cantidad (kg DM) y duración (h) de cada una,
+        en cualquier orden. Con period (p.ej. 24.0) el registro se repite.
+        Las duraciones deben ser > 0: una comida instantánea de un registro de comedero
+        necesita una duración mínima explícita (ValueError si no).
+        """
+        times, amounts, durations = np.broadcast_arrays(
+            np.asarray(times, dtype=float), np.asarray(amounts, dtype=float),
+            np.asarray(durations, dtype=float))
+        if np.any(durations <= 0):
+            raise ValueError('from_events: las duraciones deben ser > 0 h')
+        order = np.argsort(times, kind='stable')
+        starts = times[order]
+        return cls(starts, starts + durations[order], amounts[order] / durations[order], period)
+
+    @classmethod
+    def continuous(cls, rate: float, period: float = 24.0) -> 'FeedingSchedule':
+        """Alimentación continua (ad libitum): ingestión constante de `rate` kg DM/h."""
+        return cls([0.0], [period], [rate], period)
+
+    @classmethod
+    def stack(cls, schedules: list['FeedingSchedule']) -> 'FeedingSchedule':
+        """Un horario por animal, (N, k), con ventanas vacías en +inf para completar filas."""
+        periods = {s.period for s in schedules}
+        if len(periods) != 1 or any(s.starts.ndim != 1 for s in schedules):
+            raise ValueError('stack requiere horarios de un animal con el mismo período')
+        k = max(len(s.starts) for s in schedules)
+        starts = np.full((len(schedules), k), np.inf)
+        ends = np.full((len(schedules), k), np.inf)
+        rates = np.zeros((len(schedules), k))
+        for i, s in enumerate(schedules):
+            n = len(s.starts)
+            starts[i, :n], ends[i, :n], rates[i, :n] = s.starts, s.ends, s.rates
+        return cls(starts, ends, rates, periods.pop())
+
+    # ---------------------------------------------------
+    # CONSULTA
+    # ---------------------------------------------------
+    @property
+    def n_animals(self) -> int | None:
+        return None if self.starts.ndim == 1 else self.starts.shape[0]
+
+    def intake(self, t):
+        """
+        Tasa de ingestión (kg DM/h) en t. Un animal: float para t escalar, array con
+        la forma de t si no. Por animal: (N,) para t escalar, (len(t), N) para arrays.
+        """
+        t_mod = t if self.period is None else t % self.period
+        if self.starts.shape[-1] == 0:
+            shape = np.shape(t) + self.starts.shape[:-1]
+            return np.zeros(shape) if shape else 0.0
+
+        if self.starts.ndim == 1:
+            if np.ndim(t) == 0:
+                starts, ends, rates = self._lists
+                i = bisect_right(starts, t_mod) - 1
+                return rates[i] if i >= 0 and t_mod < ends[i] else 0.0
+            i = np.searchsorted(self.starts, t_mod, side='right') - 1
+            j = np.maximum(i, 0)
+            return np.where((i >= 0) & (t_mod < self.ends[j]), self.rates[j], 0.0)
+
+        # Búsqueda binaria vectorizada por fila: bisect_right de t_mod en starts[n]
+        n, k = self.starts.shape
+        q = np.asarray(t_mod, dtype=float)[..., None] + np.zeros(n)
+        rows = np.arange(n)
+        lo = np.zeros(q.shape, dtype=int)
+        hi = np.full(q.shape, k)
+        for _ in range(k.bit_length()):
+            active = lo < hi
+            mid = (lo + hi) // 2
+            right = self.starts[rows, np.minimum(mid, k - 1)] <= q
+            lo = np.where(active & right, mid + 1, lo)
+            hi = np.where(active & ~right, mid, hi)
+        j = np.maximum(lo - 1, 0)
+        return np.where((lo > 0) & (q < self.ends[rows, j]), self.rates[rows, j], 0.0)
+
+    def breakpoints(self, t0: float, t1: float) -> np.ndarray:
+        """Bordes de las comidas (de todos los animales) en el intervalo abierto (t0, t1)."""
+        edges = np.concatenate([self.starts.ravel(), self.ends.ravel()])
+        edges = edges[np.isfinite(edges)]
+        if self.period is not None:
+            days = range(int(np.floor(t0 / self.period)), int(np.ceil(t1 / self.period)) + 1)
+            edges = np.concatenate([day * self.period + edges for day in days] or [edges])
+        edges = np.unique(edges)
+        return edges[(edges > t0) & (edges < t1)]
+
+@dataclass
+class _Meals:
+    TFEED: float
+    FFEED: float
+    DMI: float
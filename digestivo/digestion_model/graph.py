@@ -0,0 +1,136 @@
+# digestion_model/graph.py
+
+"""
+Grafo de compartimentos y sistema acoplado STO → SI1 → SI2 → LI.
+dSYSTEM_dt evalúa cada compartimento por separado: el pasaje -k X sale de cada pool
+pero no entra en el compartimento siguiente. Aquí cada módulo declara sus pools
+(POOLS) y sus salidas lineales (outflows(params) -> [(pool, 'DESTINO.pool', tasa)]),
+y el grafo las ensambla una sola vez en una matriz de transferencia dispersa T con
+T[destino, origen] = tasa. El sistema acoplado es entonces
+    dy/dt = dSYSTEM_dt(y) + T @ y
+con un solo producto disperso por evaluación, y su jacobiano es jac_SYSTEM + T.
+La salida (-k X) ya está en cada núcleo: T sólo agrega la entrada al destino.
+Para agregar un compartimento (p.ej. dividir LI en ciego y colon) basta declarar
+sus pools y salidas y sumarlo a la lista del grafo.
+"""
+
+from dataclasses import dataclass
+from typing import Callable
+
+import numpy as np
+from scipy import sparse
+
+import li
+import si1
+import si2
+import stomach
+from model import dSYSTEM_dt, jac_SYSTEM
+from parameters import ModelParams, current_params
+
+@dataclass
+class Compartment:
+    name: str
+    pools: list[str]
+    outflows: Callable[[ModelParams], list]
+
+class CompartmentGraph:
+    """Compartimentos en el orden del vector de estado y sus flujos lineales."""
+
+    def __init__(self, compartments: list[Compartment]):
+        self.compartments = compartments
+        self.names = [f'{c.name}.{pool}' for c in compartments for pool in c.pools]
+        self.index = {name: i for i, name in enumerate(self.names)}
+        self.size = len(self.names)
+
+    def blocks(self) -> list[slice]:
+        """Rango del vector de estado que ocupa cada compartimento."""
+        out, start = [], 0
+        for c in self.compartments:
+            out.append(slice(start, start + len(c.pools)))
+            start += len(c.pools)
+        return out
+
+    def transfer_matrix(self, params: ModelParams, n_animals: int | None = None) -> sparse.csr_matrix:
+        """
+        Matriz T (size x size) con T[destino, origen] = tasa de transferencia (1/h).
+        Con n_animals, T es bloque-diagonal sobre el vector plano (N*size,) de un
+        rebaño y las tasas pueden ser arrays (N,) por animal.
+        """
+        rows, cols, rates = [], [], []
+        for c in self.compartments:
+            for pool, target, rate in c.outflows(params):
+                rows.append(self.index[target])
+                cols.append(self.index[f'{c.name}.{pool}'])
+                rates.append(rate)
+
+        if n_animals is None:
+            return sparse.csr_matrix((np.asarray(rates, dtype=float), (rows, cols)),
+                                     shape=(self.size, self.size))
+
+        offsets = np.arange(n_animals)[:, None] * self.size
+        rates = np.stack([np.broadcast_to(np.asarray(r, dtype=float), (n_animals,)) for r in rates],
+                         axis=1)
+        n = n_animals * self.size
+        return sparse.csr_matrix((rates.ravel(), ((offsets + rows).ravel(), (offsets + cols).ravel())),
+                                 shape=(n, n))
+
+    def jac_sparsity(self, params: ModelParams, n_animals: int | None = None) -> sparse.csr_matrix:
+        """
+        Patrón de no nulos del jacobiano acoplado: bloques densos por compartimento
+        (cinética interna) más los flujos entre compartimentos.
+        """
+        pattern = sparse.block_diag([np.ones((b.stop - b.start,) * 2) for b in self.blocks()])
+        if n_animals is not None:
+            pattern = sparse.block_diag([pattern] * n_animals)
+        pattern = pattern + abs(self.transfer_matrix(params, n_animals))
+        return (pattern != 0).astype(float).tocsr()
+
+def default_graph() -> CompartmentGraph:
+    """Grafo estándar STO → SI1 → SI2 → LI (mismo orden que model.IDX)."""
+    return CompartmentGraph([
+        Compartment('STO', stomach.POOLS, stomach.outflows),
+        Compartment('SI1', si1.POOLS, si1.outflows),
+        Compartment('SI2', si2.POOLS, si2.outflows),
+        Compartment('LI', li.POOLS, li.outflows),
+    ])
+
+class CoupledSystem:
+    """
+    Sistema acoplado para un conjunto de parámetros: T se ensambla una vez en el
+    constructor. Para otro conjunto de parámetros, crear otro CoupledSystem.
+    Si n_animals no es None, trabaja sobre el vector plano de un rebaño (N*30,).
+    """
+
+    def __init__(self, params: ModelParams | None = None, graph: CompartmentGraph | None = None,
+                 n_animals: int | None = None):
+        self.params = params
+        self.graph = default_graph() if graph is None else graph
+        self.n_animals = n_animals
+        resolved = current_params() if params is None else params
+        self.T = self.graph.transfer_matrix(resolved, n_animals)
+        self._T_dense = self.T.toarray() if n_animals is None else None
+        self.sparsity = self.graph.jac_sparsity(resolved, n_animals)
+
+    def rhs(self, y: np.ndarray, t: float) -> np.ndarray:
+        if self.n_animals is None:
+            return dSYSTEM_dt(y, t, self.params) + self.T @ y
+        own = dSYSTEM_dt(y.reshape(self.n_animals, -1), t, self.params).ravel()
+        return own + self.T @ y
+
+    def jac(self, y: np.ndarray, t: float) -> np.ndarray:
+        """Jacobiano denso (30, 30) de un animal: jac_SYSTEM + T."""
+        return jac_SYSTEM(y, t, self.params) + self._T_dense
+
+    def jac_sparse(self, y: np.ndarray, t: float) -> sparse.csr_matrix:
+        """Jacobiano disperso (también para rebaños), apto para solve_ivp BDF/Radau."""
+        if self.n_animals is None:
+            return (sparse.csr_matrix(jac_SYSTEM(y, t, self.params)) + self.T).tocsr()
+        from herd import jac_HERD_sparse
+        return jac_HERD_sparse(y, t, self.n_animals, self.params, self).tocsr()
+
+def dCOUPLED_dt(state: np.ndarray, t: float, params: ModelParams | None = None) -> np.ndarray:
+    """
+    Derivada del sistema acoplado para un animal. Ensambla T en cada llamada:
+    para integrar, usar CoupledSystem(params).rhs, que lo ensambla una sola vez.
+    """
+    return CoupledSystem(params).rhs(np.asarray(state, dtype=float), t)
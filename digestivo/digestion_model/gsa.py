@@ -0,0 +1,222 @@
+# digestion_model/gsa.py
+
+"""
+Análisis de sensibilidad global: qué parámetros de parameters.py determinan la
+digestibilidad ileal, la producción de VFA y de CH4.
+Este módulo:
+    morris: cribado por efectos elementales (Morris, 1991; μ* de Campolongo et al.,
+    2007) con r trayectorias de un-factor-a-la-vez sobre una grilla de p niveles.
+    sobol: índices de primer orden (S1, estimador de Saltelli et al., 2010) y
+    totales (ST, estimador de Jansen) con matrices A, B y AB_i de una secuencia
+    de Sobol (scipy.stats.qmc): N (d + 2) evaluaciones para d parámetros.
+    Intervalos de confianza por bootstrap (remuestreo de trayectorias o de filas),
+    como 1.96 desvíos estándar de las réplicas.
+    Los parámetros se expresan como 'grupo.campo' con cotas (bajo, alto); las
+    salidas son métricas de accumulators.FluxSummary.metrics.
+Rendimiento:
+    Cada lote de puntos se simula como un rebaño (herd.replicate_params con un
+    array por parámetro variado) en una sola integración sólo-resumen
+    (accumulators.simulate_summary), y los lotes se reparten entre un pool de
+    procesos como en montecarlo.py.
+    Por defecto rtol=1e-6, atol=1e-9: los índices no necesitan más precisión que eso.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+import numpy as np
+from scipy.stats import qmc
+
+from accumulators import simulate_summary
+from herd import replicate_params
+from parameters import ModelParams, current_params
+
+DEFAULT_OUTPUTS = ['digestibilidad_ileal_N', 'VFA', 'CH4']
+
+@dataclass
+class MorrisResult:
+    names: list[str]          # Parámetros, como 'grupo.campo'
+    outputs: list[str]        # Métricas de FluxSummary.metrics
+    mu: np.ndarray            # Media de los efectos elementales, (d, m)
+    mu_star: np.ndarray       # Media del valor absoluto, (d, m)
+    sigma: np.ndarray         # Desvío de los efectos elementales, (d, m)
+    mu_star_conf: np.ndarray  # Semiancho del IC 95% de mu_star por bootstrap, (d, m)
+    X: np.ndarray             # Puntos evaluados, (r (d + 1), d)
+    Y: np.ndarray             # Salidas, (r (d + 1), m)
+
+    def ranking(self, output: str) -> list[str]:
+        """Parámetros ordenados por mu_star decreciente para `output`."""
+        k = self.outputs.index(output)
+        return [self.names[i] for i in np.argsort(-self.mu_star[:, k], kind='stable')]
+
+@dataclass
+class SobolResult:
+    names: list[str]
+    outputs: list[str]
+    S1: np.ndarray            # Índices de primer orden, (d, m)
+    S1_conf: np.ndarray       # Semiancho del IC 95% por bootstrap, (d, m)
+    ST: np.ndarray            # Índices totales, (d, m)
+    ST_conf: np.ndarray
+    X: np.ndarray             # Puntos evaluados [A; B; AB_1; ...; AB_d], (N (d + 2), d)
+    Y: np.ndarray             # Salidas, (N (d + 2), m)
+
+    def ranking(self, output: str) -> list[str]:
+        """Parámetros ordenados por ST decreciente para `output`."""
+        k = self.outputs.index(output)
+        return [self.names[i] for i in np.argsort(-self.ST[:, k], kind='stable')]
+
+def relative_bounds(names: list[str], spread: float = 0.2,
+                    base: ModelParams | None = None) -> dict[str, tuple[float, float]]:
+    """Cotas (1 - spread, 1 + spread) veces el valor base de cada campo."""
+    base = current_params() if base is None else base
+    bounds = {}
+    for name in names:
+        group, field = name.split('.')
+        value = getattr(getattr(base, group), field)
+        bounds[name] = tuple(sorted((value * (1 - spread), value * (1 + spread))))
+    return bounds
+
+# -------------------------------------------------------
+# EVALUACIÓN POR LOTES
+# -------------------------------------------------------
+def _evaluate_batch(job) -> np.ndarray:
+    X, names, base, state0, hours, outputs, odeint_kwargs = job
+    herd = replicate_params(len(X), base)
+    for j, name in enumerate(names):
+        group, field = name.split('.')
+        setattr(getattr(herd, group), field, X[:, j].copy())
+    state = np.broadcast_to(state0, (len(X), len(state0)))
+    summary = simulate_summary(state, hours, params=herd, coupled=True, **odeint_kwargs)
+    values = summary.metrics(herd)
+    return np.column_stack([np.broadcast_to(values[m], len(X)) for m in outputs])
+
+def evaluate(X: np.ndarray, names: list[str], outputs: list[str] | None = None,
+             base: ModelParams | None = None, state0: np.ndarray | None = None,
+             hours: float = 96.0, workers: int | None = None,
+             batch_size: int = 256, **odeint_kwargs) -> np.ndarray:
+    """
+    Métricas `outputs` en cada fila de X (valores de `names`), (len(X), len(outputs)).
+    Las filas se simulan en lotes de batch_size animales; workers=1 en este proceso.
+    Siempre con el sistema acoplado: FluxSummary.metrics no admite otro.
+    """
+    if 'coupled' in odeint_kwargs:
+        raise TypeError('evaluate integra siempre el sistema acoplado: no admite coupled')
+    base = current_params() if base is None else base
+    outputs = DEFAULT_OUTPUTS if outputs is None else list(outputs)
+    state0 = np.zeros(30) if state0 is None else np.asarray(state0, dtype=float)
+    workers = os.cpu_count() if workers is None else workers
+    odeint_kwargs.setdefault('rtol', 1e-6)
+    odeint_kwargs.setdefault('atol', 1e-9)
+
+    X = np.asarray(X, dtype=float)
+    jobs = [(X[a:a + batch_size], list(names), base, state0, hours, outputs, odeint_kwargs)
+            for a in range(0, len(X), batch_size)]
+    if workers == 1 or len(jobs) == 1:
+        results = [_evaluate_batch(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_evaluate_batch, jobs))
+    return np.concatenate(results) if results else np.empty((0, len(outputs)))
+
+def _scale(U: np.ndarray, lower: np.ndarray, upper: np.ndarray) -> np.ndarray:
+    return lower + U * (upper - lower)
+
+# -------------------------------------------------------
+# MORRIS
+# -------------------------------------------------------
+def morris_trajectories(d: int, trajectories: int, levels: int = 4, seed: int = 0) -> np.ndarray:
+    """
+    Trayectorias de Morris en [0, 1]^d, (trajectories, d + 1, d): cada paso mueve un
+    parámetro (en orden aleatorio) en ±Δ, Δ = p / (2 (p - 1)), sin salir del cubo.
+    """
+    rng = np.random.default_rng(seed)
+    delta = levels / (2 * (levels - 1))
+    grid = np.arange(levels) / (levels - 1)
+    paths = np.empty((trajectories, d + 1, d))
+    for r in range(trajectories):
+        x = rng.choice(grid, size=d)
+        step = np.where(x + delta <= 1 + 1e-12, delta, -delta)
+        paths[r, 0] = x
+        for k, i in enumerate(rng.permutation(d)):
+            x = x.copy()
+            x[i] += step[i]
+            paths[r, k + 1] = x
+    return paths
+
+def _elementary_effects(paths: np.ndarray, Y: np.ndarray) -> np.ndarray:
+    # (r, d, m): efecto de cada parámetro en unidades de salida por rango completo
+    r, steps, d = paths.shape
+    dX = np.diff(paths, axis=1)                     # (r, d, d): un solo no nulo por paso
+    dY = np.diff(Y.reshape(r, steps, -1), axis=1)   # (r, d, m)
+    moved = np.argmax(np.abs(dX), axis=2)           # parámetro movido en cada paso
+    delta = np.take_along_axis(dX, moved[..., None], axis=2)
+    EE = np.empty_like(dY)
+    np.put_along_axis(EE, moved[..., None], dY / delta, axis=1)
+    return EE
+
+def morris(bounds: dict[str, tuple[float, float]], outputs: list[str] | None = None,
+           trajectories: int = 20, levels: int = 4, seed: int = 0, n_bootstrap: int = 1000,
+           **kwargs) -> MorrisResult:
+    """
+    Cribado de Morris de los parámetros de `bounds` ({'grupo.campo': (bajo, alto)}):
+    trajectories * (d + 1) simulaciones. kwargs: ver evaluate (base, hours, workers, ...).
+    """
+    names = list(bounds)
+    outputs = DEFAULT_OUTPUTS if outputs is None else list(outputs)
+    lower, upper = np.array([bounds[n] for n in names], dtype=float).T
+
+    paths = morris_trajectories(len(names), trajectories, levels, seed)
+    X = _scale(paths.reshape(-1, len(names)), lower, upper)
+    Y = evaluate(X, names, outputs, **kwargs)
+    EE = _elementary_effects(paths, Y)
+
+    rng = np.random.default_rng(seed)
+    boot = np.array([np.abs(EE[rng.integers(trajectories, size=trajectories)]).mean(axis=0)
+                     for _ in range(n_bootstrap)])
+    return MorrisResult(names=names, outputs=outputs, mu=EE.mean(axis=0),
+                        mu_star=np.abs(EE).mean(axis=0), sigma=EE.std(axis=0, ddof=1),
+                        mu_star_conf=1.96 * boot.std(axis=0, ddof=1), X=X, Y=Y)
+
+# -------------------------------------------------------
+# SOBOL
+# -------------------------------------------------------
+def _sobol_indices(fA, fB, fAB):
+    # fA, fB (N, m); fAB (d, N, m)
+    var = np.var(np.concatenate([fA, fB]), axis=0) + 1e-300
+    S1 = np.mean(fB * (fAB - fA), axis=1) / var
+    ST = 0.5 * np.mean((fA - fAB)**2, axis=1) / var
+    return S1, ST
+
+def sobol(bounds: dict[str, tuple[float, float]], n: int = 1024, outputs: list[str] | None = None,
+          seed: int = 0, n_bootstrap: int = 100, **kwargs) -> SobolResult:
+    """
+    Índices de Sobol S1 y ST de los parámetros de `bounds`, con N = n redondeado a
+    potencia de 2 muestras base: N (d + 2) simulaciones. kwargs: ver evaluate.
+    """
+    names = list(bounds)
+    outputs = DEFAULT_OUTPUTS if outputs is None else list(outputs)
+    d = len(names)
+    lower, upper = np.array([bounds[k] for k in names], dtype=float).T
+
+    U = qmc.Sobol(2 * d, scramble=True, seed=seed).random_base2(int(np.ceil(np.log2(max(n, 2)))))
+    A, B = U[:, :d], U[:, d:]
+    AB = np.repeat(A[None], d, axis=0)
+    AB[np.arange(d), :, np.arange(d)] = B.T
+    X = _scale(np.concatenate([A, B, AB.reshape(-1, d)]), lower, upper)
+    Y = evaluate(X, names, outputs, **kwargs)
+
+    N = len(A)
+    fA, fB, fAB = Y[:N], Y[N:2 * N], Y[2 * N:].reshape(d, N, -1)
+    S1, ST = _sobol_indices(fA, fB, fAB)
+
+    rng = np.random.default_rng(seed)
+    boot_S1, boot_ST = [], []
+    for _ in range(n_bootstrap):
+        rows = rng.integers(N, size=N)
+        s1, st = _sobol_indices(fA[rows], fB[rows], fAB[:, rows])
+        boot_S1.append(s1)
+        boot_ST.append(st)
+    return SobolResult(names=names, outputs=outputs, S1=S1, ST=ST,
+                       S1_conf=1.96 * np.std(boot_S1, axis=0, ddof=1),
+                       ST_conf=1.96 * np.std(boot_ST, axis=0, ddof=1), X=X, Y=Y)
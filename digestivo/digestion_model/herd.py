@@ -0,0 +1,153 @@
+# digestion_model/herd.py
+
+"""
+Simulación de un rebaño completo de N cerdos en una sola llamada al integrador.
+El estado del rebaño es un array (N, 30) (una fila por animal, mismo orden que IDX)
+y los parámetros por animal son un ModelParams cuyos campos son arrays (N,).
+Este módulo define:
+    replicate_params / stack_params: construcción de parámetros por animal
+    dHERD_dt: derivada del rebaño sobre el vector plano (N*30,) que usa odeint
+    jac_HERD_blocks / jac_HERD / jac_HERD_sparse: el jacobiano del rebaño
+    simulate_herd: integra el rebaño completo con odeint (o solve_ivp BDF/Radau)
+Jacobiano: cada animal sólo depende de sí mismo, así que el jacobiano (N*30, N*30)
+es bloque-diagonal con un bloque jac_SYSTEM (30, 30) por animal (más T del sistema
+acoplado, graph.py, que también queda dentro de cada bloque). Nunca se arma denso:
+    LSODA recibe el formato de banda de odeint, con el ancho de banda de un bloque
+    (herd_bandwidths: 12 sin acoplar, ml = 21 / mu = 12 acoplado), y factoriza en
+    O(N) en lugar de los O(N³) del jacobiano denso por diferencias finitas.
+    BDF/Radau (solve_ivp) reciben una matriz dispersa por bloques (bsr) y la
+    factorizan con LU dispersa, también en O(N).
+"""
+
+from dataclasses import fields, replace
+
+import numpy as np
+from scipy import sparse
+from scipy.integrate import solve_ivp
+
+from feeding import FeedingSchedule
+from model import IDX, dSYSTEM_dt, jac_SYSTEM
+from parameters import ModelParams, current_params
+from simulation import serialized_odeint
+
+N_POOLS = 30
+
+def _map_groups(params: ModelParams, func) -> ModelParams:
+    """Aplica func(grupo, nombre_campo, valor) a cada campo de cada grupo."""
+    groups = {}
+    for g in fields(params):
+        group = getattr(params, g.name)
+        values = {f.name: func(g.name, f.name, getattr(group, f.name)) for f in fields(group)}
+        groups[g.name] = replace(group, **values)
+    return ModelParams(**groups)
+
+def replicate_params(n: int, base: ModelParams | None = None) -> ModelParams:
+    """
+    Parámetros por animal: cada campo de `base` repetido en un array (N,).
+    Los arrays pueden modificarse luego para introducir variación individual.
+    """
+    base = current_params() if base is None else base
+
+    def replicate(g, name, v):
+        if name == 'schedule':
+            return None if v is None else FeedingSchedule.stack([v] * n)
+        return np.full(n, v, dtype=float)
+
+    return _map_groups(base, replicate)
+
+def stack_params(animals: list[ModelParams]) -> ModelParams:
+    """
+    Apila una lista de ModelParams (uno por animal) en arrays (N,). Si algún animal
+    tiene un horario explícito, los horarios efectivos se apilan en uno por animal.
+    """
+    def stack(g, name, v):
+        if name == 'schedule':
+            if all(a.stomach.schedule is None for a in animals):
+                return None
+            return FeedingSchedule.stack([a.stomach.compiled() for a in animals])
+        return np.array([getattr(getattr(a, g), name) for a in animals], dtype=float)
+
+    return _map_groups(animals[0], stack)
+
+def dHERD_dt(y: np.ndarray, t: float, n: int, params: ModelParams | None = None) -> np.ndarray:
+    """
+    Derivada del rebaño sobre el vector plano (N*30,) que maneja el integrador.
+    Cada bloque contiguo de 30 valores corresponde a un animal.
+    """
+    return dSYSTEM_dt(y.reshape(n, N_POOLS), t, params).ravel()
+
+def herd_bandwidths(system=None) -> tuple[int, int]:
+    """
+    Anchos de banda (ml, mu) del bloque de un animal: el mayor compartimento sin
+    acoplar; con un graph.CoupledSystem, según el patrón de su jacobiano.
+    """
+    if system is None:
+        width = max(s.stop - s.start for s in IDX.values() if isinstance(s, slice)) - 1
+        return width, width
+    S = system.sparsity.tocoo()
+    rows, cols = S.row % N_POOLS, S.col % N_POOLS
+    return int(np.max(rows - cols)), int(np.max(cols - rows))
+
+def jac_HERD_blocks(y: np.ndarray, t: float, n: int, params: ModelParams | None = None,
+                    system=None) -> np.ndarray:
+    """Bloques diagonales del jacobiano del rebaño, (N, 30, 30); con system, más T."""
+    J = jac_SYSTEM(np.reshape(y, (n, N_POOLS)), t, params)
+    if system is not None:
+        # T es bloque-diagonal: cada entrada cae en el bloque de su animal
+        T = system.T.tocoo()
+        np.add.at(J, (T.row // N_POOLS, T.row % N_POOLS, T.col % N_POOLS), T.data)
+    return J
+
+def band_blocks(J: np.ndarray, size: int, ml: int, mu: int, stride: int = N_POOLS) -> np.ndarray:
+    """
+    Bloques (N, 30, 30) en el formato de banda de odeint, (ml + mu + 1, size): el
+    bloque i ocupa las filas y columnas i*stride ... i*stride + 29 (stride > 30 deja
+    variables extra entre animales, p.ej. los acumuladores de accumulators.py).
+    """
+    rows, cols = np.nonzero(np.tri(N_POOLS, k=mu, dtype=bool) & ~np.tri(N_POOLS, k=-ml - 1, dtype=bool))
+    band = np.zeros((ml + mu + 1, size))
+    band[mu + rows - cols, np.arange(len(J))[:, None] * stride + cols] = J[:, rows, cols]
+    return band
+
+def jac_HERD(y: np.ndarray, t: float, n: int, params: ModelParams | None = None,
+             ml: int = 12, mu: int = 12) -> np.ndarray:
+    """Jacobiano de dHERD_dt en formato de banda, para odeint(..., ml=ml, mu=mu)."""
+    return band_blocks(jac_HERD_blocks(y, t, n, params), y.size, ml, mu)
+
+def jac_HERD_sparse(y: np.ndarray, t: float, n: int, params: ModelParams | None = None,
+                    system=None) -> sparse.bsr_matrix:
+    """Jacobiano del rebaño como matriz dispersa por bloques (N*30, N*30)."""
+    J = jac_HERD_blocks(y, t, n, params, system)
+    return sparse.bsr_matrix((J, np.arange(n), np.arange(n + 1)), shape=(n * N_POOLS,) * 2)
+
+def simulate_herd(state0: np.ndarray, t: np.ndarray, params: ModelParams | None = None,
+                  method: str = 'LSODA', **odeint_kwargs) -> np.ndarray:
+    """
+    Integra N animales a la vez.
+
+    state0: array (N, 30) con el estado inicial de cada animal.
+    params: ModelParams con escalares (compartidos) o arrays (N,) por animal.
+    method: 'LSODA' (odeint, jacobiano en banda) o 'BDF' / 'Radau' (solve_ivp,
+            jacobiano disperso por bloques); odeint_kwargs va al integrador elegido.
+    Retorna un array (len(t), N, 30) (y el dict de odeint si full_output=True).
+    """
+    state0 = np.atleast_2d(np.asarray(state0, dtype=float))
+    n = state0.shape[0]
+    t = np.asarray(t, dtype=float)
+
+    if method != 'LSODA':
+        sol = solve_ivp(lambda t_, y: dHERD_dt(y, t_, n, params), (t[0], t[-1]), state0.ravel(),
+                        method=method, t_eval=t, jac=lambda t_, y: jac_HERD_sparse(y, t_, n, params),
+                        **odeint_kwargs)
+        if not sol.success:
+            raise RuntimeError(f'solve_ivp ({method}): {sol.message}')
+        return sol.y.T.reshape(len(t), n, N_POOLS)
+
+    if 'Dfun' not in odeint_kwargs:
+        ml, mu = herd_bandwidths()
+        odeint_kwargs = dict(odeint_kwargs, Dfun=jac_HERD, ml=ml, mu=mu)
+    out = serialized_odeint(dHERD_dt, state0.ravel(), t, args=(n, params), **odeint_kwargs)
+    if odeint_kwargs.get('full_output'):
+        result, info = out
+        return result.reshape(len(t), n, N_POOLS), info
+    return out.reshape(len(t), n, N_POOLS)
@@ -0,0 +1,197 @@
+# digestion_model/instrumentation.py
+
+"""
+Instrumentación opcional del camino caliente: contadores de llamadas, tiempos por
+compartimento y estadísticas del integrador.
+Dentro de `with instrument() as report:` (o con profile(func, ...)):
+    dStomach_dt, dSI1_dt, dSI2_dt, dLI_dt, dSYSTEM_dt y jac_SYSTEM cuentan llamadas
+    y tiempo acumulado (inclusivo: dSYSTEM_dt incluye el de los compartimentos).
+    Cada llamada a odeint registra pasos, evaluaciones de f y del jacobiano,
+    cambios de método de LSODA (Adams <-> BDF) y pasos rechazados, estimados como
+    los retrocesos del tiempo entre evaluaciones sucesivas de f (un paso rechazado
+    se reintenta con un paso menor).
+    solve_ivp (el de este módulo, que reemplaza también al de scipy importado por
+    los módulos del modelo, p.ej. herd.simulate_herd con BDF/Radau) registra nfev,
+    njev, nlu y rechazos del mismo modo. Con t_eval no se conocen los pasos: steps
+    queda en None para el resto del bloque.
+La instrumentación reemplaza temporalmente las referencias a esas funciones en los
+módulos del modelo ya importados y las restaura al salir: fuera del bloque no hay
+ningún envoltorio ni chequeo, por lo que el costo es nulo. No es segura entre hilos
+(las referencias reemplazadas son globales).
+"""
+
+import os
+import sys
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+
+import numpy as np
+from scipy import integrate
+
+import li
+import model
+import si1
+import si2
+import stomach
+
+_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+
+# Funciones instrumentadas, con el nombre bajo el que aparecen en el reporte
+_FUNCTIONS = {
+    'dStomach_dt': stomach.dStomach_dt,
+    'dSI1_dt': si1.dSI1_dt,
+    'dSI2_dt': si2.dSI2_dt,
+    'dLI_dt': li.dLI_dt,
+    'dSYSTEM_dt': model.dSYSTEM_dt,
+    'jac_SYSTEM': model.jac_SYSTEM,
+}
+
+@dataclass
+class CallStats:
+    calls: int = 0
+    seconds: float = 0.0
+
+@dataclass
+class SolverStats:
+    calls: int = 0             # Llamadas al integrador (una por tramo en simulate_piecewise)
+    steps: int | None = 0      # Pasos aceptados (nst); None tras un solve_ivp con t_eval
+    nfe: int = 0               # Evaluaciones del lado derecho informadas por el integrador
+    nje: int = 0               # Evaluaciones (o reconstrucciones) del jacobiano
+    nlu: int = 0               # Factorizaciones LU (solve_ivp BDF/Radau)
+    rejected: int = 0          # Pasos rechazados (retrocesos de t entre evaluaciones)
+    method_switches: int = 0   # Cambios Adams <-> BDF de LSODA
+    seconds: float = 0.0
+
+@dataclass
+class Report:
+    functions: dict = field(default_factory=dict)   # nombre -> CallStats
+    solver: SolverStats = field(default_factory=SolverStats)
+
+    def as_dict(self) -> dict:
+        """Reporte como dict de tipos básicos (serializable a JSON)."""
+        return {'functions': {k: asdict(v) for k, v in self.functions.items()},
+                'solver': asdict(self.solver)}
+
+    def __str__(self) -> str:
+        lines = [f"{'Función':<14}{'llamadas':>10}{'tiempo (s)':>12}{'µs/llamada':>12}"]
+        for name, s in self.functions.items():
+            per_call = 1e6 * s.seconds / s.calls if s.calls else 0.0
+            lines.append(f'{name:<14}{s.calls:>10}{s.seconds:>12.4f}{per_call:>12.1f}')
+        s = self.solver
+        lines.append(f'Integrador: {s.calls} llamadas, {s.steps} pasos, {s.rejected} rechazados, '
+                     f'nfe={s.nfe}, nje={s.nje}, {s.method_switches} cambios de método, '
+                     f'{s.seconds:.4f} s')
+        return '\n'.join(lines)
+
+def _timed(func, stats: CallStats):
+    def wrapper(*args, **kwargs):
+        t0 = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            stats.calls += 1
+            stats.seconds += time.perf_counter() - t0
+    wrapper.__wrapped__ = func
+    return wrapper
+
+def _backtrack_counter(func, time_first: bool):
+    """Envuelve f para contar retrocesos del tiempo entre evaluaciones sucesivas."""
+    state = {'t': -np.inf, 'rejected': 0}
+    def wrapper(*args):
+        t = args[0] if time_first else args[1]
+        if t < state['t']:
+            state['rejected'] += 1
+        state['t'] = t
+        return func(*args)
+    return wrapper, state
+
+def _instrumented_odeint(odeint, solver: SolverStats):
+    def wrapper(func, y0, t, args=(), Dfun=None, full_output=False, **kwargs):
+        f, counter = _backtrack_counter(func, kwargs.get('tfirst', False))
+        t0 = time.perf_counter()
+        out = odeint(f, y0, t, args=args, Dfun=Dfun, full_output=True, **kwargs)
+        solver.seconds += time.perf_counter() - t0
+
+        sol, info = out[0], out[1]
+        solver.calls += 1
+        if solver.steps is not None:
+            solver.steps += int(info['nst'][-1])
+        solver.nfe += int(info['nfe'][-1])
+        solver.nje += int(info['nje'][-1])
+        solver.rejected += counter['rejected']
+        solver.method_switches += int(np.count_nonzero(np.diff(info['mused'])))
+        return out if full_output else sol
+    wrapper.__wrapped__ = odeint
+    return wrapper
+
+_active: Report | None = None
+
+def solve_ivp(fun, t_span, y0, **kwargs):
+    """scipy.integrate.solve_ivp que registra sus estadísticas si hay instrumentación activa."""
+    if _active is None:
+        return integrate.solve_ivp(fun, t_span, y0, **kwargs)
+
+    solver = _active.solver
+    f, counter = _backtrack_counter(fun, time_first=True)
+    t0 = time.perf_counter()
+    sol = integrate.solve_ivp(f, t_span, y0, **kwargs)
+    solver.seconds += time.perf_counter() - t0
+
+    solver.calls += 1
+    if kwargs.get('t_eval') is None and solver.steps is not None:
+        solver.steps += len(sol.t) - 1
+    else:
+        solver.steps = None
+    solver.nfe += int(sol.nfev)
+    solver.nje += int(sol.njev)
+    solver.nlu += int(sol.nlu)
+    solver.rejected += counter['rejected']
+    return sol
+
+def _model_modules():
+    """Módulos del modelo ya importados (los de este directorio)."""
+    return [m for m in list(sys.modules.values())
+            if os.path.dirname(os.path.abspath(getattr(m, '__file__', None) or '/')) == _DIRECTORY
+            and m.__name__ != __name__]
+
+@contextmanager
+def instrument():
+    """
+    Activa la instrumentación dentro del bloque y entrega el Report que se va llenando.
+    Uso:
+        with instrument() as report:
+            result = simulate_piecewise(state0, t)
+        print(report)
+    """
+    global _active
+    if _active is not None:
+        raise RuntimeError('la instrumentación ya está activa')
+
+    report = Report()
+    replacements = {id(func): _timed(func, report.functions.setdefault(name, CallStats()))
+                    for name, func in _FUNCTIONS.items()}
+    replacements[id(integrate.odeint)] = _instrumented_odeint(integrate.odeint, report.solver)
+    # Módulos que importaron solve_ivp de scipy (herd.py) pasan por el de este módulo
+    replacements[id(integrate.solve_ivp)] = solve_ivp
+
+    originals = []
+    for module in _model_modules():
+        for attr, value in list(vars(module).items()):
+            if id(value) in replacements and callable(value):
+                originals.append((module, attr, value))
+                setattr(module, attr, replacements[id(value)])
+
+    _active = report
+    try:
+        yield report
+    finally:
+        _active = None
+        for module, attr, value in originals:
+            setattr(module, attr, value)
+
+def profile(func, *args, **kwargs):
+    """Ejecuta func(*args, **kwargs) instrumentada: retorna (resultado, Report)."""
+    with instrument() as report:
+        result = func(*args, **kwargs)
+    return result, report
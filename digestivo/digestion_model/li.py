@@ -12,76 +12,263 @@ Calcula la derivada de los contenidos del intestino grueso:
 [DP, EP, NAPN, ST, DDF, LD, SU, FA, AA, VFA, CO2, CH4, MM]
 """
 
+from dataclasses import fields
+
 import numpy as np
-from parameters import li_params, microbial_params
+from parameters import LIParams, MicrobialParams, ModelParams, current_params
+
+# Declaración para el grafo de compartimentos (graph.py)
+POOLS = ['DP', 'EP', 'NAPN', 'ST', 'DDF', 'LD', 'SU', 'FA', 'AA', 'VFA', 'CO2', 'CH4', 'MM']
+
+def outflows(params: ModelParams) -> list[tuple[str, str, float]]:
+    """
+    LI no transfiere a otro compartimento: su pasaje no lineal (pasaje_li) sale
+    del sistema como heces y ya está incluido en dLI_dt.
+    """
+    return []
+
+# Flujos acumulables (ver accumulators.py): hidrólisis, crecimiento microbiano,
+# fermentación del C remanente y pasaje a heces de cada pool
+FLUXES = ([f'hyd.{pool}' for pool in ['DP', 'EP', 'NAPN', 'ST', 'DDF', 'LD']]
+          + ['growth', 'ferm.VFA', 'ferm.CO2', 'ferm.CH4']
+          + [f'pas.{pool}' for pool in POOLS])
 
 def michaelis_menten(S: float, vmax: float, km: float) -> float:
     return vmax * S / (km + S + 1e-9)
 
-def pasaje_li(OM_total: float) -> float:
+def dmichaelis_menten_dS(S: float, vmax: float, km: float) -> float:
+    return vmax * (km + 1e-9) / (km + S + 1e-9)**2
+
+def pasaje_li(OM_total: float, params: LIParams | None = None) -> float:
     """
     Tasa de pasaje del contenido del intestino grueso,
     definida como una función no lineal del total de materia orgánica.
     """
-    return li_params.CLI_pa_0 * np.exp(-li_params.CLI_OM_0 * OM_total**li_params.CLI_pa_kn)
+    p = current_params().li if params is None else params
+    return p.CLI_pa_0 * np.exp(-p.CLI_OM_0 * OM_total**p.CLI_pa_kn)
+
+def dpasaje_li_dOM(OM_total: float, params: LIParams | None = None) -> float:
+    """Derivada de pasaje_li respecto de la OM total."""
+    p = current_params().li if params is None else params
+    return -pasaje_li(OM_total, p) * p.CLI_OM_0 * p.CLI_pa_kn * OM_total**(p.CLI_pa_kn - 1)
+
+def _dLI_dt_animal(pools: list[float], p: LIParams, kinetics: tuple, fractions: tuple) -> list[float]:
+    """dLI_dt para un solo animal, con las constantes compiladas como floats de Python."""
+    vmax, km, _, sc = kinetics
+    CMM, fr_VFA, fr_CO2, fr_CH4 = fractions
+    DP, EP, NAPN, ST, DDF, LD, SU, FA, AA, VFA, CO2, CH4, MM = pools
+
+    k_li = pasaje_li(DP + EP + NAPN + ST + DDF + LD + SU + FA + AA, p)
+
+    h_DP, h_EP, h_NAPN, h_ST, h_DDF, h_LD = [
+        v * S / (k + S + 1e-9) for S, v, k in zip(pools, vmax, km)]
 
-def dLI_dt(state: list[float], t: float) -> list[float]:
+    C_source = h_ST + h_DDF + h_LD
+    N_source = h_DP + h_EP + h_NAPN
+    growth = CMM * min(C_source, N_source)
+    C_remaining = C_source - growth / CMM
+
+    return [
+        -h_DP - DP * k_li,
+        -h_EP - EP * k_li + sc[1],
+        -h_NAPN - NAPN * k_li + sc[2],
+        -h_ST - ST * k_li,
+        -h_DDF - DDF * k_li,
+        -h_LD - LD * k_li,
+        +h_ST - SU * k_li,
+        +h_LD - FA * k_li,
+        +N_source - AA * k_li,
+        fr_VFA * C_remaining - VFA * k_li,
+        fr_CO2 * C_remaining - CO2 * k_li,
+        fr_CH4 * C_remaining - CH4 * k_li,
+        +growth - k_li * MM,
+    ]
+
+def dLI_dt(state: list[float], t: float,
+           params: LIParams | None = None,
+           microbial: MicrobialParams | None = None) -> list[float] | np.ndarray:
     """
     Derivadas para los siguientes pools en LI:
     [DP, EP, NAPN, ST, DDF, LD, SU, FA, AA, VFA, CO2, CH4, MM]
+
+    Acepta un estado (13,) o (13, N) y parámetros escalares o arrays (N,);
+    retorna una lista para un animal y un array (13, N) para un rebaño.
     """
-    DP, EP, NAPN, ST, DDF, LD, SU, FA, AA, VFA, CO2, CH4, MM = state
+    p = current_params().li if params is None else params
+    mp = current_params().microbial if microbial is None else microbial
+    c = p.compiled()
 
-    # Cálculo de OM total fermentable
-    OM_total = DP + EP + NAPN + ST + DDF + LD + SU + FA + AA
+    x = np.asarray(state, dtype=float)
 
-    # Tasa de pasaje
-    k_li = pasaje_li(OM_total)
+    if x.ndim == 1 and c.scalar is not None and mp.compiled().scalar is not None:
+        return _dLI_dt_animal(x.tolist(), p, c.scalar, mp.compiled().scalar)
 
-    # Hidrólisis microbiana
-    h_DP = michaelis_menten(DP, li_params.CLI_DP_hyv, li_params.CLI_DP_hyk)
-    h_EP = michaelis_menten(EP, li_params.CLI_EP_hyv, li_params.CLI_EP_hyk)
-    h_NAPN = michaelis_menten(NAPN, li_params.CLI_NAPN_hyv, li_params.CLI_NAPN_hyk)
-    h_ST = michaelis_menten(ST, li_params.CLI_ST_hyv, li_params.CLI_ST_hyk)
-    h_DDF = michaelis_menten(DDF, li_params.CLI_DDF_hyv, li_params.CLI_DDF_hyk)
-    h_LD = michaelis_menten(LD, li_params.CLI_LD_hyv, li_params.CLI_LD_hyk)
+    # Rebaño: pools en el eje 0 (un animal por columna)
+    X = x.reshape(13, -1)
 
-    # Carbono disponible total para crecimiento microbiano
-    C_source = h_ST + h_DDF + h_LD
-    N_source = h_DP + h_EP + h_NAPN
+    # Cálculo de OM total fermentable (DP..AA) y tasa de pasaje
+    OM_total = X[:9].sum(axis=0)
+    k_li = pasaje_li(OM_total, p)
+
+    # Hidrólisis microbiana de DP, EP, NAPN, ST, DDF, LD en una sola llamada
+    h = michaelis_menten(X[:6], c.vmax, c.km)
+
+    # Carbono y nitrógeno disponibles para crecimiento microbiano
+    C_source = h[3:6].sum(axis=0)
+    N_source = h[0:3].sum(axis=0)
+
+    # Producción de masa microbiana y C remanente hacia VFA, CO2 y CH4
+    growth = mp.CMM * np.minimum(C_source, N_source)
+    C_remaining = C_source - growth / mp.CMM
+
+    # Pasaje y secreciones endógenas (EP, NAPN)
+    dX = k_li * X
+    np.subtract(c.sc, dX, out=dX)
 
-    # Producción de masa microbiana
-    growth = microbial_params.CMM * min(C_source, N_source)
-    dMM = +growth - k_li * MM
+    # Hidrólisis de polímeros y productos solubles
+    dX[:6] -= h
+    dX[6] += h[3]
+    dX[7] += h[5]
+    dX[8] += N_source
 
-    # C consumido por microbios (una parte queda, el resto se convierte)
-    C_used = growth / microbial_params.CMM
-    C_remaining = C_source - C_used
+    # Fermentación y crecimiento microbiano
+    dX[9:12] += mp.compiled().fr * C_remaining
+    dX[12] += growth
 
-    # Productos de fermentación (basados en fracciones moleculares)
-    dVFA = microbial_params.CMM_ACET_fr * C_remaining + \
-           microbial_params.CMM_PROP_fr * C_remaining + \
-           microbial_params.CMM_BUT_fr * C_remaining
+    return dX.reshape(x.shape)
 
-    dCO2 = microbial_params.CMM_CO2_fr * C_remaining
-    dCH4 = microbial_params.CMM_CH4_fr * C_remaining
+def flux_rates(state: list[float], t: float,
+               params: LIParams | None = None,
+               microbial: MicrobialParams | None = None) -> np.ndarray:
+    """
+    Flujos instantáneos en el orden de FLUXES. Retorna (23,) para un estado (13,)
+    o (23, N) para un estado (13, N).
+    """
+    p = current_params().li if params is None else params
+    mp = current_params().microbial if microbial is None else microbial
+    c = p.compiled()
+
+    x = np.asarray(state, dtype=float)
+    X = x.reshape(13, -1)
+
+    k_li = pasaje_li(X[:9].sum(axis=0), p)
+    h = michaelis_menten(X[:6], c.vmax, c.km)
+    C_source = h[3:6].sum(axis=0)
+    growth = mp.CMM * np.minimum(C_source, h[0:3].sum(axis=0))
+    ferm = mp.compiled().fr * (C_source - growth / mp.CMM)
+
+    F = np.concatenate([h, growth[None], ferm, k_li * X])
+    return F.reshape((23,) + x.shape[1:])
+
+def jac_LI(state: list[float], t: float,
+           params: LIParams | None = None,
+           microbial: MicrobialParams | None = None) -> np.ndarray:
+    """
+    Jacobiano exacto de dLI_dt: J[i, j] = d(dX_i/dt) / dX_j, array (13, 13).
+    Con un estado (13, N) retorna un array (13, 13, N).
+
+    El pasaje k_li(OM) acopla cada pool con los 9 pools de OM, y el término
+    min(C_source, N_source) toma la rama activa (C si C <= N, si no N).
+    """
+    p = current_params().li if params is None else params
+    mp = current_params().microbial if microbial is None else microbial
+    c = p.compiled()
+
+    x = np.asarray(state, dtype=float)
+    X = x.reshape(13, -1)
+
+    OM_total = X[:9].sum(axis=0)
+    k_li = pasaje_li(OM_total, p)
+    dk_li = dpasaje_li_dOM(OM_total, p)
+
+    h = michaelis_menten(X[:6], c.vmax, c.km)
+    dh = dmichaelis_menten_dS(X[:6], c.vmax, c.km)
+
+    # Pasaje: d(-X_i * k_li)/dX_j = -k_li * delta_ij - X_i * dk_li (j en pools de OM)
+    J = -k_li * np.eye(13)[:, :, None]
+    J[:, :9] -= X[:, None, :] * dk_li
+
+    # Hidrólisis de polímeros
+    hyd = np.arange(6)
+    J[hyd, hyd] -= dh
+
+    # Productos solubles
+    J[6, 3] += dh[3]
+    J[7, 5] += dh[5]
+    J[8, 0:3] += dh[0:3]
+
+    # min(C_source, N_source): gradiente de la rama activa
+    dC = np.zeros_like(X)
+    dC[3:6] = dh[3:6]
+    dN = np.zeros_like(X)
+    dN[0:3] = dh[0:3]
+    C_source = h[3] + h[4] + h[5]
+    N_source = h[0] + h[1] + h[2]
+    d_min = np.where(C_source <= N_source, dC, dN)
+
+    # Crecimiento microbiano y C remanente (C_remaining = C_source - min(C, N))
+    J[12] += mp.CMM * d_min
+    J[9:12] += mp.compiled().fr[:, None, :] * (dC - d_min)
+
+    return J.reshape((13, 13) + x.shape[1:])
+
+# Campos de LIParams y MicrobialParams, en el orden de las columnas de jac_params_LI
+# (Vmáx y Km en el orden de los pools hidrolizados DP, EP, NAPN, ST, DDF, LD)
+PARAMS = [f.name for f in fields(LIParams)]
+MICROBIAL_PARAMS = [f.name for f in fields(MicrobialParams)]
+_VMAX = [PARAMS.index(n) for n in PARAMS if n.endswith('_hyv')]
+_KM = [PARAMS.index(n) for n in PARAMS if n.endswith('_hyk')]
+
+def jac_params_LI(state: list[float], t: float,
+                  params: LIParams | None = None,
+                  microbial: MicrobialParams | None = None) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Derivadas parciales exactas de dLI_dt respecto de cada campo de LIParams y de
+    MicrobialParams: arrays (13, len(PARAMS)) y (13, len(MICROBIAL_PARAMS)), un animal.
+    Como en jac_LI, min(C_source, N_source) toma la rama activa.
+    """
+    p = current_params().li if params is None else params
+    mp = current_params().microbial if microbial is None else microbial
+    c = p.compiled()
 
-    # Productos absorbidos (consideramos absorción inmediata)
-    dSU = +h_ST - SU * k_li
-    dFA = +h_LD - FA * k_li
-    dAA = +h_DP + h_EP + h_NAPN - AA * k_li
+    X = np.asarray(state, dtype=float)
+    vmax, km = c.vmax[:, 0], c.km[:, 0]
 
-    # Derivadas netas
-    dDP = -h_DP - DP * k_li
-    dEP = -h_EP - EP * k_li + li_params.CLI_EP_sc
-    dNAPN = -h_NAPN - NAPN * k_li + li_params.CLI_NAPN_sc
-    dST = -h_ST - ST * k_li
-    dDDF = -h_DDF - DDF * k_li
-    dLD = -h_LD - LD * k_li
+    # Pasaje: k_li = pa_0 * exp(-OM_0 * OM^kn); cada pool pierde X_i * dk_li
+    OM_total = X[:9].sum()
+    OM_kn = OM_total**p.CLI_pa_kn
+    k_li = pasaje_li(OM_total, p)
+    D = np.zeros((13, len(PARAMS)))
+    D[:, PARAMS.index('CLI_pa_0')] = -X * np.exp(-p.CLI_OM_0 * OM_kn)
+    D[:, PARAMS.index('CLI_OM_0')] = X * k_li * OM_kn
+    if OM_total > 0:
+        D[:, PARAMS.index('CLI_pa_kn')] = X * k_li * p.CLI_OM_0 * OM_kn * np.log(OM_total)
+    D[1, PARAMS.index('CLI_EP_sc')] = 1.0
+    D[2, PARAMS.index('CLI_NAPN_sc')] = 1.0
 
-    dVFA -= VFA * k_li
-    dCO2 -= CO2 * k_li
-    dCH4 -= CH4 * k_li
+    # Efecto de aumentar la hidrólisis h_j en 1 sobre cada derivada (columna j)
+    h = michaelis_menten(X[:6], vmax, km)
+    C_source, N_source = h[3:6].sum(), h[0:3].sum()
+    dC = np.array([0, 0, 0, 1, 1, 1], dtype=float)
+    dN = 1 - dC
+    d_min = dC if C_source <= N_source else dN
+    E = np.zeros((13, 6))
+    E[np.arange(6), np.arange(6)] = -1.0
+    E[6, 3] = E[7, 5] = 1.0
+    E[8, 0:3] = 1.0
+    E[9:12] = mp.compiled().fr[:, :1] * (dC - d_min)
+    E[12] = mp.CMM * d_min
 
-    return [dDP, dEP, dNAPN, dST, dDDF, dLD, dSU, dFA, dAA, dVFA, dCO2, dCH4, dMM]
+    denom = km + X[:6] + 1e-9
+    D[:, _VMAX] = E * (X[:6] / denom)
+    D[:, _KM] = E * (-vmax * X[:6] / denom**2)
 
+    # Microbianos: crecimiento CMM * min(C, N); el C remanente no depende de CMM
+    C_remaining = C_source - min(C_source, N_source)
+    D_mic = np.zeros((13, len(MICROBIAL_PARAMS)))
+    D_mic[12, MICROBIAL_PARAMS.index('CMM')] = min(C_source, N_source)
+    for name in ['CMM_ACET_fr', 'CMM_PROP_fr', 'CMM_BUT_fr']:
+        D_mic[9, MICROBIAL_PARAMS.index(name)] = C_remaining
+    D_mic[10, MICROBIAL_PARAMS.index('CMM_CO2_fr')] = C_remaining
+    D_mic[11, MICROBIAL_PARAMS.index('CMM_CH4_fr')] = C_remaining
+    return D, D_mic
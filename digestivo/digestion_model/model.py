@@ -17,13 +17,24 @@ Notas importantes
         13 para LI
     Los índices se almacenan en un diccionario IDX para facilitar la lectura y evitar errores.
     Cada compartimento mantiene su lógica en su módulo respectivo.
+    jac_SYSTEM da el jacobiano exacto (bloque-diagonal por compartimento), apto
+    como Dfun de odeint o jac de solve_ivp (lambda t, y: jac_SYSTEM(y, t)).
+    jac_params_SYSTEM da las derivadas parciales respecto de cada parámetro de
+    PARAM_NAMES (ver sensitivity.py).
+    dSYSTEM_dt acepta también un estado (N, 30) para evaluar N animales a la vez
+    (ver herd.py), con parámetros escalares o arrays (N,) por animal.
 """
 
 import numpy as np
-from stomach import dStomach_dt
-from si1 import dSI1_dt
-from si2 import dSI2_dt
-from li import dLI_dt
+from parameters import ModelParams, current_params
+import li
+import si1
+import si2
+import stomach
+from stomach import dStomach_dt, jac_STO
+from si1 import dSI1_dt, jac_SI1
+from si2 import dSI2_dt, jac_SI2
+from li import dLI_dt, jac_LI
 
 # Indices en el vector de estado
 IDX = {
@@ -33,7 +44,28 @@ IDX = {
     'LI':  slice(17, 30),     # 13 pools
 }
 
-def dSYSTEM_dt(state: list[float], t: float) -> list[float]:
+# Nombres de los pools de cada compartimento (declarados en cada módulo),
+# en el orden del vector de estado
+POOLS = {
+    'STO': stomach.POOLS,
+    'SI1': si1.POOLS,
+    'SI2': si2.POOLS,
+    'LI':  li.POOLS,
+}
+
+# Etiqueta de cada columna del vector de estado: 'STO.S', 'SI1.DP', ..., 'LI.MM'
+POOL_NAMES = [f'{comp}.{pool}' for comp, pools in POOLS.items() for pool in pools]
+
+# Parámetros con derivada parcial en jac_params_SYSTEM: 'grupo.campo' de ModelParams
+PARAM_NAMES = ([f'stomach.{n}' for n in stomach.PARAMS] + [f'si1.{n}' for n in si1.PARAMS]
+               + [f'si2.{n}' for n in si2.PARAMS] + [f'li.{n}' for n in li.PARAMS]
+               + [f'microbial.{n}' for n in li.MICROBIAL_PARAMS])
+
+# Flujos instantáneos de cada compartimento (ver flux_SYSTEM): 'SI1.hyd.DP', 'LI.pas.MM', ...
+FLUX_NAMES = [f'{comp}.{name}' for comp, module in
+              [('STO', stomach), ('SI1', si1), ('SI2', si2), ('LI', li)] for name in module.FLUXES]
+
+def dSYSTEM_dt(state: list[float], t: float, params: ModelParams | None = None) -> list[float]:
     """
     Calcula la derivada del sistema digestivo completo.
 
@@ -42,23 +74,102 @@ def dSYSTEM_dt(state: list[float], t: float) -> list[float]:
      SI1: DP, EP, NAPN, ST, LD, SU, FA, AA,
      SI2: DP, ..., AA,
      LI:  DP, EP, NAPN, ST, DDF, LD, SU, FA, AA, VFA, CO2, CH4, MM]
+
+    Con un estado (N, 30) devuelve un array (N, 30): cada fila es un animal.
+    Si params es None se usan parameters.current_params() (por defecto, los globales).
     """
+    # Los pools quedan en el eje 0 tanto para (30,) como para (N, 30) -> (30, N)
+    state = np.asarray(state, dtype=float).T
     dstate = np.zeros_like(state)
 
+    params = current_params() if params is None else params
+    sto_p, si1_p, si2_p = params.stomach, params.si1, params.si2
+    li_p, mic_p = params.li, params.microbial
+
     # Compartimento estómago
     S = state[IDX['STO']]
-    dstate[IDX['STO']] = dStomach_dt(S, t)
+    dstate[IDX['STO']] = dStomach_dt(S, t, sto_p)
 
     # SI1
     si1_in = state[IDX['SI1']]
-    dstate[IDX['SI1']] = dSI1_dt(si1_in, t)
+    dstate[IDX['SI1']] = dSI1_dt(si1_in, t, si1_p)
 
     # SI2
     si2_in = state[IDX['SI2']]
-    dstate[IDX['SI2']] = dSI2_dt(si2_in, t)
+    dstate[IDX['SI2']] = dSI2_dt(si2_in, t, si2_p)
 
     # LI
     li_in = state[IDX['LI']]
-    dstate[IDX['LI']] = dLI_dt(li_in, t)
+    dstate[IDX['LI']] = dLI_dt(li_in, t, li_p, mic_p)
+
+    return dstate.T
+
+def jac_SYSTEM(state: list[float], t: float, params: ModelParams | None = None) -> np.ndarray:
+    """
+    Jacobiano exacto de dSYSTEM_dt: J[i, j] = d(dstate_i/dt) / dstate_j.
+
+    Los compartimentos no intercambian masa entre sí, por lo que J es
+    bloque-diagonal (STO, SI1, SI2, LI). Retorna (30, 30), o (N, 30, 30)
+    para un estado (N, 30).
+    Uso: odeint(dSYSTEM_dt, state0, t, Dfun=jac_SYSTEM)
+    """
+    state = np.asarray(state, dtype=float).T
+    J = np.zeros((30, 30) + state.shape[1:])
+
+    params = current_params() if params is None else params
+    sto_p, si1_p, si2_p = params.stomach, params.si1, params.si2
+    li_p, mic_p = params.li, params.microbial
+
+    sto = IDX['STO']
+    J[sto, sto] = jac_STO(state[sto], t, sto_p)
+    J[IDX['SI1'], IDX['SI1']] = jac_SI1(state[IDX['SI1']], t, si1_p)
+    J[IDX['SI2'], IDX['SI2']] = jac_SI2(state[IDX['SI2']], t, si2_p)
+    J[IDX['LI'], IDX['LI']] = jac_LI(state[IDX['LI']], t, li_p, mic_p)
+
+    # (30, 30, N) -> (N, 30, 30)
+    return np.moveaxis(J, (0, 1), (-2, -1))
+
+def jac_params_SYSTEM(state: list[float], t: float, params: ModelParams | None = None) -> np.ndarray:
+    """
+    Derivadas parciales exactas de dSYSTEM_dt respecto de los parámetros:
+    D[i, k] = d(dstate_i/dt) / d(PARAM_NAMES[k]), array (30, len(PARAM_NAMES)).
+    Un solo animal (estado (30,), parámetros escalares). Cada grupo de parámetros
+    actúa sólo sobre las filas de su compartimento.
+    """
+    state = np.asarray(state, dtype=float)
+
+    params = current_params() if params is None else params
+    sto_p, si1_p, si2_p = params.stomach, params.si1, params.si2
+    li_p, mic_p = params.li, params.microbial
+
+    D = np.zeros((30, len(PARAM_NAMES)))
+    n_sto, n_si1, n_si2, n_li = len(stomach.PARAMS), len(si1.PARAMS), len(si2.PARAMS), len(li.PARAMS)
+    col = np.cumsum([0, n_sto, n_si1, n_si2, n_li])
+
+    D[IDX['STO'], col[0]:col[1]] = stomach.jac_params_STO(state[IDX['STO']], t, sto_p)
+    D[IDX['SI1'], col[1]:col[2]] = si1.jac_params_SI1(state[IDX['SI1']], t, si1_p)
+    D[IDX['SI2'], col[2]:col[3]] = si2.jac_params_SI2(state[IDX['SI2']], t, si2_p)
+    D_li, D_mic = li.jac_params_LI(state[IDX['LI']], t, li_p, mic_p)
+    D[IDX['LI'], col[3]:col[4]] = D_li
+    D[IDX['LI'], col[4]:] = D_mic
+    return D
+
+def flux_SYSTEM(state: list[float], t: float, params: ModelParams | None = None) -> np.ndarray:
+    """
+    Flujos instantáneos de todos los compartimentos, en el orden de FLUX_NAMES
+    (hidrólisis, absorción, fermentación y pasaje). Mismas formas que dSYSTEM_dt:
+    (n_flujos,) para un estado (30,) y (N, n_flujos) para (N, 30).
+    """
+    state = np.asarray(state, dtype=float).T
+
+    params = current_params() if params is None else params
+    sto_p, si1_p, si2_p = params.stomach, params.si1, params.si2
+    li_p, mic_p = params.li, params.microbial
 
-    return dstate
+    F = np.concatenate([
+        stomach.flux_rates(state[IDX['STO']], t, sto_p).reshape((2,) + state.shape[1:]),
+        si1.flux_rates(state[IDX['SI1']], t, si1_p),
+        si2.flux_rates(state[IDX['SI2']], t, si2_p),
+        li.flux_rates(state[IDX['LI']], t, li_p, mic_p),
+    ])
+    return F.T
@@ -0,0 +1,160 @@
+# digestion_model/montecarlo.py
+
+"""
+Monte Carlo de rebaño: variación individual de parámetros propagada a miles de cerdos.
+Este módulo:
+    Define distribuciones simples para los parámetros (Normal, LogNormal, Uniform),
+    expresadas respecto del valor base de cada campo. Todos los campos del modelo son
+    tasas, constantes o fracciones no negativas: Normal se trunca en 0 (con desvíos
+    grandes respecto del valor base conviene LogNormal).
+    Reparte los animales en bloques entre un pool de procesos.
+    Cada proceso sortea los parámetros de su bloque, simula (simulation.simulate_piecewise)
+    y escribe trayectorias o métricas resumen directamente en un buffer NumPy de memoria
+    compartida, sin devolver resultados serializados.
+Reproducibilidad: cada bloque recibe su propia semilla derivada de SeedSequence(seed),
+de modo que el resultado no depende del número de procesos.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, replace
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from parameters import ModelParams, current_params
+from simulation import simulate_piecewise
+
+# -------------------------------------------------------
+# DISTRIBUCIONES (relativas al valor base del campo)
+# -------------------------------------------------------
+@dataclass
+class Normal:
+    sd: float                    # Desvío estándar absoluto
+    lower: float | None = 0.0    # Truncamiento inferior (None: sin truncar)
+
+    def sample(self, rng, base, size):
+        values = rng.normal(base, self.sd, size)
+        if self.lower is None:
+            return values
+        # Normal truncada por rechazo: se vuelven a sortear los valores bajo la cota
+        low = values < self.lower
+        while np.any(low):
+            values[low] = rng.normal(base, self.sd, int(low.sum()))
+            low = values < self.lower
+        return values
+
+@dataclass
+class LogNormal:
+    cv: float          # Coeficiente de variación; la mediana es el valor base
+
+    def sample(self, rng, base, size):
+        sigma = np.sqrt(np.log1p(self.cv**2))
+        return base * rng.lognormal(0.0, sigma, size)
+
+@dataclass
+class Uniform:
+    low: float         # Factor inferior sobre el valor base
+    high: float        # Factor superior sobre el valor base
+
+    def sample(self, rng, base, size):
+        return base * rng.uniform(self.low, self.high, size)
+
+@dataclass
+class MonteCarloResult:
+    t: np.ndarray
+    names: list[str]        # Parámetros variados, como 'grupo.campo'
+    samples: np.ndarray     # Valores sorteados, (N, len(names))
+    output: np.ndarray      # (N, len(t), 30) o (N, n_métricas) con summary
+
+def final_state(t: np.ndarray, result: np.ndarray) -> np.ndarray:
+    """Métrica resumen por defecto: estado al final de la simulación."""
+    return result[-1]
+
+def animal_params(base: ModelParams, names: list[str], values) -> ModelParams:
+    """Copia de `base` con los campos 'grupo.campo' reemplazados por `values`."""
+    groups = {}
+    for name, value in zip(names, values):
+        group, field = name.split('.')
+        groups.setdefault(group, {})[field] = float(value)
+    return replace(base, **{g: replace(getattr(base, g), **f) for g, f in groups.items()})
+
+def draw_samples(names, distributions, base, seed_seq, size) -> np.ndarray:
+    """Sortea los parámetros de un bloque de animales, (size, len(names))."""
+    rng = np.random.default_rng(seed_seq)
+    columns = []
+    for name in names:
+        group, field = name.split('.')
+        columns.append(distributions[name].sample(rng, getattr(getattr(base, group), field), size))
+    return np.column_stack(columns) if columns else np.empty((size, 0))
+
+def _run_chunk(job):
+    (out_name, out_shape, samples_name, samples_shape, start, stop, seed_seq,
+     names, distributions, base, state0, t, summary, odeint_kwargs) = job
+
+    out_shm = shared_memory.SharedMemory(name=out_name)
+    samples_shm = shared_memory.SharedMemory(name=samples_name)
+    try:
+        out = np.ndarray(out_shape, dtype=float, buffer=out_shm.buf)
+        samples = np.ndarray(samples_shape, dtype=float, buffer=samples_shm.buf)
+
+        draws = draw_samples(names, distributions, base, seed_seq, stop - start)
+        samples[start:stop] = draws
+        for i, values in enumerate(draws):
+            result = simulate_piecewise(state0, t, animal_params(base, names, values), **odeint_kwargs)
+            out[start + i] = result if summary is None else summary(t, result)
+    finally:
+        out_shm.close()
+        samples_shm.close()
+    return stop - start
+
+def run_montecarlo(n_animals: int, distributions: dict, state0: np.ndarray, t: np.ndarray,
+                   base: ModelParams | None = None, summary=None, seed: int = 0,
+                   workers: int | None = None, chunk_size: int = 64,
+                   **odeint_kwargs) -> MonteCarloResult:
+    """
+    Simula n_animals cerdos con parámetros sorteados de `distributions`.
+
+    distributions: {'si1.CSI1_DP_hyv': LogNormal(0.1), 'li.CLI_pa_0': Normal(0.005), ...}
+    summary: None para guardar trayectorias completas, o una función de nivel de módulo
+             summary(t, result) -> array 1-D (p.ej. final_state) para guardar sólo métricas.
+    workers: procesos a usar (por defecto os.cpu_count()); con 1 se ejecuta en este proceso.
+    """
+    base = current_params() if base is None else base
+    t = np.asarray(t, dtype=float)
+    state0 = np.asarray(state0, dtype=float)
+    names = sorted(distributions)
+    workers = os.cpu_count() if workers is None else workers
+
+    if summary is None:
+        out_shape = (n_animals, len(t), state0.size)
+    else:
+        out_shape = (n_animals,) + np.shape(summary(t, np.zeros((len(t), state0.size))))
+    samples_shape = (n_animals, len(names))
+
+    bounds = list(range(0, n_animals, chunk_size)) + [n_animals]
+    seeds = np.random.SeedSequence(seed).spawn(len(bounds) - 1)
+
+    out_shm = shared_memory.SharedMemory(create=True, size=max(8, int(np.prod(out_shape)) * 8))
+    samples_shm = shared_memory.SharedMemory(create=True, size=max(8, int(np.prod(samples_shape)) * 8))
+    try:
+        jobs = [(out_shm.name, out_shape, samples_shm.name, samples_shape, a, b, s,
+                 names, distributions, base, state0, t, summary, odeint_kwargs)
+                for a, b, s in zip(bounds[:-1], bounds[1:], seeds)]
+
+        if workers == 1:
+            for job in jobs:
+                _run_chunk(job)
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                list(pool.map(_run_chunk, jobs))
+
+        output = np.ndarray(out_shape, dtype=float, buffer=out_shm.buf).copy()
+        samples = np.ndarray(samples_shape, dtype=float, buffer=samples_shm.buf).copy()
+    finally:
+        out_shm.close()
+        out_shm.unlink()
+        samples_shm.close()
+        samples_shm.unlink()
+
+    return MonteCarloResult(t=t, names=names, samples=samples, output=output)
@@ -2,20 +2,125 @@
 # Este módulo define las estructuras de parámetros del modelo digestivo en cerdos
 # siguiendo literalmente el artículo de Strathe et al. (2008).
 # Cada grupo de parámetros está organizado según el compartimento digestivo correspondiente.
+# Los grupos SI1, SI2, LI y microbiano se compilan además en arrays contiguos
+# (ver CompiledParams), que usan los núcleos vectorizados de cada compartimento;
+# el estómago se compila en su horario de alimentación (feeding.FeedingSchedule).
+# Los objetos globales de cada grupo (si1_params, ...) son sólo el valor por defecto:
+# cada función del modelo acepta un ModelParams explícito, ModelParams.freeze() da una
+# copia inmutable para compartir entre hilos, y use_params fija el valor por defecto
+# sólo en el hilo (o tarea) actual (ver current_params).
 
-from dataclasses import dataclass
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import FrozenInstanceError, dataclass, field, fields, replace
+
+import numpy as np
+
+from feeding import FeedingSchedule
+
+# -------------------------------------------------------
+# COMPILACIÓN A ARRAYS
+# -------------------------------------------------------
+@dataclass
+class CompiledKinetics:
+    vmax: np.ndarray   # Vmáx de cada cinética Michaelis–Menten, (n_pools, 1) o (n_pools, N)
+    km: np.ndarray     # Constantes de Michaelis–Menten, misma forma que vmax
+    pa: np.ndarray     # Tasa de pasaje (escalar o (N,)); en LI es CLI_pa_0
+    sc: np.ndarray     # Secreción endógena constante por pool, (n_pools, 1) o (n_pools, N)
+    # Las mismas constantes como floats de Python (vmax, km, pa, sc) para el camino
+    # de un solo animal; None si algún parámetro es un array por animal
+    scalar: tuple | None = None
+
+@dataclass
+class CompiledFractions:
+    fr: np.ndarray     # Fracciones del C remanente hacia [VFA, CO2, CH4], (3, 1) o (3, N)
+    scalar: tuple | None = None
+
+def _columns(*values) -> np.ndarray:
+    """Apila escalares o arrays (N,) en un array contiguo (n, 1) o (n, N)."""
+    arrays = np.broadcast_arrays(*[np.atleast_1d(np.asarray(v, dtype=float)) for v in values])
+    return np.ascontiguousarray(np.stack(arrays))
+
+def _kinetics(vmax: list, km: list, pa, sc: list) -> CompiledKinetics:
+    compiled = CompiledKinetics(vmax=_columns(*vmax), km=_columns(*km),
+                                pa=np.asarray(pa, dtype=float), sc=_columns(*sc))
+    if all(np.ndim(v) == 0 for v in [*vmax, *km, pa, *sc]):
+        compiled.scalar = (tuple(map(float, vmax)), tuple(map(float, km)),
+                           float(pa), tuple(map(float, sc)))
+    return compiled
+
+class ParamGroup:
+    """
+    Mezcla para grupos de parámetros. freeze() devuelve una copia inmutable: asignar
+    un campo lanza FrozenInstanceError y los arrays quedan de sólo lectura.
+    dataclasses.replace sobre una copia congelada devuelve otra vez un grupo editable.
+    """
+    def __setattr__(self, name, value):
+        if self.__dict__.get('_frozen'):
+            raise FrozenInstanceError(f'{type(self).__name__} congelado: usar dataclasses.replace')
+        super().__setattr__(name, value)
+
+    @property
+    def frozen(self) -> bool:
+        return self.__dict__.get('_frozen', False)
+
+    def freeze(self):
+        if self.frozen:
+            return self
+        values = {}
+        for f in fields(self):
+            value = getattr(self, f.name)
+            if isinstance(value, np.ndarray):
+                value = value.copy()
+                value.flags.writeable = False
+            values[f.name] = value
+        copy = replace(self, **values)
+        copy.__dict__['_frozen'] = True
+        return copy
+
+class CompiledParams(ParamGroup):
+    """
+    Mezcla para grupos de parámetros con forma compilada.
+    compiled() construye los arrays una sola vez y los guarda; asignar cualquier
+    campo (p.ej. si1_params.CSI1_DP_hyv = 0.3) invalida la copia compilada.
+    Las modificaciones in situ de campos array (p.FFEED[0] = 2) no se detectan:
+    hay que reasignar el campo.
+    Una copia congelada (freeze) se compila al congelarse, de modo que los hilos que
+    la comparten sólo leen.
+    """
+    def __setattr__(self, name, value):
+        super().__setattr__(name, value)
+        self.__dict__.pop('_compiled', None)
+
+    def compiled(self):
+        compiled = self.__dict__.get('_compiled')
+        if compiled is None:
+            compiled = self._compile()
+            self.__dict__['_compiled'] = compiled
+        return compiled
+
+    def freeze(self):
+        copy = super().freeze()
+        copy.compiled()
+        return copy
 
 # -------------------------------------------------------
 # ESTÓMAGO (STO) – parámetros de vaciado y alimentación
 # -------------------------------------------------------
 @dataclass
-class StomachParams:
+class StomachParams(CompiledParams):
     TFEED: float       # Duración de la fase de ingestión (h)
     FFEED: float       # Frecuencia de alimentación (eventos/día)
     DMI: float         # Ingesta total de materia seca (kg/día)
     CSTO_pa: float     # Tasa de vaciado gástrico (1/h)
     CSTO_EP_sc: float  # Secreción endógena de proteína por OM ingerida (mol N/kg OM)
     CSTO_NAPN_sc: float  # Secreción de nitrógeno no proteico endógeno (mol N/kg OM)
+    # Horario explícito (p.ej. registro de comedero, FeedingSchedule.from_events);
+    # si es None se construye a partir de TFEED, FFEED y DMI
+    schedule: FeedingSchedule | None = None
+
+    def _compile(self) -> FeedingSchedule:
+        return self.schedule if self.schedule is not None else FeedingSchedule.from_params(self)
 
 stomach_params = StomachParams(
     TFEED=0.25,
@@ -30,7 +135,7 @@ stomach_params = StomachParams(
 # INTESTINO DELGADO PROXIMAL (SI1)
 # -------------------------------------------------------
 @dataclass
-class SI1Params:
+class SI1Params(CompiledParams):
     CSI1_pa: float           # Tasa de pasaje a SI2 (1/h)
     CSI1_EPp_sc: float       # Secreción de proteína pancreática (mol N/kg OM)
     CSI1_NAPNp_sc: float     # Secreción de N no proteico pancreático (mol N/kg OM)
@@ -58,6 +163,21 @@ class SI1Params:
     CSI1_FA_abk: float       # Constante absorción de ácidos grasos (mol C)
     CSI1_AA_abk: float       # Constante absorción de aminoácidos (mol N)
 
+    def _compile(self) -> CompiledKinetics:
+        # Orden de pools: DP, EP, NAPN, ST, LD (hidrólisis), SU, FA, AA (absorción)
+        return _kinetics(
+            vmax=[self.CSI1_DP_hyv, self.CSI1_EP_hyv, self.CSI1_NAPN_hyv,
+                  self.CSI1_ST_hyv, self.CSI1_LD_hyv,
+                  self.CSI1_SU_abv, self.CSI1_FA_abv, self.CSI1_AA_abv],
+            km=[self.CSI1_DP_hyk, self.CSI1_EP_hyk, self.CSI1_NAPN_hyk,
+                self.CSI1_ST_hyk, self.CSI1_LD_hyk,
+                self.CSI1_SU_abk, self.CSI1_FA_abk, self.CSI1_AA_abk],
+            pa=self.CSI1_pa,
+            sc=[0.0, self.CSI1_EPp_sc + self.CSI1_EPb_sc,
+                self.CSI1_NAPNp_sc + self.CSI1_NAPNb_sc, 0.0,
+                self.CSI1_LD_sc, 0.0, 0.0, 0.0]
+        )
+
 si1_params = SI1Params(
     CSI1_pa=1.670,
     CSI1_EPp_sc=0.070,
@@ -87,7 +207,7 @@ si1_params = SI1Params(
 # INTESTINO DELGADO DISTAL (SI2)
 # -------------------------------------------------------
 @dataclass
-class SI2Params:
+class SI2Params(CompiledParams):
     CSI2_pa: float
     CSI2_EP_sc: float
     CSI2_NAPN_sc: float
@@ -112,6 +232,20 @@ class SI2Params:
     CSI2_FA_abk: float
     CSI2_AA_abk: float
 
+    def _compile(self) -> CompiledKinetics:
+        # Mismo orden de pools que SI1. CSI2_EP_sc y CSI2_NAPN_sc no intervienen
+        # en dSI2_dt, por lo que no hay secreciones en SI2.
+        return _kinetics(
+            vmax=[self.CSI2_DP_hyv, self.CSI2_EP_hyv, self.CSI2_NAPN_hyv,
+                  self.CSI2_ST_hyv, self.CSI2_LD_hyv,
+                  self.CSI2_SU_abv, self.CSI2_FA_abv, self.CSI2_AA_abv],
+            km=[self.CSI2_DP_hyk, self.CSI2_EP_hyk, self.CSI2_NAPN_hyk,
+                self.CSI2_ST_hyk, self.CSI2_LD_hyk,
+                self.CSI2_SU_abk, self.CSI2_FA_abk, self.CSI2_AA_abk],
+            pa=self.CSI2_pa,
+            sc=[0.0] * 8
+        )
+
 si2_params = SI2Params(
     CSI2_pa=0.294,
     CSI2_EP_sc=0.37,
@@ -138,7 +272,7 @@ si2_params = SI2Params(
 # INTESTINO GRUESO (LI)
 # -------------------------------------------------------
 @dataclass
-class LIParams:
+class LIParams(CompiledParams):
     CLI_pa_0: float        # Tasa base de pasaje del contenido del LI (1/h)
     CLI_OM_0: float        # Referencia para nivel de OM en pasaje (kg OM)
     CLI_pa_kn: float       # Exponente no lineal del pasaje
@@ -160,6 +294,18 @@ class LIParams:
     CLI_DDF_hyk: float
     CLI_LD_hyk: float
 
+    def _compile(self) -> CompiledKinetics:
+        # vmax/km: pools hidrolizados DP, EP, NAPN, ST, DDF, LD
+        # sc: los 13 pools de LI (sólo EP y NAPN reciben secreción)
+        return _kinetics(
+            vmax=[self.CLI_DP_hyv, self.CLI_EP_hyv, self.CLI_NAPN_hyv,
+                  self.CLI_ST_hyv, self.CLI_DDF_hyv, self.CLI_LD_hyv],
+            km=[self.CLI_DP_hyk, self.CLI_EP_hyk, self.CLI_NAPN_hyk,
+                self.CLI_ST_hyk, self.CLI_DDF_hyk, self.CLI_LD_hyk],
+            pa=self.CLI_pa_0,
+            sc=[0.0, self.CLI_EP_sc, self.CLI_NAPN_sc] + [0.0] * 10
+        )
+
 li_params = LIParams(
     CLI_pa_0=0.033,
     CLI_OM_0=0.250,
@@ -184,7 +330,7 @@ li_params = LIParams(
 # PARÁMETROS MICROBIANOS
 # -------------------------------------------------------
 @dataclass
-class MicrobialParams:
+class MicrobialParams(CompiledParams):
     CMM: float           # Eficiencia de crecimiento microbiano (kg MM/kg OM)
     CMM_P: float         # Contenido de proteína microbiana (mol N/kg MM)
     CMM_CHO: float       # Contenido de CHO microbianos (mol C/kg MM)
@@ -195,6 +341,14 @@ class MicrobialParams:
     CMM_CO2_fr: float    # Fracción C a CO₂
     CMM_CH4_fr: float    # Fracción C a CH₄
 
+    def _compile(self) -> CompiledFractions:
+        fr = [self.CMM_ACET_fr + self.CMM_PROP_fr + self.CMM_BUT_fr,
+              self.CMM_CO2_fr, self.CMM_CH4_fr]
+        compiled = CompiledFractions(fr=_columns(*fr))
+        if all(np.ndim(v) == 0 for v in [*fr, self.CMM]):
+            compiled.scalar = (float(self.CMM), *map(float, fr))
+        return compiled
+
 microbial_params = MicrobialParams(
     CMM=0.145,
     CMM_P=6.70,
@@ -206,3 +360,93 @@ microbial_params = MicrobialParams(
     CMM_CO2_fr=0.153,
     CMM_CH4_fr=0.102
 )
+
+# -------------------------------------------------------
+# COMPOSICIÓN DE LA DIETA (para el sistema acoplado, graph.py)
+# -------------------------------------------------------
+@dataclass
+class DietParams(ParamGroup):
+    CDIET_DP: float      # Proteína dietaria (mol N/kg DM)
+    CDIET_NAPN: float    # N no proteico (mol N/kg DM)
+    CDIET_ST: float      # Almidón (mol C/kg DM)
+    CDIET_LD: float      # Lípidos (mol C/kg DM)
+    CDIET_SU: float      # Azúcares solubles (mol C/kg DM)
+    CDIET_FA: float      # Ácidos grasos libres (mol C/kg DM)
+    CDIET_AA: float      # Aminoácidos libres (mol N/kg DM)
+    CDIET_DDF: float     # Fibra dietaria digestible (mol C/kg DM); pasa directo a LI
+
+# Dieta de referencia de crecimiento, aproximada (≈175 g PB, 430 g almidón,
+# 40 g grasa y 135 g fibra por kg DM): reemplazar con el análisis de la dieta real
+diet_params = DietParams(
+    CDIET_DP=2.0,
+    CDIET_NAPN=0.2,
+    CDIET_ST=16.0,
+    CDIET_LD=2.5,
+    CDIET_SU=1.0,
+    CDIET_FA=0.0,
+    CDIET_AA=0.1,
+    CDIET_DDF=5.0
+)
+
+# -------------------------------------------------------
+# CONJUNTO COMPLETO DE PARÁMETROS
+# -------------------------------------------------------
+@dataclass(frozen=True)
+class ModelParams:
+    stomach: StomachParams
+    si1: SI1Params
+    si2: SI2Params
+    li: LIParams
+    microbial: MicrobialParams
+    diet: DietParams = field(default_factory=lambda: diet_params)
+
+    @property
+    def frozen(self) -> bool:
+        return all(getattr(self, f.name).frozen for f in fields(self))
+
+    def freeze(self) -> 'ModelParams':
+        """Copia inmutable de todos los grupos (ver ParamGroup.freeze)."""
+        if self.frozen:
+            return self
+        return ModelParams(**{f.name: getattr(self, f.name).freeze() for f in fields(self)})
+
+def default_params() -> ModelParams:
+    """Agrupa los parámetros globales del módulo (referencias, no copias)."""
+    return ModelParams(
+        stomach=stomach_params,
+        si1=si1_params,
+        si2=si2_params,
+        li=li_params,
+        microbial=microbial_params,
+        diet=diet_params
+    )
+
+# -------------------------------------------------------
+# PARÁMETROS POR DEFECTO DEL CONTEXTO
+# -------------------------------------------------------
+_CURRENT: ContextVar[ModelParams | None] = ContextVar('model_params', default=None)
+
+def current_params() -> ModelParams:
+    """
+    Parámetros que usan las funciones del modelo cuando reciben params=None: los del
+    bloque use_params activo en este hilo o tarea, o si no los globales del módulo.
+    """
+    params = _CURRENT.get()
+    return default_params() if params is None else params
+
+@contextmanager
+def use_params(params: ModelParams):
+    """
+    Fija los parámetros por defecto dentro del bloque, sólo para el hilo o tarea
+    actual (contextvars): escenarios en hilos distintos no se pisan. Re-entrante;
+    guarda y entrega una copia congelada.
+        with use_params(escenario) as p:
+            simulate_piecewise(state0, t)
+    Los hilos nuevos (p.ej. de un ThreadPoolExecutor) no heredan el bloque: abrir
+    use_params dentro de la tarea o pasar params explícitos.
+    """
+    token = _CURRENT.set(params.freeze())
+    try:
+        yield _CURRENT.get()
+    finally:
+        _CURRENT.reset(token)
@@ -0,0 +1,139 @@
+# digestion_model/periodic.py
+
+"""
+Estado estacionario periódico del sistema bajo un esquema diario de alimentación.
+En lugar de integrar 96 h (o más) hasta que el transitorio desaparezca, se busca
+directamente la órbita de período 24 h de dSYSTEM_dt:
+    F(y) = Φ(y) - y = 0
+donde Φ es el mapa de un día (integración de t0 a t0 + 24 h). Se resuelve por
+disparo (shooting) con Newton: la derivada dΦ/dy (matriz de monodromía) se obtiene
+en la misma integración resolviendo las ecuaciones variacionales dM/dt = J(y, t) M
+con el jacobiano analítico jac_SYSTEM.
+Incluye también simulate_until_periodic: integración día a día con parada temprana
+cuando dos días consecutivos coinciden.
+Nota: si algún pool no tiene equilibrio (p.ej. secreciones de LI mayores que lo que
+el pasaje puede evacuar) no existe órbita periódica y el resultado lo informa con
+converged=False.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from model import dSYSTEM_dt, jac_SYSTEM
+from parameters import ModelParams
+from simulation import integrate_piecewise, simulate_piecewise
+
+N_POOLS = 30
+
+@dataclass
+class PeriodicSolution:
+    state: np.ndarray         # Estado sobre la órbita en la fase t0
+    converged: bool
+    iterations: int           # Iteraciones de Newton (= integraciones de un día)
+    residual: float           # max |Φ(y) - y|
+    multipliers: np.ndarray   # Multiplicadores de Floquet (autovalores de la monodromía)
+
+# Índices de la banda de un bloque 30x30 en el formato de odeint (ml = mu = 29):
+# banda[i - j + mu, j] = dF_i/dz_j
+_MU = N_POOLS - 1
+_ROWS, _COLS = np.indices((N_POOLS, N_POOLS))
+_BAND_ROWS = np.tile((_ROWS - _COLS + _MU).ravel(), N_POOLS + 1)
+_BAND_COLS = (np.arange(N_POOLS + 1)[:, None] * N_POOLS + _COLS.ravel()).ravel()
+
+def _rhs_variational(z, t, t_mid, params):
+    # z = [y, M[:, 0], M[:, 1], ...]: columnas de la monodromía contiguas
+    y = z[:N_POOLS]
+    M = z[N_POOLS:].reshape(N_POOLS, N_POOLS).T
+    J = jac_SYSTEM(y, t_mid, params)
+    return np.concatenate([dSYSTEM_dt(y, t_mid, params), (J @ M).T.ravel()])
+
+def _jac_variational(z, t, t_mid, params):
+    # Jacobiano en banda: 31 copias de J en la diagonal (y y cada columna de M).
+    # Se omite el término d(J M)/dy (segundas derivadas): sólo afecta la
+    # convergencia del corrector de LSODA, no la solución
+    J = jac_SYSTEM(z[:N_POOLS], t_mid, params)
+    band = np.zeros((2 * _MU + 1, z.size))
+    band[_BAND_ROWS, _BAND_COLS] = np.tile(J.ravel(), N_POOLS + 1)
+    return band
+
+def one_day_map(state: np.ndarray, params: ModelParams | None = None, t0: float = 0.0,
+                period: float = 24.0, monodromy: bool = False, **odeint_kwargs):
+    """
+    Φ(state): estado tras un período partiendo de `state` en t0.
+    Con monodromy=True retorna también la matriz dΦ/dstate (30, 30).
+    """
+    t = np.array([t0, t0 + period])
+    if not monodromy:
+        return simulate_piecewise(state, t, params, **odeint_kwargs)[-1]
+
+    z0 = np.concatenate([np.asarray(state, dtype=float), np.eye(N_POOLS).ravel()])
+    z = integrate_piecewise(_rhs_variational, z0, t, args=(params,), Dfun=_jac_variational,
+                            params=params, ml=_MU, mu=_MU, **odeint_kwargs)[-1]
+    return z[:N_POOLS], z[N_POOLS:].reshape(N_POOLS, N_POOLS).T
+
+def periodic_orbit(state0: np.ndarray, params: ModelParams | None = None, t0: float = 0.0,
+                   period: float = 24.0, rtol: float = 1e-6, atol: float = 1e-8,
+                   max_iter: int = 20, **odeint_kwargs) -> PeriodicSolution:
+    """
+    Busca y con Φ(y) = y por Newton sobre el mapa de un día.
+    Cada paso resuelve (M - I) dy = -(Φ(y) - y); el paso se amortigua si no reduce
+    el residuo y el estado se mantiene no negativo.
+    La tolerancia (atol + rtol * max|y|) debe ser mayor que la del integrador.
+    """
+    def converged(F, y):
+        return np.max(np.abs(F)) <= atol + rtol * np.max(np.abs(y))
+
+    y = np.asarray(state0, dtype=float).copy()
+    phi, M = one_day_map(y, params, t0, period, monodromy=True, **odeint_kwargs)
+    F = phi - y
+    iterations = 1
+
+    while iterations < max_iter and not converged(F, y):
+        dy = np.linalg.lstsq(M - np.eye(N_POOLS), -F, rcond=None)[0]
+
+        step = 1.0
+        while True:
+            y_new = np.maximum(y + step * dy, 0.0)
+            phi_new, M_new = one_day_map(y_new, params, t0, period, monodromy=True, **odeint_kwargs)
+            F_new = phi_new - y_new
+            iterations += 1
+            if (converged(F_new, y_new) or np.max(np.abs(F_new)) < np.max(np.abs(F))
+                    or step < 1e-3 or iterations >= max_iter):
+                break
+            step *= 0.5
+        y, F, M = y_new, F_new, M_new
+
+    return PeriodicSolution(
+        state=y,
+        converged=bool(converged(F, y)),
+        iterations=iterations,
+        residual=float(np.max(np.abs(F))),
+        multipliers=np.linalg.eigvals(M)
+    )
+
+def simulate_until_periodic(state0: np.ndarray, params: ModelParams | None = None,
+                            t0: float = 0.0, period: float = 24.0, points_per_period: int = 96,
+                            rtol: float = 1e-6, atol: float = 1e-8, max_periods: int = 100,
+                            **odeint_kwargs):
+    """
+    Integra período a período y se detiene cuando el estado al final de un día
+    difiere del anterior en menos de atol + rtol * |y|.
+    Retorna (t, result, converged), con la trayectoria sólo hasta el día de parada.
+    """
+    y = np.asarray(state0, dtype=float)
+    ts, results = [], []
+    converged = False
+
+    for k in range(max_periods):
+        t = t0 + k * period + np.linspace(0, period, points_per_period + 1)
+        result = simulate_piecewise(y, t, params, **odeint_kwargs)
+        ts.append(t if k == 0 else t[1:])
+        results.append(result if k == 0 else result[1:])
+        y_new = result[-1]
+        if np.all(np.abs(y_new - y) <= atol + rtol * np.abs(y_new)):
+            converged = True
+            break
+        y = y_new
+
+    return np.concatenate(ts), np.concatenate(results), converged
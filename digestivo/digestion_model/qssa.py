@@ -0,0 +1,192 @@
+# digestion_model/qssa.py
+
+"""
+Integración multi-escala: aproximación cuasi-estacionaria (QSSA) de los pools
+solubles rápidos del intestino delgado.
+SU, FA y AA de SI1 y SI2 se absorben en minutos (CSI1_SU_abv / CSI1_SU_abk ≈ 78/h,
+más el pasaje de 1.67/h), mientras que LI evoluciona con el pasaje de ≈ 0.03/h.
+En modo QSSA esos 6 pools dejan de ser variables de estado: en cada evaluación se
+fijan en su equilibrio instantáneo con los pools lentos,
+    entrada(t) = absorción MM(X) + pa X
+(la cuadrática de steady_state.mm_balance), donde la entrada es la hidrólisis de
+ST / LD / proteínas del mismo compartimento, la secreción y, en el sistema acoplado,
+el pasaje desde el compartimento anterior (SI1 se resuelve antes que SI2).
+Se integran los 24 pools restantes con el driver por tramos de simulation.py; el
+jacobiano reducido es exacto (complemento de Schur J_ss - J_sf J_ff⁻¹ J_fs).
+El error de la aproximación es del orden del tiempo de relajación de los pools
+rápidos por la velocidad de cambio de su entrada: compare_qssa lo mide contra la
+integración completa junto con la aceleración obtenida.
+La reducción ahorra ≈ 1/3 de los pasos sin acoplar y ≈ 40 % acoplado, pero cada
+evaluación resuelve además los 6 balances: sólo es un modo de rendimiento con el lado
+derecho reducido que genera codegen.generate_qssa_source (fused=True, por defecto),
+que no evalúa los pools rápidos ni arma el estado completo. Medido en 240 h
+(compare_qssa, mejor de 15, 1 CPU compartida): 0.088 → 0.044 s sin acoplar (contra
+simulate_piecewise con fused=True) y 0.47 → 0.11 s acoplado. fused=False (expand y
+dSYSTEM_dt en Python) es la referencia, no más rápida que la integración completa.
+Un solo animal con parámetros escalares.
+"""
+
+import time
+from dataclasses import dataclass
+
+import numpy as np
+
+from model import IDX, POOL_NAMES, dSYSTEM_dt, jac_SYSTEM
+from parameters import ModelParams, current_params
+from simulation import integrate_piecewise, simulate_piecewise
+from steady_state import mm_balance_scalar
+
+N_POOLS = 30
+# Pools solubles (SU, FA, AA) de cada compartimento del intestino delgado
+FAST = {'SI1': [IDX['SI1'].start + i for i in (5, 6, 7)],
+        'SI2': [IDX['SI2'].start + i for i in (5, 6, 7)]}
+FAST_INDEX = np.array(FAST['SI1'] + FAST['SI2'])
+SLOW_INDEX = np.setdiff1d(np.arange(N_POOLS), FAST_INDEX)
+
+@dataclass
+class QSSAReport:
+    t: np.ndarray
+    max_abs_error: np.ndarray   # max_t |QSSA - completa| por pool, (30,)
+    max_rel_error: np.ndarray   # Error absoluto / max |completa| en toda la corrida, (30,)
+    wall_full: float            # Tiempo de pared de la integración completa (s)
+    wall_qssa: float
+    stats_full: dict            # nst, nfe, nje, segments (simulation.integrate_piecewise)
+    stats_qssa: dict
+
+    @property
+    def speedup(self) -> float:
+        return self.wall_full / self.wall_qssa
+
+    def worst(self, k: int = 5) -> list[tuple[str, float]]:
+        """Los k pools con mayor error relativo."""
+        order = np.argsort(-self.max_rel_error)[:k]
+        return [(POOL_NAMES[i], float(self.max_rel_error[i])) for i in order]
+
+class _Reduced:
+    """Lado derecho y jacobiano del sistema reducido, para un juego de parámetros."""
+
+    def __init__(self, params: ModelParams, coupled: bool, fused: bool = False):
+        self.params = params
+        self.system = None
+        flows = ()
+        if coupled:
+            from graph import CoupledSystem
+            self.system = CoupledSystem(params)
+            T = self.system.T.tocoo()
+            flows = tuple(zip(T.row.tolist(), T.col.tolist(), T.data.tolist()))
+        # Entradas lineales a cada pool rápido desde otros pools: {fila: ((columna, tasa), ...)}
+        inflows = {row: tuple((col, rate) for r, col, rate in flows if r == row)
+                   for row in FAST_INDEX.tolist()}
+        # Por compartimento, en orden (SI1 antes que SI2): inicio, constantes y entradas
+        self.blocks = []
+        for name, c in [('SI1', params.si1.compiled()), ('SI2', params.si2.compiled())]:
+            vmax, km, pa, sc = c.scalar
+            self.blocks.append((IDX[name].start, tuple(vmax), tuple(km), pa, tuple(sc[5:]),
+                                tuple(inflows[row] for row in FAST[name])))
+        # Lado derecho reducido generado (codegen, en memoria): evita evaluar el sistema
+        # completo y los pools rápidos en cada llamada
+        self._fused = None
+        if fused:
+            from codegen import fused_qssa_rhs
+            self._fused = fused_qssa_rhs(params, flows, directory=None)
+        self._out = np.empty(len(SLOW_INDEX))
+        self._ss = np.ix_(SLOW_INDEX, SLOW_INDEX)
+        self._sf = np.ix_(SLOW_INDEX, FAST_INDEX)
+        self._fs = np.ix_(FAST_INDEX, SLOW_INDEX)
+        self._ff = np.ix_(FAST_INDEX, FAST_INDEX)
+
+    def expand(self, slow: np.ndarray) -> list[float]:
+        """
+        Estado completo (30 floats) con los pools rápidos en su equilibrio instantáneo,
+        con las mismas operaciones que codegen.generate_qssa_source.
+        """
+        s = slow.tolist()
+        # Pools rápidos: SI1 6-8 y SI2 14-16 (FAST)
+        y = s[:6] + [0.0, 0.0, 0.0] + s[6:11] + [0.0, 0.0, 0.0] + s[11:]
+        for start, vmax, km, pa, sc, inflows in self.blocks:
+            DP, EP, NAPN, ST, LD = y[start:start + 5]
+            # Productos de la hidrólisis: ST -> SU, LD -> FA, DP + EP + NAPN -> AA
+            produced = (vmax[3] * ST / (km[3] + ST + 1e-9),
+                        vmax[4] * LD / (km[4] + LD + 1e-9),
+                        vmax[0] * DP / (km[0] + DP + 1e-9) + vmax[1] * EP / (km[1] + EP + 1e-9)
+                        + vmax[2] * NAPN / (km[2] + NAPN + 1e-9))
+            for j in range(3):
+                a = sc[j] + produced[j]
+                for col, rate in inflows[j]:
+                    a += rate * y[col]
+                # El término MM de si1/si2 es vmax X / (km + X + 1e-9): km + 1e-9 en el balance
+                y[start + 5 + j] = mm_balance_scalar(a, vmax[5 + j], km[5 + j] + 1e-9, pa)
+        return y
+
+    def rhs(self, slow, t, t_mid):
+        # odeint copia el resultado: el mismo buffer sirve para todas las evaluaciones
+        if self._fused is not None:
+            return self._fused(t_mid, slow, self._out)
+        y = self.expand(slow)
+        if self.system is None:
+            dy = dSYSTEM_dt(y, t_mid, self.params)
+        else:
+            dy = self.system.rhs(np.array(y), t_mid)
+        return np.take(dy, SLOW_INDEX, out=self._out)
+
+    def jac(self, slow, t, t_mid):
+        y = self.expand(slow)
+        J = jac_SYSTEM(y, t_mid, self.params) if self.system is None else self.system.jac(y, t_mid)
+        return J[self._ss] - J[self._sf] @ np.linalg.solve(J[self._ff], J[self._fs])
+
+def _rhs_reduced(y, t, t_mid, reduced):
+    return reduced.rhs(y, t, t_mid)
+
+def _jac_reduced(y, t, t_mid, reduced):
+    return reduced.jac(y, t, t_mid)
+
+def simulate_qssa(state0: np.ndarray, t: np.ndarray, params: ModelParams | None = None,
+                  coupled: bool = False, full_output: bool = False, fused: bool = True,
+                  **odeint_kwargs):
+    """
+    Como simulation.simulate_piecewise para un animal, con SU, FA y AA de SI1 y SI2
+    en cuasi-equilibrio. Retorna (len(t), 30), con los pools rápidos reconstruidos
+    (sus valores de state0 se ignoran: parten ya en equilibrio).
+    fused=True usa el lado derecho reducido generado por codegen (en memoria),
+    también en el sistema acoplado.
+    """
+    params = current_params() if params is None else params
+    state0 = np.asarray(state0, dtype=float)
+    if state0.ndim != 1:
+        raise ValueError('simulate_qssa integra un solo animal (estado (30,))')
+    reduced = _Reduced(params, coupled, fused)
+    out = integrate_piecewise(_rhs_reduced, state0[SLOW_INDEX], t, args=(reduced,),
+                              Dfun=odeint_kwargs.pop('Dfun', _jac_reduced), params=params,
+                              full_output=full_output, **odeint_kwargs)
+    slow, stats = out if full_output else (out, None)
+    result = np.array([reduced.expand(row) for row in slow])
+    return (result, stats) if full_output else result
+
+def compare_qssa(state0: np.ndarray, t: np.ndarray, params: ModelParams | None = None,
+                 coupled: bool = False, repeat: int = 1, warmup: float = 0.0,
+                 fused: bool = True, **odeint_kwargs) -> QSSAReport:
+    """
+    Error de simulate_qssa contra simulate_piecewise (misma salida, tolerancias y
+    lado derecho: `fused` se pasa a ambas; simulate_piecewise lo ignora en el sistema
+    acoplado) y tiempos de pared de ambas (mejor de `repeat`). Los errores excluyen t[0] y las
+    salidas con t < t[0] + warmup: si state0 no está en equilibrio, la capa inicial
+    (las primeras horas) domina el error y no es propia de la aproximación.
+    """
+    t = np.asarray(t, dtype=float)
+    runs = {}
+    for name, run in [('full', simulate_piecewise), ('qssa', simulate_qssa)]:
+        best = np.inf
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            result, stats = run(state0, t, params, coupled=coupled, full_output=True, fused=fused,
+                                **odeint_kwargs)
+            best = min(best, time.perf_counter() - t0)
+        runs[name] = (result, stats, best)
+
+    keep = (t > t[0]) & (t >= t[0] + warmup)
+    full, qssa = runs['full'][0][keep], runs['qssa'][0][keep]
+    error = np.max(np.abs(qssa - full), axis=0)
+    scale = np.max(np.abs(runs['full'][0]), axis=0)
+    return QSSAReport(t=t, max_abs_error=error, max_rel_error=error / np.maximum(scale, 1e-12),
+                      wall_full=runs['full'][2], wall_qssa=runs['qssa'][2],
+                      stats_full=runs['full'][1], stats_qssa=runs['qssa'][1])
@@ -0,0 +1,169 @@
+# digestion_model/result.py
+
+"""
+Resultado de simulación con nombres: SimulationResult envuelve el array del
+integrador (len(t), 30), o (len(t), N, 30) para un rebaño, y ofrece:
+    Vistas sin copia por compartimento y pool, con los nombres de model.POOLS:
+        res.LI.VFA, res.SI1[:, 'DP'], res['LI.CH4'], res.SI2[:, ['ST', 'SU']]
+    Métricas derivadas calculadas la primera vez que se piden y memorizadas:
+        integrales en el tiempo, picos (valor y tiempo), digestibilidad proteica.
+    Almacenamiento opcional en float32 (la mitad de memoria); las métricas se
+    calculan siempre en float64.
+El array se envuelve sin copiarlo (salvo conversión a float32) y se marca de sólo
+lectura, para que las métricas memorizadas no queden desactualizadas.
+"""
+
+from functools import cached_property
+
+import numpy as np
+
+from model import IDX, POOL_NAMES, POOLS
+from parameters import ModelParams
+from simulation import simulate_piecewise
+
+_COLUMN = {name: j for j, name in enumerate(POOL_NAMES)}
+
+class CompartmentView:
+    """Pools de un compartimento: vistas del array completo, indexables por nombre."""
+
+    def __init__(self, data: np.ndarray, pools: list[str]):
+        self.data = data
+        self.pools = pools
+
+    def _index(self, key):
+        if isinstance(key, str):
+            return self.pools.index(key)
+        if isinstance(key, list) and key and isinstance(key[0], str):
+            # Varios pools contiguos -> vista; si no, indexado avanzado (copia)
+            idx = [self.pools.index(k) for k in key]
+            if idx == list(range(idx[0], idx[-1] + 1)):
+                return slice(idx[0], idx[-1] + 1)
+            return idx
+        return key
+
+    def __getitem__(self, key):
+        if isinstance(key, tuple):
+            return self.data[key[:-1] + (self._index(key[-1]),)]
+        if isinstance(key, str):
+            return self.data[..., self._index(key)]
+        return self.data[key]
+
+    def __getattr__(self, name):
+        if name.startswith('_') or name not in self.pools:
+            raise AttributeError(name)
+        return self.data[..., self.pools.index(name)]
+
+    def __array__(self, dtype=None):
+        return self.data if dtype is None else self.data.astype(dtype)
+
+    @property
+    def shape(self):
+        return self.data.shape
+
+    def __repr__(self):
+        return f'CompartmentView(pools={self.pools}, shape={self.data.shape})'
+
+class SimulationResult:
+    """Trayectoria con nombres y métricas perezosas (ver el docstring del módulo)."""
+
+    def __init__(self, t: np.ndarray, y: np.ndarray, dtype=None):
+        self.t = np.asarray(t, dtype=float)
+        y = np.asarray(y)
+        if dtype is not None and y.dtype != dtype:
+            y = y.astype(dtype)
+        if y.ndim < 2 or y.shape[0] != len(self.t) or y.shape[-1] != len(POOL_NAMES):
+            raise ValueError(f'forma {y.shape} incompatible con {len(self.t)} tiempos y 30 pools')
+        # Una vista de sólo lectura, sin copiar: el array del llamador sigue siendo escribible
+        y = y.view()
+        y.flags.writeable = False
+        self.y = y
+
+    def compartment(self, name: str) -> CompartmentView:
+        index = IDX[name]
+        if isinstance(index, int):
+            index = slice(index, index + 1)
+        return CompartmentView(self.y[..., index], POOLS[name])
+
+    @property
+    def STO(self) -> CompartmentView:
+        return self.compartment('STO')
+
+    @property
+    def SI1(self) -> CompartmentView:
+        return self.compartment('SI1')
+
+    @property
+    def SI2(self) -> CompartmentView:
+        return self.compartment('SI2')
+
+    @property
+    def LI(self) -> CompartmentView:
+        return self.compartment('LI')
+
+    def __getitem__(self, key):
+        """res['LI.VFA'] -> columna (vista); cualquier otra clave indexa el array."""
+        if isinstance(key, str):
+            return self.y[..., _COLUMN[key]]
+        return self.y[key]
+
+    def __array__(self, dtype=None):
+        return self.y if dtype is None else self.y.astype(dtype)
+
+    def __len__(self):
+        return len(self.t)
+
+    @property
+    def final(self) -> np.ndarray:
+        """Estado al final de la simulación."""
+        return self.y[-1]
+
+    # ---------------------------------------------------
+    # MÉTRICAS (calculadas una vez, en float64)
+    # ---------------------------------------------------
+    @cached_property
+    def integrals(self) -> np.ndarray:
+        """Integral en el tiempo de cada pool (trapecios), (30,) o (N, 30)."""
+        return np.trapz(self.y.astype(float, copy=False), self.t, axis=0)
+
+    @cached_property
+    def _peaks(self):
+        i = np.argmax(self.y, axis=0)
+        return np.take_along_axis(self.y, i[None], axis=0)[0].astype(float), self.t[i]
+
+    @property
+    def peak_values(self) -> np.ndarray:
+        """Máximo de cada pool, (30,) o (N, 30)."""
+        return self._peaks[0]
+
+    @property
+    def peak_times(self) -> np.ndarray:
+        """Tiempo (h) en que cada pool alcanza su máximo."""
+        return self._peaks[1]
+
+    def integral(self, name: str):
+        return self.integrals[..., _COLUMN[name]]
+
+    def peak(self, name: str):
+        """(valor, tiempo) del máximo del pool 'COMP.pool'."""
+        return self.peak_values[..., _COLUMN[name]], self.peak_times[..., _COLUMN[name]]
+
+    @cached_property
+    def digestibilidad_proteica(self):
+        """1 - ∫DP(LI) / ∫DP(SI1), como en ejemplo_96h.py y test_digestibilidad.py."""
+        return 1 - self.integral('LI.DP') / (self.integral('SI1.DP') + 1e-9)
+
+    @cached_property
+    def metrics(self) -> dict:
+        """Métricas de resumen habituales (producción en LI como integral del contenido)."""
+        return {
+            'digestibilidad_proteica': self.digestibilidad_proteica,
+            'VFA_integral': self.integral('LI.VFA'),
+            'CH4_integral': self.integral('LI.CH4'),
+            'MM_final': self.final[..., _COLUMN['LI.MM']],
+            'MM_pico': self.peak('LI.MM')[0],
+        }
+
+def simulate(state0: np.ndarray, t: np.ndarray, params: ModelParams | None = None,
+             dtype=None, **kwargs) -> SimulationResult:
+    """simulation.simulate_piecewise envuelto en un SimulationResult (dtype=np.float32 opcional)."""
+    return SimulationResult(t, simulate_piecewise(state0, t, params, **kwargs), dtype=dtype)
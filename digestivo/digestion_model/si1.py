@@ -18,14 +18,39 @@ Este módulo calcula la derivada de cada componente del vector de estado de SI1:
 [DP, EP, NAPN, ST, LD, SU, FA, AA]
 """
 
-from parameters import si1_params
+from dataclasses import fields
+
+from parameters import ModelParams, SI1Params, current_params
 import numpy as np
 
 def michaelis_menten(S: float, vmax: float, km: float) -> float:
     """Cinética de saturación tipo Michaelis–Menten"""
     return vmax * S / (km + S + 1e-9)
 
-def dSI1_dt(state: list[float], t: float) -> list[float]:
+def dmichaelis_menten_dS(S: float, vmax: float, km: float) -> float:
+    """Derivada de michaelis_menten respecto del sustrato S"""
+    return vmax * (km + 1e-9) / (km + S + 1e-9)**2
+
+# Declaración para el grafo de compartimentos (graph.py)
+POOLS = ['DP', 'EP', 'NAPN', 'ST', 'LD', 'SU', 'FA', 'AA']
+
+def outflows(params: ModelParams) -> list[tuple[str, str, float]]:
+    """Pasaje de cada pool hacia el mismo pool de SI2: (pool, 'SI2.pool', tasa 1/h)."""
+    return [(pool, f'SI2.{pool}', params.si1.CSI1_pa) for pool in POOLS]
+
+# Matriz de transformación: columna j = velocidad Michaelis–Menten del pool j
+# (hidrólisis para DP..LD, absorción para SU, FA, AA). Cada pool pierde su propia
+# velocidad; ST -> SU, LD -> FA y DP + EP + NAPN -> AA.
+PRODUCTOS = -np.eye(8)
+PRODUCTOS[5, 3] = 1.0
+PRODUCTOS[6, 4] = 1.0
+PRODUCTOS[7, 0:3] = 1.0
+
+# Flujos acumulables (ver accumulators.py): hidrólisis, absorción y pasaje por pool
+FLUXES = ([f'hyd.{pool}' for pool in POOLS[:5]] + [f'abs.{pool}' for pool in POOLS[5:]]
+          + [f'pas.{pool}' for pool in POOLS])
+
+def dSI1_dt(state: list[float], t: float, params: SI1Params | None = None) -> list[float] | np.ndarray:
     """
     Calcula las derivadas del contenido en SI1 para los siguientes pools:
     DP, EP, NAPN, ST, LD, SU, FA, AA
@@ -36,41 +61,104 @@ def dSI1_dt(state: list[float], t: float) -> list[float]:
     - Absorción: dP/dt -= MM(P)
     - Secreciones: entradas constantes al sistema
 
+    El estado puede ser un vector (8,) o un array (8, N) con un animal por
+    columna; los campos de `params` pueden ser escalares o arrays (N,).
+
     Retorna:
-    - derivadas [dDP, dEP, dNAPN, dST, dLD, dSU, dFA, dAA]
+    - derivadas [dDP, dEP, dNAPN, dST, dLD, dSU, dFA, dAA]: lista para un animal,
+      array (8, N) para un rebaño
+    """
+    p = current_params().si1 if params is None else params
+    c = p.compiled()
+
+    x = np.asarray(state, dtype=float)
+
+    if x.ndim == 1 and c.scalar is not None:
+        # Un solo animal: floats de Python, sin el costo fijo de operar con arrays de 8
+        vmax, km, pa, sc = c.scalar
+        pools = x.tolist()
+        DP, EP, NAPN, ST, LD, SU, FA, AA = pools
+        hyd_DP, hyd_EP, hyd_NAPN, hyd_ST, hyd_LD, abs_SU, abs_FA, abs_AA = [
+            v * S / (k + S + 1e-9) for S, v, k in zip(pools, vmax, km)]
+        return [
+            -hyd_DP + sc[0] - pa * DP,
+            -hyd_EP + sc[1] - pa * EP,
+            -hyd_NAPN + sc[2] - pa * NAPN,
+            -hyd_ST + sc[3] - pa * ST,
+            -hyd_LD + sc[4] - pa * LD,
+            +hyd_ST - abs_SU + sc[5] - pa * SU,
+            +hyd_LD - abs_FA + sc[6] - pa * FA,
+            +hyd_DP + hyd_EP + hyd_NAPN - abs_AA + sc[7] - pa * AA,
+        ]
+
+    # Rebaño: pools en el eje 0 (un animal por columna)
+    X = x.reshape(8, -1)
+
+    # Hidrólisis y absorción en una sola llamada vectorizada
+    rates = michaelis_menten(X, c.vmax, c.km)
+
+    # Transformaciones + secreciones - pasaje a SI2
+    dX = PRODUCTOS @ rates
+    dX += c.sc
+    dX -= c.pa * X
+
+    return dX.reshape(x.shape)
+
+def flux_rates(state: list[float], t: float, params: SI1Params | None = None) -> np.ndarray:
     """
-    # Desempaquetar estado
-    DP, EP, NAPN, ST, LD, SU, FA, AA = state
-
-    # Hidrólisis de polímeros
-    hyd_DP = michaelis_menten(DP, si1_params.CSI1_DP_hyv, si1_params.CSI1_DP_hyk)
-    hyd_EP = michaelis_menten(EP, si1_params.CSI1_EP_hyv, si1_params.CSI1_EP_hyk)
-    hyd_NAPN = michaelis_menten(NAPN, si1_params.CSI1_NAPN_hyv, si1_params.CSI1_NAPN_hyk)
-    hyd_ST = michaelis_menten(ST, si1_params.CSI1_ST_hyv, si1_params.CSI1_ST_hyk)
-    hyd_LD = michaelis_menten(LD, si1_params.CSI1_LD_hyv, si1_params.CSI1_LD_hyk)
-
-    # Absorción de productos solubles
-    abs_SU = michaelis_menten(SU, si1_params.CSI1_SU_abv, si1_params.CSI1_SU_abk)
-    abs_FA = michaelis_menten(FA, si1_params.CSI1_FA_abv, si1_params.CSI1_FA_abk)
-    abs_AA = michaelis_menten(AA, si1_params.CSI1_AA_abv, si1_params.CSI1_AA_abk)
-
-    # Secreciones endógenas
-    sc_EP = si1_params.CSI1_EPp_sc + si1_params.CSI1_EPb_sc
-    sc_NAPN = si1_params.CSI1_NAPNp_sc + si1_params.CSI1_NAPNb_sc
-    sc_LD = si1_params.CSI1_LD_sc
-
-    # Tasa de pasaje a SI2
-    pasaje = si1_params.CSI1_pa
-
-    # Derivadas
-    dDP = -hyd_DP - pasaje * DP
-    dEP = -hyd_EP + sc_EP - pasaje * EP
-    dNAPN = -hyd_NAPN + sc_NAPN - pasaje * NAPN
-    dST = -hyd_ST - pasaje * ST
-    dLD = -hyd_LD + sc_LD - pasaje * LD
-
-    dSU = +hyd_ST - abs_SU - pasaje * SU
-    dFA = +hyd_LD - abs_FA - pasaje * FA
-    dAA = +hyd_DP + hyd_EP + hyd_NAPN - abs_AA - pasaje * AA
-
-    return [dDP, dEP, dNAPN, dST, dLD, dSU, dFA, dAA]
+    Flujos instantáneos en el orden de FLUXES: velocidades Michaelis–Menten de cada
+    pool (hidrólisis DP..LD, absorción SU, FA, AA) y pasaje pa * X.
+    Retorna (16,) para un estado (8,) o (16, N) para un estado (8, N).
+    """
+    p = current_params().si1 if params is None else params
+    c = p.compiled()
+
+    x = np.asarray(state, dtype=float)
+    X = x.reshape(8, -1)
+    F = np.concatenate([michaelis_menten(X, c.vmax, c.km), c.pa * X])
+    return F.reshape((16,) + x.shape[1:])
+
+def jac_SI1(state: list[float], t: float, params: SI1Params | None = None) -> np.ndarray:
+    """
+    Jacobiano exacto de dSI1_dt: J[i, j] = d(dX_i/dt) / dX_j, array (8, 8).
+    Con un estado (8, N) retorna un array (8, 8, N).
+    Las secreciones son constantes y no aportan términos.
+    """
+    p = current_params().si1 if params is None else params
+    c = p.compiled()
+
+    x = np.asarray(state, dtype=float)
+    X = x.reshape(8, -1)
+
+    d_rates = dmichaelis_menten_dS(X, c.vmax, c.km)
+    J = PRODUCTOS[:, :, None] * d_rates[None, :, :] - c.pa * np.eye(8)[:, :, None]
+
+    return J.reshape((8, 8) + x.shape[1:])
+
+# Campos de SI1Params, en el orden de las columnas de jac_params_SI1. Los campos de
+# Vmáx y Km siguen el orden de los pools (DP..LD hidrólisis, SU, FA, AA absorción).
+PARAMS = [f.name for f in fields(SI1Params)]
+_VMAX = [PARAMS.index(n) for n in PARAMS if n.endswith(('_hyv', '_abv'))]
+_KM = [PARAMS.index(n) for n in PARAMS if n.endswith(('_hyk', '_abk'))]
+# Secreciones: pool que recibe cada campo *_sc
+_SC = {'CSI1_EPp_sc': 1, 'CSI1_EPb_sc': 1, 'CSI1_NAPNp_sc': 2, 'CSI1_NAPNb_sc': 2, 'CSI1_LD_sc': 4}
+
+def jac_params_SI1(state: list[float], t: float, params: SI1Params | None = None) -> np.ndarray:
+    """
+    Derivadas parciales exactas de dSI1_dt respecto de cada campo de SI1Params
+    (columnas en el orden de PARAMS): array (8, len(PARAMS)), un solo animal.
+    """
+    p = current_params().si1 if params is None else params
+    c = p.compiled()
+
+    X = np.asarray(state, dtype=float)
+    vmax, km = c.vmax[:, 0], c.km[:, 0]
+    denom = km + X + 1e-9
+
+    D = np.zeros((8, len(PARAMS)))
+    D[:, _VMAX] = PRODUCTOS * (X / denom)
+    D[:, _KM] = PRODUCTOS * (-vmax * X / denom**2)
+    D[:, PARAMS.index('CSI1_pa')] = -X
+    for name, pool in _SC.items():
+        D[pool, PARAMS.index(name)] = 1.0
+    return D
@@ -5,44 +5,133 @@ Modelo del compartimento SI2 (intestino delgado distal) según Strathe et al. (2
 Calcula la derivada del estado: [DP, EP, NAPN, ST, LD, SU, FA, AA]
 """
 
-from parameters import si2_params
+from dataclasses import fields
+
+from parameters import ModelParams, SI2Params, current_params
 import numpy as np
 
 def michaelis_menten(S: float, vmax: float, km: float) -> float:
     """Cinética de saturación tipo Michaelis–Menten"""
     return vmax * S / (km + S + 1e-9)
 
-def dSI2_dt(state: list[float], t: float) -> list[float]:
+def dmichaelis_menten_dS(S: float, vmax: float, km: float) -> float:
+    """Derivada de michaelis_menten respecto del sustrato S"""
+    return vmax * (km + 1e-9) / (km + S + 1e-9)**2
+
+# Declaración para el grafo de compartimentos (graph.py)
+POOLS = ['DP', 'EP', 'NAPN', 'ST', 'LD', 'SU', 'FA', 'AA']
+
+def outflows(params: ModelParams) -> list[tuple[str, str, float]]:
+    """Pasaje de cada pool hacia el mismo pool de LI: (pool, 'LI.pool', tasa 1/h)."""
+    return [(pool, f'LI.{pool}', params.si2.CSI2_pa) for pool in POOLS]
+
+# Matriz de transformación: columna j = velocidad Michaelis–Menten del pool j
+# (hidrólisis para DP..LD, absorción para SU, FA, AA). Cada pool pierde su propia
+# velocidad; ST -> SU, LD -> FA y DP + EP + NAPN -> AA.
+PRODUCTOS = -np.eye(8)
+PRODUCTOS[5, 3] = 1.0
+PRODUCTOS[6, 4] = 1.0
+PRODUCTOS[7, 0:3] = 1.0
+
+# Flujos acumulables (ver accumulators.py): hidrólisis, absorción y pasaje por pool
+FLUXES = ([f'hyd.{pool}' for pool in POOLS[:5]] + [f'abs.{pool}' for pool in POOLS[5:]]
+          + [f'pas.{pool}' for pool in POOLS])
+
+def dSI2_dt(state: list[float], t: float, params: SI2Params | None = None) -> list[float] | np.ndarray:
     """
     Derivadas de los pools en SI2:
     [DP, EP, NAPN, ST, LD, SU, FA, AA]
+
+    Acepta un estado (8,) o (8, N) y parámetros escalares o arrays (N,);
+    retorna una lista para un animal y un array (8, N) para un rebaño.
     """
-    DP, EP, NAPN, ST, LD, SU, FA, AA = state
+    p = current_params().si2 if params is None else params
+    c = p.compiled()
+
+    x = np.asarray(state, dtype=float)
+
+    if x.ndim == 1 and c.scalar is not None:
+        # Un solo animal: floats de Python, sin el costo fijo de operar con arrays de 8
+        vmax, km, pa, sc = c.scalar
+        pools = x.tolist()
+        DP, EP, NAPN, ST, LD, SU, FA, AA = pools
+        hyd_DP, hyd_EP, hyd_NAPN, hyd_ST, hyd_LD, abs_SU, abs_FA, abs_AA = [
+            v * S / (k + S + 1e-9) for S, v, k in zip(pools, vmax, km)]
+        return [
+            -hyd_DP + sc[0] - pa * DP,
+            -hyd_EP + sc[1] - pa * EP,
+            -hyd_NAPN + sc[2] - pa * NAPN,
+            -hyd_ST + sc[3] - pa * ST,
+            -hyd_LD + sc[4] - pa * LD,
+            +hyd_ST - abs_SU + sc[5] - pa * SU,
+            +hyd_LD - abs_FA + sc[6] - pa * FA,
+            +hyd_DP + hyd_EP + hyd_NAPN - abs_AA + sc[7] - pa * AA,
+        ]
 
-    # Hidrólisis
-    hyd_DP = michaelis_menten(DP, si2_params.CSI2_DP_hyv, si2_params.CSI2_DP_hyk)
-    hyd_EP = michaelis_menten(EP, si2_params.CSI2_EP_hyv, si2_params.CSI2_EP_hyk)
-    hyd_NAPN = michaelis_menten(NAPN, si2_params.CSI2_NAPN_hyv, si2_params.CSI2_NAPN_hyk)
-    hyd_ST = michaelis_menten(ST, si2_params.CSI2_ST_hyv, si2_params.CSI2_ST_hyk)
-    hyd_LD = michaelis_menten(LD, si2_params.CSI2_LD_hyv, si2_params.CSI2_LD_hyk)
+    # Rebaño: pools en el eje 0 (un animal por columna)
+    X = x.reshape(8, -1)
 
-    # Absorción
-    abs_SU = michaelis_menten(SU, si2_params.CSI2_SU_abv, si2_params.CSI2_SU_abk)
-    abs_FA = michaelis_menten(FA, si2_params.CSI2_FA_abv, si2_params.CSI2_FA_abk)
-    abs_AA = michaelis_menten(AA, si2_params.CSI2_AA_abv, si2_params.CSI2_AA_abk)
+    # Hidrólisis y absorción en una sola llamada vectorizada
+    rates = michaelis_menten(X, c.vmax, c.km)
 
-    # Pasaje
-    k = si2_params.CSI2_pa
+    # Transformaciones + secreciones - pasaje
+    dX = PRODUCTOS @ rates
+    dX += c.sc
+    dX -= c.pa * X
 
-    # Derivadas
-    dDP = -hyd_DP - k * DP
-    dEP = -hyd_EP - k * EP
-    dNAPN = -hyd_NAPN - k * NAPN
-    dST = -hyd_ST - k * ST
-    dLD = -hyd_LD - k * LD
+    return dX.reshape(x.shape)
+
+def flux_rates(state: list[float], t: float, params: SI2Params | None = None) -> np.ndarray:
+    """
+    Flujos instantáneos en el orden de FLUXES: velocidades Michaelis–Menten de cada
+    pool (hidrólisis DP..LD, absorción SU, FA, AA) y pasaje pa * X.
+    Retorna (16,) para un estado (8,) o (16, N) para un estado (8, N).
+    """
+    p = current_params().si2 if params is None else params
+    c = p.compiled()
+
+    x = np.asarray(state, dtype=float)
+    X = x.reshape(8, -1)
+    F = np.concatenate([michaelis_menten(X, c.vmax, c.km), c.pa * X])
+    return F.reshape((16,) + x.shape[1:])
+
+def jac_SI2(state: list[float], t: float, params: SI2Params | None = None) -> np.ndarray:
+    """
+    Jacobiano exacto de dSI2_dt: J[i, j] = d(dX_i/dt) / dX_j, array (8, 8).
+    Con un estado (8, N) retorna un array (8, 8, N).
+    Las secreciones son constantes y no aportan términos.
+    """
+    p = current_params().si2 if params is None else params
+    c = p.compiled()
+
+    x = np.asarray(state, dtype=float)
+    X = x.reshape(8, -1)
+
+    d_rates = dmichaelis_menten_dS(X, c.vmax, c.km)
+    J = PRODUCTOS[:, :, None] * d_rates[None, :, :] - c.pa * np.eye(8)[:, :, None]
+
+    return J.reshape((8, 8) + x.shape[1:])
+
+# Campos de SI2Params, en el orden de las columnas de jac_params_SI2 (Vmáx y Km
+# en el orden de los pools). CSI2_EP_sc y CSI2_NAPN_sc no intervienen en dSI2_dt.
+PARAMS = [f.name for f in fields(SI2Params)]
+_VMAX = [PARAMS.index(n) for n in PARAMS if n.endswith(('_hyv', '_abv'))]
+_KM = [PARAMS.index(n) for n in PARAMS if n.endswith(('_hyk', '_abk'))]
+
+def jac_params_SI2(state: list[float], t: float, params: SI2Params | None = None) -> np.ndarray:
+    """
+    Derivadas parciales exactas de dSI2_dt respecto de cada campo de SI2Params
+    (columnas en el orden de PARAMS): array (8, len(PARAMS)), un solo animal.
+    """
+    p = current_params().si2 if params is None else params
+    c = p.compiled()
 
-    dSU = +hyd_ST - abs_SU - k * SU
-    dFA = +hyd_LD - abs_FA - k * FA
-    dAA = +hyd_DP + hyd_EP + hyd_NAPN - abs_AA - k * AA
+    X = np.asarray(state, dtype=float)
+    vmax, km = c.vmax[:, 0], c.km[:, 0]
+    denom = km + X + 1e-9
 
-    return [dDP, dEP, dNAPN, dST, dLD, dSU, dFA, dAA]
+    D = np.zeros((8, len(PARAMS)))
+    D[:, _VMAX] = PRODUCTOS * (X / denom)
+    D[:, _KM] = PRODUCTOS * (-vmax * X / denom**2)
+    D[:, PARAMS.index('CSI2_pa')] = -X
+    return D
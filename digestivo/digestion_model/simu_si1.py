@@ -1,31 +1,40 @@
 """
-Simulación mínima del modelo de SI2 (intestino delgado distal).
+Simulación mínima del modelo de SI1 (intestino delgado proximal).
+Importar este módulo no simula ni grafica: ejecutarlo como script, o usar
+python -m digestion_model si1 (ver cli.py).
 """
-import matplotlib.pyplot as plt
-from scipy.integrate import odeint
 import numpy as np
-from si1 import dSI1_dt
+from scipy.integrate import odeint
+from si1 import POOLS, dSI1_dt
+
+# Etiquetas para cada curva
+NAMES = POOLS
 
-# Tiempo de simulación
-t = np.linspace(0, 24, 1000)
+def simulate(hours: float = 24.0, points: int = 1000):
+    """Retorna (t, result) con result de forma (points, 8)."""
+    # Tiempo de simulación
+    t = np.linspace(0, hours, points)
 
-# Condición inicial (valores arbitrarios de masa o concentración)
-state0 = [1.0, 0.5, 0.5, 2.0, 1.5, 0.1, 0.1, 0.1]
+    # Condición inicial (valores arbitrarios de masa o concentración)
+    state0 = [1.0, 0.5, 0.5, 2.0, 1.5, 0.1, 0.1, 0.1]
 
-# Integrar el sistema de ecuaciones diferenciales
-result = odeint(dSI1_dt, state0, t)
+    # Integrar el sistema de ecuaciones diferenciales
+    return t, odeint(dSI1_dt, state0, t)
 
-# Etiquetas para cada curva
-labels = ['DP', 'EP', 'NAPN', 'ST', 'LD', 'SU', 'FA', 'AA']
+def plot(t, result):
+    import matplotlib.pyplot as plt
+
+    # Graficar resultados
+    plt.figure(figsize=(10, 5))
+    for i in range(8):
+        plt.plot(t, result[:, i], label=NAMES[i])
+    plt.xlabel("Tiempo (h)")
+    plt.ylabel("Cantidad (mol N o C)")
+    plt.title("Dinámica de los nutrientes en SI1")
+    plt.legend()
+    plt.grid()
+    plt.tight_layout()
+    plt.show()
 
-# Graficar resultados
-plt.figure(figsize=(10, 5))
-for i in range(8):
-    plt.plot(t, result[:, i], label=labels[i])
-plt.xlabel("Tiempo (h)")
-plt.ylabel("Cantidad (mol N o C)")
-plt.title("Dinámica de los nutrientes en SI1")
-plt.legend()
-plt.grid()
-plt.tight_layout()
-plt.show()
+if __name__ == '__main__':
+    plot(*simulate())
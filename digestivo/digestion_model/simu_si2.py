@@ -2,34 +2,43 @@
 
 """
 Simulación mínima del modelo de SI2 (intestino delgado distal).
+Importar este módulo no simula ni grafica: ejecutarlo como script, o usar
+python -m digestion_model si2 (ver cli.py).
 """
 
 import numpy as np
 from scipy.integrate import odeint
-import matplotlib.pyplot as plt
 
-from si2 import dSI2_dt
-
-# Tiempo de simulación (horas)
-t = np.linspace(0, 24, 1000)
-
-# Condición inicial (valores arbitrarios)
-state0 = [0.5, 0.3, 0.3, 1.0, 0.8, 0.05, 0.05, 0.05]
-
-# Ejecutar la simulación
-result = odeint(dSI2_dt, state0, t)
+from si2 import POOLS, dSI2_dt
 
 # Etiquetas
-labels = ['DP', 'EP', 'NAPN', 'ST', 'LD', 'SU', 'FA', 'AA']
-
-# Gráfico
-plt.figure(figsize=(10, 5))
-for i in range(8):
-    plt.plot(t, result[:, i], label=labels[i])
-plt.xlabel("Tiempo (h)")
-plt.ylabel("Cantidad (mol N o C)")
-plt.title("Simulación de nutrientes en SI2")
-plt.legend()
-plt.grid()
-plt.tight_layout()
-plt.show()
+NAMES = POOLS
+
+def simulate(hours: float = 24.0, points: int = 1000):
+    """Retorna (t, result) con result de forma (points, 8)."""
+    # Tiempo de simulación (horas)
+    t = np.linspace(0, hours, points)
+
+    # Condición inicial (valores arbitrarios)
+    state0 = [0.5, 0.3, 0.3, 1.0, 0.8, 0.05, 0.05, 0.05]
+
+    # Ejecutar la simulación
+    return t, odeint(dSI2_dt, state0, t)
+
+def plot(t, result):
+    import matplotlib.pyplot as plt
+
+    # Gráfico
+    plt.figure(figsize=(10, 5))
+    for i in range(8):
+        plt.plot(t, result[:, i], label=NAMES[i])
+    plt.xlabel("Tiempo (h)")
+    plt.ylabel("Cantidad (mol N o C)")
+    plt.title("Simulación de nutrientes en SI2")
+    plt.legend()
+    plt.grid()
+    plt.tight_layout()
+    plt.show()
+
+if __name__ == '__main__':
+    plot(*simulate())
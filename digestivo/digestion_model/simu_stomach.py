@@ -3,30 +3,40 @@
 """
 Simulación de la dinámica del contenido estomacal
 usando el modelo de Strathe et al. (2008).
+Importar este módulo no simula ni grafica: ejecutarlo como script, o usar
+python -m digestion_model stomach (ver cli.py).
 """
 
 import numpy as np
 from scipy.integrate import odeint
-import matplotlib.pyplot as plt
 
 # Importar el modelo del estómago
-from stomach import dStomach_dt
-
-# Tiempo de simulación
-t = np.linspace(0, 48, 1000)  # 48 h
-
-# Condición inicial: masa en estómago = 0 kg
-S0 = 0.0
-
-# Resolver ODE
-S = odeint(dStomach_dt, S0, t)
-
-# Graficar
-plt.plot(t, S, label='Masa en estómago')
-plt.xlabel("Tiempo (h)")
-plt.ylabel("Materia seca (kg)")
-plt.title("Contenido estomacal según modelo de Strathe")
-plt.grid()
-plt.legend()
-plt.tight_layout()
-plt.show()
+from stomach import POOLS, dStomach_dt
+
+NAMES = POOLS
+
+def simulate(hours: float = 48.0, points: int = 1000):
+    """Retorna (t, S) con S de forma (points, 1)."""
+    # Tiempo de simulación
+    t = np.linspace(0, hours, points)
+
+    # Condición inicial: masa en estómago = 0 kg
+    S0 = 0.0
+
+    # Resolver ODE
+    return t, odeint(dStomach_dt, S0, t)
+
+def plot(t, S):
+    import matplotlib.pyplot as plt
+
+    plt.plot(t, S, label='Masa en estómago')
+    plt.xlabel("Tiempo (h)")
+    plt.ylabel("Materia seca (kg)")
+    plt.title("Contenido estomacal según modelo de Strathe")
+    plt.grid()
+    plt.legend()
+    plt.tight_layout()
+    plt.show()
+
+if __name__ == '__main__':
+    plot(*simulate())
@@ -6,39 +6,41 @@ Incluye estómago, intestino delgado (SI1, SI2) e intestino grueso (LI).
 Este archivo:
     Define el vector completo de estado inicial.
     Simula durante 96 h (como en Strathe et al. 2008).
-    Integra con scipy.integrate.odeint usando la función dSYSTEM_dt.
+    Integra dSYSTEM_dt por tramos entre comidas (simulation.simulate_piecewise).
     Genera gráficos agrupados por compartimento (STO, SI1, SI2, LI).
+Importar este módulo no simula ni grafica: ejecutarlo como script, o usar
+python -m digestion_model system (ver cli.py).
 """
 
 import numpy as np
-import matplotlib.pyplot as plt
-from scipy.integrate import odeint
 
-from model import dSYSTEM_dt, IDX
+from model import IDX, POOL_NAMES, POOLS
+from simulation import simulate_piecewise
 
-# Tiempo de simulación (96 h = 4 días)
-t = np.linspace(0, 96, 2000)
+NAMES = POOL_NAMES
 
-# Vector de estado inicial (30 variables)
-# [STO, SI1 (8), SI2 (8), LI (13)]
-state0 = np.zeros(30)
+def initial_state() -> np.ndarray:
+    # Vector de estado inicial (30 variables)
+    # [STO, SI1 (8), SI2 (8), LI (13)]
+    state0 = np.zeros(30)
 
-# Supuestos iniciales (valores razonables para ejemplo)
-state0[IDX['STO']] = 0.0
-state0[IDX['SI1']] = [1.0, 0.5, 0.5, 2.0, 1.5, 0.1, 0.1, 0.1]
-state0[IDX['SI2']] = [0.5, 0.3, 0.3, 1.0, 0.8, 0.05, 0.05, 0.05]
-state0[IDX['LI']]  = [0.3, 0.2, 0.2, 0.5, 0.8, 0.3, 0.05, 0.05, 0.05, 0.0, 0.0, 0.0, 0.0]
+    # Supuestos iniciales (valores razonables para ejemplo)
+    state0[IDX['STO']] = 0.0
+    state0[IDX['SI1']] = [1.0, 0.5, 0.5, 2.0, 1.5, 0.1, 0.1, 0.1]
+    state0[IDX['SI2']] = [0.5, 0.3, 0.3, 1.0, 0.8, 0.05, 0.05, 0.05]
+    state0[IDX['LI']]  = [0.3, 0.2, 0.2, 0.5, 0.8, 0.3, 0.05, 0.05, 0.05, 0.0, 0.0, 0.0, 0.0]
+    return state0
 
-# Simular
-result = odeint(dSYSTEM_dt, state0, t)
+def simulate(hours: float = 96.0, points: int = 2000, **kwargs):
+    """
+    Retorna (t, result) con result de forma (points, 30).
+    kwargs se pasan a simulate_piecewise (p.ej. fused=True, coupled=True).
+    """
+    # Tiempo de simulación (96 h = 4 días)
+    t = np.linspace(0, hours, points)
 
-# Etiquetas por compartimento
-labels = {
-    'STO': ['Estómago'],
-    'SI1': ['DP', 'EP', 'NAPN', 'ST', 'LD', 'SU', 'FA', 'AA'],
-    'SI2': ['DP', 'EP', 'NAPN', 'ST', 'LD', 'SU', 'FA', 'AA'],
-    'LI':  ['DP', 'EP', 'NAPN', 'ST', 'DDF', 'LD', 'SU', 'FA', 'AA', 'VFA', 'CO2', 'CH4', 'MM']
-}
+    # Simular
+    return t, simulate_piecewise(initial_state(), t, **kwargs)
 
 # Función para graficar un compartimento
 def plot_section(ax, t, data, indices, names, title):
@@ -50,13 +52,19 @@ def plot_section(ax, t, data, indices, names, title):
     ax.legend()
     ax.grid(True)
 
-# Crear subplots
-fig, ax = plt.subplots(2, 2, figsize=(14, 8))
+def plot(t, result):
+    import matplotlib.pyplot as plt
 
-plot_section(ax[0, 0], t, result, [IDX['STO']], labels['STO'], "Estómago")
-plot_section(ax[0, 1], t, result, range(*IDX['SI1'].indices(30)), labels['SI1'], "SI1")
-plot_section(ax[1, 0], t, result, range(*IDX['SI2'].indices(30)), labels['SI2'], "SI2")
-plot_section(ax[1, 1], t, result, range(*IDX['LI'].indices(30)), labels['LI'], "Intestino grueso (LI)")
+    # Crear subplots
+    fig, ax = plt.subplots(2, 2, figsize=(14, 8))
 
-plt.tight_layout()
-plt.show()
+    plot_section(ax[0, 0], t, result, [IDX['STO']], ['Estómago'], "Estómago")
+    plot_section(ax[0, 1], t, result, range(*IDX['SI1'].indices(30)), POOLS['SI1'], "SI1")
+    plot_section(ax[1, 0], t, result, range(*IDX['SI2'].indices(30)), POOLS['SI2'], "SI2")
+    plot_section(ax[1, 1], t, result, range(*IDX['LI'].indices(30)), POOLS['LI'], "Intestino grueso (LI)")
+
+    plt.tight_layout()
+    plt.show()
+
+if __name__ == '__main__':
+    plot(*simulate())
@@ -0,0 +1,177 @@
+# digestion_model/simulation.py
+
+"""
+Driver de simulación por tramos, consciente de los eventos de alimentación.
+La ingestión (stomach.ingestion_schedule) es una función escalón: vale DMI/(f*T)
+durante ventanas de TFEED horas (o lo que indique un horario explícito, feeding.py)
+y cero fuera de ellas. Integrar a través de esos
+saltos obliga al integrador adaptativo a rechazar pasos, y con pasos grandes
+puede saltarse una comida entera.
+Este módulo:
+    Calcula los bordes de las ventanas de alimentación (feeding_breakpoints).
+    Integra cada tramo suave por separado con odeint, pasando el estado de un
+    tramo al siguiente (simulate_piecewise; integrate_piecewise para otros
+    sistemas que dependan de la ingestión, p.ej. ecuaciones variacionales).
+Dentro de un tramo la ingestión es constante, por lo que el lado derecho se evalúa
+con el tiempo del punto medio del tramo: así el integrador nunca ve el escalón.
+Hilos: LSODA (odepack) guarda su estado en bloques COMMON de Fortran y la función
+de Python en variables globales, por lo que dos odeint simultáneos en hilos
+distintos se corrompen entre sí. Cada llamada pasa por serialized_odeint, que las
+serializa con un candado; los pools de procesos no se ven afectados.
+Si odeint no completa un tramo (p.ej. "Excess work done", fallos repetidos del test
+de error) las filas siguientes no son válidas: integrate_piecewise lanza
+IntegrationError con los bordes del tramo y el último tiempo alcanzado en lugar de
+pasar ese estado al tramo siguiente.
+"""
+
+import threading
+from functools import partial
+
+import numpy as np
+from scipy.integrate import odeint
+
+from model import dSYSTEM_dt, jac_SYSTEM
+from parameters import ModelParams, current_params
+
+_ODEINT_LOCK = threading.RLock()
+
+class IntegrationError(RuntimeError):
+    """odeint no completó un tramo de integrate_piecewise."""
+
+def serialized_odeint(*args, **kwargs):
+    """scipy.integrate.odeint, de a una llamada por vez en todo el proceso."""
+    with _ODEINT_LOCK:
+        return odeint(*args, **kwargs)
+
+def feeding_breakpoints(t0: float, t1: float, params: ModelParams | None = None) -> np.ndarray:
+    """
+    Inicios y finales de las ventanas de alimentación en el intervalo abierto (t0, t1).
+    Con horarios por animal retorna la unión de los bordes de todo el rebaño.
+    """
+    p = current_params().stomach if params is None else params.stomach
+    return p.compiled().breakpoints(t0, t1)
+
+def _rhs_segment(y, t, t_mid, n, params):
+    # La ingestión es constante en el tramo: se evalúa en su punto medio
+    if n is None:
+        return dSYSTEM_dt(y, t_mid, params)
+    return dSYSTEM_dt(y.reshape(n, -1), t_mid, params).ravel()
+
+def _jac_segment(y, t, t_mid, n, params, *fused):
+    return jac_SYSTEM(y, t_mid, params)
+
+def _rhs_fused(y, t, t_mid, n, params, rhs, out):
+    # odeint copia el resultado: el mismo buffer sirve para todas las evaluaciones
+    return rhs(t_mid, y, out)
+
+def _rhs_coupled(y, t, t_mid, system):
+    return system.rhs(y, t_mid)
+
+def _jac_coupled(y, t, t_mid, system):
+    return system.jac(y, t_mid)
+
+def _jac_herd_banded(y, t, t_mid, n, params, ml, mu):
+    from herd import jac_HERD
+    return jac_HERD(y, t_mid, n, params, ml, mu)
+
+def _jac_coupled_herd_banded(y, t, t_mid, system, ml, mu):
+    from herd import band_blocks, jac_HERD_blocks
+    J = jac_HERD_blocks(y, t_mid, system.n_animals, system.params, system)
+    return band_blocks(J, y.size, ml, mu)
+
+def integrate_piecewise(func, y0: np.ndarray, t: np.ndarray, args: tuple = (), Dfun=None,
+                        params: ModelParams | None = None, full_output: bool = False,
+                        jump=None, **odeint_kwargs):
+    """
+    Bucle genérico por tramos entre bordes de comidas, con odeint en cada tramo.
+    func(y, t, t_mid, *args) y Dfun(y, t, t_mid, *args) reciben además el punto medio
+    del tramo, donde deben evaluar la ingestión. `params` define los bordes.
+    jump(y, t_b) opcional: estado tras cada borde interior t_b, para sistemas con
+    saltos en los bordes (p.ej. sensibilidades respecto de TFEED, sensitivity.py).
+    Retorna el array (len(t), len(y0)) y, con full_output=True, un dict de estadísticas.
+    Lanza IntegrationError si odeint no completa algún tramo.
+    """
+    t = np.asarray(t, dtype=float)
+    y = np.asarray(y0, dtype=float).ravel()
+
+    bounds = np.concatenate([[t[0]], feeding_breakpoints(t[0], t[-1], params), [t[-1]]])
+    result = np.empty((len(t), y.size))
+    result[0] = y
+    stats = {'nst': 0, 'nfe': 0, 'nje': 0, 'segments': 0}
+
+    for a, b in zip(bounds[:-1], bounds[1:]):
+        if b <= a:
+            continue
+        inside = np.nonzero((t > a) & (t < b))[0]
+        t_seg = np.concatenate([[a], t[inside], [b]])
+        t_mid = 0.5 * (a + b)
+
+        sol, info = serialized_odeint(func, y, t_seg, args=(t_mid,) + tuple(args), Dfun=Dfun,
+                                      full_output=True, tcrit=[b], **odeint_kwargs)
+        if info['message'] != 'Integration successful.':
+            raise IntegrationError(f"odeint falló en el tramo [{a:.6g}, {b:.6g}] h en "
+                                   f"t = {float(np.max(info['tcur'])):.6g}: {info['message']}")
+        result[inside] = sol[1:-1]
+        y = sol[-1]
+        if jump is not None and b < t[-1]:
+            y = jump(y, b)
+        result[t == b] = y
+
+        stats['nst'] += int(info['nst'][-1])
+        stats['nfe'] += int(info['nfe'][-1])
+        stats['nje'] += int(info['nje'][-1])
+        stats['segments'] += 1
+
+    return (result, stats) if full_output else result
+
+def simulate_piecewise(state0: np.ndarray, t: np.ndarray, params: ModelParams | None = None,
+                       full_output: bool = False, coupled: bool = False, fused: bool = False,
+                       **odeint_kwargs):
+    """
+    Integra dSYSTEM_dt tramo a tramo entre bordes de ventanas de alimentación.
+
+    state0: estado (30,), o (N, 30) para un rebaño (ver herd.py).
+    t: tiempos de salida (crecientes); pueden caer en cualquier punto de los tramos.
+    Retorna el array de estados en t, con la misma forma que odeint (o que
+    herd.simulate_herd para un rebaño). Con full_output=True retorna además un dict
+    con nst, nfe y nje totales y el número de tramos.
+    Con coupled=True integra el sistema acoplado de graph.CoupledSystem, donde el
+    pasaje de cada compartimento entra en el siguiente.
+    Con fused=True (un animal, parámetros escalares) usa el lado derecho generado
+    por codegen.fused_rhs, idéntico a dSYSTEM_dt pero sin su costo fijo por llamada.
+    """
+    # Un solo juego de parámetros para toda la corrida, aunque cambie el contexto
+    params = current_params() if params is None else params
+    state0 = np.asarray(state0, dtype=float)
+    n = state0.shape[0] if state0.ndim == 2 else None
+
+    if coupled:
+        from graph import CoupledSystem
+        func, args = _rhs_coupled, (CoupledSystem(params, n_animals=n),)
+        default_jac = _jac_coupled
+    elif fused and n is None:
+        from codegen import fused_rhs
+        func, args = _rhs_fused, (n, params, fused_rhs(params), np.empty(30))
+        default_jac = _jac_segment
+    else:
+        func, args = _rhs_segment, (n, params)
+        default_jac = _jac_segment
+
+    if 'Dfun' in odeint_kwargs or n is None:
+        Dfun = odeint_kwargs.pop('Dfun', default_jac)
+    else:
+        # Rebaño: jacobiano analítico bloque-diagonal en formato de banda (herd.py)
+        from herd import herd_bandwidths
+        ml, mu = herd_bandwidths(args[0] if coupled else None)
+        odeint_kwargs.setdefault('ml', ml)
+        odeint_kwargs.setdefault('mu', mu)
+        banded = _jac_coupled_herd_banded if coupled else _jac_herd_banded
+        Dfun = partial(banded, ml=odeint_kwargs['ml'], mu=odeint_kwargs['mu'])
+
+    out = integrate_piecewise(func, state0, t, args=args, Dfun=Dfun,
+                              params=params, full_output=full_output, **odeint_kwargs)
+    result, stats = out if full_output else (out, None)
+
+    if n is not None:
+        result = result.reshape(len(t), n, -1)
+    return (result, stats) if full_output else result
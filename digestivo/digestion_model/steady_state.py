@@ -0,0 +1,190 @@
+# digestion_model/steady_state.py
+
+"""
+Estado estacionario algebraico bajo alimentación continua (ad libitum).
+Con una ingestión constante I (kg DM/h) el sistema tiende a un equilibrio
+dSYSTEM_dt(y) = 0 (con coupled=True, dSYSTEM_dt(y) + T y = 0, ver graph.py), que
+aquí se resuelve directamente en lugar de integrar el transitorio:
+    Estimación inicial compartimento por compartimento, en el orden del grafo
+    (T es triangular por bloques: cada compartimento sólo recibe de los anteriores):
+        STO: S = I / CSTO_pa.
+        SI1, SI2: cada pool cumple entrada = MM(X) + pa X, una cuadrática con una
+        sola raíz no negativa; primero los polímeros y luego los productos, cuya
+        entrada incluye la hidrólisis.
+        LI: con la tasa de pasaje k fija los pools se obtienen igual (los productos
+        son lineales); k depende de la OM total, así que se busca por brentq la OM
+        que se reproduce a sí misma.
+    Newton sobre el sistema completo con el jacobiano analítico, con búsqueda
+    lineal sobre |dy/dt| y proyección a pools no negativos.
+Retorna los pools, los flujos por hora (model.flux_SYSTEM) y las métricas de
+accumulators.FluxSummary (digestibilidades, VFA, CH4) en el equilibrio.
+Un solo animal con parámetros escalares. Si algún pool no tiene equilibrio (p.ej.
+secreciones de LI mayores que lo que el pasaje puede evacuar), el resultado lo
+informa con converged=False, como periodic.periodic_orbit.
+"""
+
+import math
+from dataclasses import dataclass, replace
+
+import numpy as np
+from scipy.optimize import brentq
+
+import si1
+import si2
+from accumulators import FluxSummary
+from feeding import FeedingSchedule
+from li import pasaje_li
+from model import FLUX_NAMES, IDX, dSYSTEM_dt, flux_SYSTEM, jac_SYSTEM
+from parameters import ModelParams, current_params
+
+# Grilla de OM total de LI donde se busca el primer equilibrio
+_OM_GRID = np.concatenate([[0.0], np.geomspace(1e-6, 1e3, 120)])
+
+@dataclass
+class SteadyState:
+    state: np.ndarray         # Pools en equilibrio, (30,)
+    intake: float             # Ingestión constante (kg DM/h)
+    params: ModelParams       # Parámetros con el horario continuo
+    coupled: bool
+    converged: bool
+    iterations: int           # Iteraciones de Newton
+    residual: float           # max |dy/dt| en el equilibrio
+    eigenvalues: np.ndarray   # Autovalores del jacobiano en el equilibrio
+
+    @property
+    def stable(self) -> bool:
+        return bool(np.all(self.eigenvalues.real < 0))
+
+    @property
+    def fluxes(self) -> dict[str, float]:
+        """Flujos por hora de model.FLUX_NAMES ('SI1.hyd.DP', 'LI.ferm.CH4', ...)."""
+        return dict(zip(FLUX_NAMES, flux_SYSTEM(self.state, 0.0, self.params).tolist()))
+
+    @property
+    def summary(self) -> FluxSummary:
+        """Una hora en equilibrio: los totales son las tasas por hora."""
+        return FluxSummary(t0=0.0, t_end=1.0, state=self.state,
+                           totals=flux_SYSTEM(self.state, 0.0, self.params), coupled=self.coupled)
+
+    @property
+    def metrics(self) -> dict:
+        """FluxSummary.metrics en equilibrio (VFA, CH4, MM por hora)."""
+        return self.summary.metrics(self.params)
+
+def mm_balance(a, vmax, km, k):
+    """
+    Pool X >= 0 cuya entrada constante `a` iguala la salida Michaelis–Menten más el
+    pasaje: a = vmax X / (km + X) + k X (la raíz no negativa de una cuadrática).
+    Sin pasaje (k = 0) sólo existe si a < vmax; si no, retorna inf.
+    """
+    b = vmax + k * km - a
+    disc = np.sqrt(b * b + 4 * k * a * km)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(b > 0, 2 * a * km / (b + disc), (disc - b) / (2 * k))
+
+def mm_balance_scalar(a: float, vmax: float, km: float, k: float) -> float:
+    """mm_balance con floats de Python, sin el costo fijo de numpy (qssa.py la llama en cada evaluación)."""
+    b = vmax + k * km - a
+    disc = math.sqrt(b * b + 4 * k * a * km)
+    if b > 0:
+        return 2 * a * km / (b + disc)
+    return (disc - b) / (2 * k) if k > 0 else math.inf
+
+def _small_intestine_guess(a: np.ndarray, c, productos: np.ndarray) -> np.ndarray:
+    # a: entrada constante por pool (flujo del compartimento anterior + secreción)
+    vmax, km, pa, _ = c.scalar
+    vmax, km = np.array(vmax), np.array(km)
+    X = np.empty(8)
+    X[:5] = mm_balance(a[:5], vmax[:5], km[:5], pa)
+    hyd = vmax[:5] * X[:5] / (km[:5] + X[:5] + 1e-9)
+    X[5:] = mm_balance(a[5:] + productos[5:, :5] @ hyd, vmax[5:], km[5:], pa)
+    return X
+
+def _li_pools(a: np.ndarray, k: float, params: ModelParams) -> np.ndarray:
+    vmax, km, _, _ = params.li.compiled().scalar
+    CMM, *fr = params.microbial.compiled().scalar
+    vmax, km = np.array(vmax), np.array(km)
+    X = np.empty(13)
+    X[:6] = mm_balance(a[:6], vmax, km, k)
+    h = vmax * X[:6] / (km + X[:6] + 1e-9)
+    C_source, N_source = h[3:6].sum(), h[0:3].sum()
+    growth = CMM * min(C_source, N_source)
+    produced = np.array([h[3], h[5], N_source, *(np.array(fr) * (C_source - growth / CMM)), growth])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        X[6:] = (a[6:] + produced) / k
+    return X
+
+def _li_guess(a: np.ndarray, params: ModelParams) -> np.ndarray:
+    # Punto fijo de la OM total: OM = Σ pools(k_li(OM)); se toma la primera raíz
+    def excess(om):
+        total = _li_pools(a, pasaje_li(om, params.li), params)[:9].sum()
+        return om - total if np.isfinite(total) else -np.inf
+
+    values = np.array([excess(om) for om in _OM_GRID])
+    above = np.nonzero(values >= 0)[0]
+    if len(above) == 0:
+        om = _OM_GRID[np.argmax(values)]
+    elif above[0] == 0:
+        om = 0.0
+    else:
+        om = brentq(excess, _OM_GRID[above[0] - 1], _OM_GRID[above[0]], xtol=1e-12)
+    return _li_pools(a, pasaje_li(om, params.li), params)
+
+def initial_guess(params: ModelParams, intake: float, system=None) -> np.ndarray:
+    """Estimación inicial por balances Michaelis–Menten de cada compartimento."""
+    y = np.zeros(30)
+    y[IDX['STO']] = intake / params.stomach.CSTO_pa
+
+    def inflow(block, group):
+        # Flujo desde los compartimentos anteriores (ya estimados) + secreción constante
+        received = 0.0 if system is None else system.T[block] @ y
+        return received + np.array(group.compiled().scalar[3])
+
+    y[IDX['SI1']] = _small_intestine_guess(inflow(IDX['SI1'], params.si1), params.si1.compiled(),
+                                           si1.PRODUCTOS)
+    y[IDX['SI2']] = _small_intestine_guess(inflow(IDX['SI2'], params.si2), params.si2.compiled(),
+                                           si2.PRODUCTOS)
+    y[IDX['LI']] = _li_guess(inflow(IDX['LI'], params.li), params)
+    return np.where(np.isfinite(y), y, 0.0)
+
+def steady_state(params: ModelParams | None = None, intake: float | None = None,
+                 coupled: bool = True, rtol: float = 1e-10, atol: float = 1e-12,
+                 max_iter: int = 50) -> SteadyState:
+    """
+    Equilibrio con ingestión constante `intake` (kg DM/h; por defecto DMI / 24).
+    Newton amortiguado desde initial_guess; converge cuando max |dy/dt| <= atol + rtol * max |y|.
+    """
+    params = current_params() if params is None else params
+    intake = params.stomach.DMI / 24.0 if intake is None else float(intake)
+    params = replace(params, stomach=replace(params.stomach, schedule=FeedingSchedule.continuous(intake)))
+
+    system = None
+    if coupled:
+        from graph import CoupledSystem
+        system = CoupledSystem(params)
+        rhs, jac = (lambda y: system.rhs(y, 0.0)), (lambda y: system.jac(y, 0.0))
+    else:
+        rhs, jac = (lambda y: np.asarray(dSYSTEM_dt(y, 0.0, params))), (lambda y: jac_SYSTEM(y, 0.0, params))
+
+    y = initial_guess(params, intake, system)
+    F = rhs(y)
+    converged, iterations = False, 0
+    for iterations in range(max_iter + 1):
+        if np.max(np.abs(F)) <= atol + rtol * np.max(np.abs(y)):
+            converged = True
+            break
+        if iterations == max_iter:
+            break
+        dy = np.linalg.lstsq(jac(y), -F, rcond=None)[0]
+        norm, lam = np.linalg.norm(F), 1.0
+        while True:
+            y_new = np.maximum(y + lam * dy, 0.0)
+            F_new = rhs(y_new)
+            if np.linalg.norm(F_new) < (1 - 1e-4 * lam) * norm or lam < 1e-10:
+                break
+            lam *= 0.5
+        y, F = y_new, F_new
+
+    return SteadyState(state=y, intake=intake, params=params, coupled=coupled,
+                       converged=converged, iterations=iterations,
+                       residual=float(np.max(np.abs(F))), eigenvalues=np.linalg.eigvals(jac(y)))
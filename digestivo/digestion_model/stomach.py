@@ -2,34 +2,85 @@
 
 """
 Este módulo define las funciones del compartimento estómago:
-1. ingestion_schedule(t): tasa de ingestión discontinua (kg DM/h)
+1. ingestion_schedule(t): tasa de ingestión discontinua (kg DM/h), por búsqueda binaria
+   en el horario precalculado (feeding.py)
 2. El vaciado gástrico (cinética de primer orden) --> dStomach_dt(S, t): derivada del contenido del estómago
+
+Ambas funciones aceptan un StomachParams opcional; si sus campos son arrays (N,)
+se evalúa un rebaño completo de N animales a la vez.
 """
 
+from dataclasses import fields
+
 import numpy as np
-from parameters import stomach_params
+from parameters import ModelParams, StomachParams, current_params
+
+# Declaración para el grafo de compartimentos (graph.py)
+POOLS = ['S']
+
+def ingestion_schedule(t: float, params: StomachParams | None = None) -> float:
+    """
+    Retorna la tasa de ingestión (kg DM/h) según el horario de alimentación,
+    precalculado una vez por juego de parámetros (feeding.FeedingSchedule).
+    t puede ser un array de tiempos.
+    """
+    p = current_params().stomach if params is None else params
+    return p.compiled().intake(t)
 
-def ingestion_schedule(t: float) -> float:
+def dStomach_dt(S: float, t: float, params: StomachParams | None = None) -> float:
     """
-    Retorna la tasa de ingestión (kg DM/h) según horario y frecuencia.
+    Ecuación diferencial del estómago:
+    dS/dt = ingestion(t) - CSTO_pa * S
     """
-    T = stomach_params.TFEED
-    f = stomach_params.FFEED
-    DMI = stomach_params.DMI
+    p = current_params().stomach if params is None else params
+    ing = ingestion_schedule(t, p)
+    return ing - p.CSTO_pa * S
 
-    t_mod = t % 24  # hora dentro del día
-    intervalos = np.linspace(0, 24, int(f) + 1)[:-1]  # inicios de eventos
+def jac_STO(S: float, t: float, params: StomachParams | None = None) -> float:
+    """
+    Derivada parcial exacta de dStomach_dt respecto de S: -CSTO_pa.
+    (La ingestión no depende del estado.)
+    """
+    p = current_params().stomach if params is None else params
+    return -p.CSTO_pa * np.ones_like(S, dtype=float)
 
-    for inicio in intervalos:
-        if inicio <= t_mod < inicio + T:
-            return DMI / (f * T)
+# Campos numéricos de StomachParams, en el orden de las columnas de jac_params_STO
+# (CSTO_EP_sc y CSTO_NAPN_sc no intervienen en dStomach_dt)
+PARAMS = [f.name for f in fields(StomachParams) if f.name != 'schedule']
 
-    return 0.0
+def jac_params_STO(S: float, t: float, params: StomachParams | None = None) -> np.ndarray:
+    """
+    Derivadas parciales de dStomach_dt respecto de cada campo de PARAMS, array
+    (len(PARAMS),), un animal. Dentro de una comida ing = DMI/(FFEED*TFEED); las
+    ventanas no se mueven con FFEED (el número de comidas es entero) y el
+    desplazamiento del fin de cada comida con TFEED es un salto en t, que
+    resuelve sensitivity.py. Con un horario explícito TFEED, FFEED y DMI no intervienen.
+    """
+    p = current_params().stomach if params is None else params
+    D = np.zeros(len(PARAMS))
+    D[PARAMS.index('CSTO_pa')] = -S
+    if p.schedule is None:
+        ing = ingestion_schedule(t, p)
+        D[PARAMS.index('DMI')] = ing / p.DMI
+        D[PARAMS.index('TFEED')] = -ing / p.TFEED
+        D[PARAMS.index('FFEED')] = -ing / p.FFEED
+    return D
 
-def dStomach_dt(S: float, t: float) -> float:
+def outflows(params: ModelParams) -> list[tuple[str, str, float]]:
     """
-    Ecuación diferencial del estómago:
-    dS/dt = ingestion(t) - CSTO_pa * S
+    Salidas lineales hacia otros compartimentos: (pool, 'DESTINO.pool', tasa 1/h).
+    El vaciado CSTO_pa * S (kg DM/h) se reparte según la composición de la dieta;
+    la fibra (DDF) no tiene pool en el intestino delgado y pasa directo a LI.
     """
-    ing = ingestion_schedule(t)
-    return ing - stomach_params.CSTO_pa * S
+    k, d = params.stomach.CSTO_pa, params.diet
+    flows = [('S', f'SI1.{pool}', k * getattr(d, f'CDIET_{pool}'))
+             for pool in ['DP', 'NAPN', 'ST', 'LD', 'SU', 'FA', 'AA']]
+    return flows + [('S', 'LI.DDF', k * d.CDIET_DDF)]
+
+# Flujos acumulables (ver accumulators.py): ingestión y vaciado, en kg DM/h
+FLUXES = ['ingestion', 'pas.S']
+
+def flux_rates(S: float, t: float, params: StomachParams | None = None) -> np.ndarray:
+    """Flujos instantáneos [ingestión, vaciado]; (2,) o (2, N) para un rebaño."""
+    p = current_params().stomach if params is None else params
+    return np.array(np.broadcast_arrays(ingestion_schedule(t, p), p.CSTO_pa * S))
@@ -0,0 +1,81 @@
+# digestion_model/streaming.py
+
+"""
+Simulación por bloques para horizontes largos (p.ej. 120 días a resolución de minutos).
+En lugar de construir la grilla completa y guardar la salida densa en memoria,
+stream_simulation avanza el estado un bloque a la vez (simulation.simulate_piecewise),
+entrega cada bloque con un generador y, opcionalmente, lo escribe en un archivo .npy
+mapeado en memoria. El uso de memoria depende sólo del tamaño del bloque.
+El archivo es un array estructurado con un campo por columna: 't' y los pools de
+model.POOL_NAMES ('STO.S', 'SI1.DP', ..., 'LI.MM'); para un rebaño su forma es
+(n_filas, N). Se abre luego con open_stream_output(path)['LI.VFA'].
+"""
+
+import numpy as np
+
+from model import POOL_NAMES
+from parameters import ModelParams
+from simulation import simulate_piecewise
+
+STREAM_DTYPE = np.dtype([('t', float)] + [(name, float) for name in POOL_NAMES])
+
+def stream_simulation(state0: np.ndarray, t_end: float, dt_out: float, t0: float = 0.0,
+                      chunk_hours: float = 24.0, params: ModelParams | None = None,
+                      out_path: str | None = None, **odeint_kwargs):
+    """
+    Generador de bloques (t, y) desde t0 hasta t_end con salida cada dt_out horas.
+    y tiene forma (k, 30), o (k, N, 30) si state0 es (N, 30). El primer bloque
+    incluye t0; los siguientes empiezan en el paso posterior al último entregado.
+    Si out_path no es None, cada bloque se escribe en ese .npy antes de entregarse.
+    """
+    y = np.asarray(state0, dtype=float)
+    n_rows = int(round((t_end - t0) / dt_out)) + 1
+    rows_per_chunk = max(1, int(round(chunk_hours / dt_out)))
+
+    out = None
+    if out_path is not None:
+        shape = (n_rows,) if y.ndim == 1 else (n_rows, y.shape[0])
+        out = np.lib.format.open_memmap(out_path, mode='w+', dtype=STREAM_DTYPE, shape=shape)
+
+    try:
+        i0 = 0
+        while True:
+            i1 = min(i0 + rows_per_chunk, n_rows - 1)
+            # Tiempos por índice entero: sin deriva acumulada en horizontes largos
+            t = t0 + np.arange(i0, i1 + 1) * dt_out
+            result = simulate_piecewise(y, t, params, **odeint_kwargs) if i1 > i0 else y[None]
+            y = result[-1]
+
+            first = 0 if i0 == 0 else 1
+            t_chunk, y_chunk = t[first:], result[first:]
+            if out is not None:
+                _write_chunk(out[i0 + first:i1 + 1], t_chunk, y_chunk)
+            yield t_chunk, y_chunk
+
+            if i1 == n_rows - 1:
+                break
+            i0 = i1
+    finally:
+        if out is not None:
+            out.flush()
+            del out
+
+def _write_chunk(view: np.ndarray, t: np.ndarray, y: np.ndarray):
+    view['t'] = t.reshape((-1,) + (1,) * (y.ndim - 2))
+    for j, name in enumerate(POOL_NAMES):
+        view[name] = y[..., j]
+
+def run_to_memmap(out_path: str, state0: np.ndarray, t_end: float, dt_out: float,
+                  **kwargs) -> np.ndarray:
+    """Consume stream_simulation escribiendo en out_path y retorna el archivo en sólo lectura."""
+    for _ in stream_simulation(state0, t_end, dt_out, out_path=out_path, **kwargs):
+        pass
+    return open_stream_output(out_path)
+
+def open_stream_output(path: str) -> np.ndarray:
+    """Abre un resultado de stream_simulation mapeado en memoria (sólo lectura)."""
+    return np.load(path, mmap_mode='r')
+
+def as_state_array(records: np.ndarray) -> np.ndarray:
+    """Convierte registros (o un bloque) del archivo en un array (..., 30) de pools."""
+    return np.stack([records[name] for name in POOL_NAMES], axis=-1)
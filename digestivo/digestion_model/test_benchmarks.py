@@ -0,0 +1,28 @@
+# digestion_model/test_benchmarks.py
+
+"""
+Pruebas de la suite de benchmarks: metadatos serializables y detección de
+regresiones entre dos corridas.
+"""
+
+import json
+
+from benchmarks import bench_horizon_scaling, compare, machine_metadata
+
+def test_metadatos_json():
+    meta = machine_metadata()
+    assert {'python', 'numpy', 'scipy', 'cpu_count', 'git_commit'} <= set(meta)
+    json.dumps(meta)
+
+def test_escalamiento_horizonte():
+    result = bench_horizon_scaling(horizons=(24,))
+    assert result['24']['wall_s'] > 0
+
+def test_comparacion():
+    old = {'rhs': {'dSYSTEM_dt': {'evals_per_s': 1000.0}},
+           'solvers': {'odeint': {'wall_s': 1.0, 'nfe': 100}}}
+    new = {'rhs': {'dSYSTEM_dt': {'evals_per_s': 700.0}},
+           'solvers': {'odeint': {'wall_s': 1.1, 'nfe': 500}}}
+    regresiones = compare(old, new, tolerance=0.2)
+    assert regresiones == ['rhs/dSYSTEM_dt/evals_per_s: 1000 -> 700']
+    assert compare(new, old) == []
@@ -0,0 +1,66 @@
+# digestion_model/test_cache.py
+
+"""
+Pruebas de la caché de simulaciones: aciertos repetidos, invalidación al cambiar
+parámetros, claves estables entre procesos y almacén en disco con desalojo por tamaño.
+"""
+
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+from dataclasses import replace
+
+from parameters import default_params
+from cache import SimulationCache, cached_simulate, simulation_key
+from model import jac_SYSTEM
+
+T = np.linspace(0, 24, 49)
+STATE0 = np.zeros(30)
+
+def test_repeticion_y_invalidacion():
+    cache = SimulationCache()
+    a = cached_simulate(STATE0, T, cache=cache)
+    b = cached_simulate(STATE0, T, cache=cache)
+    assert b is a
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert not a.flags.writeable
+
+    base = default_params()
+    otro = replace(base, stomach=replace(base.stomach, DMI=2.0))
+    c = cached_simulate(STATE0, T, otro, cache=cache)
+    assert cache.misses == 2
+    assert c[-1, 0] > a[-1, 0]
+
+def test_clave_estable():
+    base = default_params()
+    assert simulation_key(base, STATE0, T) == simulation_key(replace(base), STATE0.copy(), T.copy())
+    assert simulation_key(base, STATE0, T) != simulation_key(base, STATE0, T, rtol=1e-6)
+
+def test_clave_con_funciones_entre_procesos():
+    code = ('import numpy as np; from cache import simulation_key; from model import jac_SYSTEM; '
+            'print(simulation_key(None, np.zeros(30), np.linspace(0, 24, 49), Dfun=jac_SYSTEM))')
+    out = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True,
+                         cwd=os.path.dirname(os.path.abspath(__file__)))
+    assert out.stdout.strip() == simulation_key(None, STATE0, T, Dfun=jac_SYSTEM)
+    with pytest.raises(TypeError):
+        simulation_key(None, STATE0, T, Dfun=lambda y, t, *a: jac_SYSTEM(y, t))
+
+def test_sin_full_output():
+    with pytest.raises(ValueError):
+        cached_simulate(STATE0, T, cache=SimulationCache(), full_output=True)
+
+def test_disco_y_desalojo(tmp_path):
+    cache = SimulationCache(directory=str(tmp_path))
+    a = cached_simulate(STATE0, T, cache=cache)
+
+    # Una caché nueva sobre el mismo directorio lee el .npz
+    fresh = SimulationCache(directory=str(tmp_path))
+    np.testing.assert_array_equal(cached_simulate(STATE0, T, cache=fresh), a)
+    assert fresh.hits == 1
+
+    small = SimulationCache(directory=str(tmp_path), max_bytes=1)
+    cached_simulate(STATE0, T[:10], cache=small)
+    assert len([f for f in os.listdir(tmp_path) if f.endswith('.npz')]) <= 1
@@ -0,0 +1,51 @@
+# digestion_model/test_calibration.py
+
+"""
+Pruebas de la calibración: recuperación de parámetros conocidos a partir de datos
+sintéticos, reutilización del caché y evaluación en paralelo.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pytest
+
+from accumulators import simulate_summary
+from cache import SimulationCache
+from calibration import CalibrationProblem, Trial, calibrate
+from montecarlo import animal_params
+from parameters import default_params
+
+NOMBRES = ['microbial.CMM_CH4_fr', 'si1.CSI1_DP_hyv']
+COTAS = {'si1.CSI1_DP_hyv': (0.1, 2.0), 'microbial.CMM_CH4_fr': (0.01, 0.3)}
+
+def ensayo_sintetico(valores):
+    params = animal_params(default_params(), NOMBRES, valores)
+    metrics = simulate_summary(np.zeros(30), 24.0, params=params, coupled=True).metrics(params)
+    sd = {'digestibilidad_ileal_N': 0.01, 'CH4': 0.001, 'VFA': 0.01}
+    return Trial(observed={m: metrics[m] for m in sd}, sd=sd, hours=24.0)
+
+def test_recupera_parametros_y_reutiliza_cache():
+    trial = ensayo_sintetico([0.12, 0.6])
+    cache = SimulationCache(maxsize=256)
+    res = calibrate([trial], COTAS, cache=cache, workers=1)
+    assert res.success and res.names == NOMBRES
+    np.testing.assert_allclose(res.x, [0.12, 0.6], rtol=1e-3)
+    assert res.apply().si1.CSI1_DP_hyv == res.values['si1.CSI1_DP_hyv']
+    assert res.cache_hits > 0
+
+    again = calibrate([trial], COTAS, cache=cache, workers=1)
+    assert again.simulations == 0
+    np.testing.assert_array_equal(again.x, res.x)
+
+def test_jacobiano_en_paralelo():
+    trial = ensayo_sintetico([0.1, 0.4])
+    x = np.array([0.1, 0.4])
+    serial = CalibrationProblem([trial], NOMBRES)
+    with ProcessPoolExecutor(max_workers=2) as pool:
+        paralelo = CalibrationProblem([trial], NOMBRES, pool=pool)
+        J = paralelo.jacobian(x)
+    np.testing.assert_array_equal(J, serial.jacobian(x))
+    assert J.shape == (3, 2) and serial.simulations == 3
+    assert serial.residuals(x) == pytest.approx(0, abs=1e-6)
+    assert serial.simulations == 3
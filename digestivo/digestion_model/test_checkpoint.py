@@ -0,0 +1,73 @@
+# digestion_model/test_checkpoint.py
+
+"""
+Pruebas de checkpoints y re-simulación incremental: la corrida por segmentos debe
+coincidir con simulate_piecewise, la re-simulación tras un cambio de ración debe
+ser idéntica a una corrida nueva y una corrida interrumpida debe poder reanudarse
+desde disco.
+"""
+
+from dataclasses import replace
+
+import numpy as np
+import pytest
+
+import checkpoint
+from checkpoint import earliest_change, resimulate, simulate_checkpointed
+from feeding import FeedingSchedule
+from parameters import default_params
+from simulation import simulate_piecewise
+
+def racion_desde(day: int, amount: float, days: int = 8):
+    # Tres comidas de 15 min por día (como el horario por defecto), `amount` kg desde `day`
+    times = np.array([24.0 * d + h for d in range(days) for h in (0.0, 8.0, 16.0)])
+    amounts = np.where(times >= 24.0 * day, amount, 0.5)
+    base = default_params()
+    schedule = FeedingSchedule.from_events(times, amounts, np.full(len(times), 0.25))
+    return replace(base, stomach=replace(base.stomach, schedule=schedule))
+
+def test_igual_a_simulacion_por_tramos(estado_inicial):
+    t = np.linspace(0, 72, 289)
+    run = simulate_checkpointed(estado_inicial, t, default_params())
+    np.testing.assert_array_equal(run.times, [0, 24, 48, 72])
+    np.testing.assert_array_equal(run.result, simulate_piecewise(estado_inicial, t, default_params()))
+
+def test_cambio_de_racion(estado_inicial):
+    t = np.linspace(0, 192, 769)
+    old = simulate_checkpointed(estado_inicial, t, default_params())
+    params = racion_desde(4, 0.6)
+    assert earliest_change(default_params(), racion_desde(8, 0.6), 0, 192) is None
+    assert earliest_change(default_params(), params, 0, 192) == 96.0
+    cinetico = replace(params, li=replace(params.li, CLI_pa_0=0.05))
+    assert earliest_change(params, cinetico, 0, 192) == 0.0
+
+    new = resimulate(old, params)
+    assert new.resumed_from == 96.0
+    np.testing.assert_array_equal(new.result, simulate_checkpointed(estado_inicial, t, params).result)
+    before = t <= 96.0
+    np.testing.assert_array_equal(new.result[before], old.result[before])
+    assert not np.allclose(new.result[-1], old.result[-1])
+
+def test_reanudar_tras_caida(tmp_path, monkeypatch, estado_inicial):
+    t = np.linspace(0, 96, 97)
+    expected = simulate_checkpointed(estado_inicial, t, default_params()).result
+
+    calls = []
+    def falla_en_el_tercer_dia(*args, **kwargs):
+        calls.append(1)
+        if len(calls) == 3:
+            raise KeyboardInterrupt
+        return simulate_piecewise(*args, **kwargs)
+
+    monkeypatch.setattr(checkpoint, 'simulate_piecewise', falla_en_el_tercer_dia)
+    with pytest.raises(KeyboardInterrupt):
+        simulate_checkpointed(estado_inicial, t, default_params(), path=str(tmp_path))
+    monkeypatch.undo()
+
+    run = simulate_checkpointed(estado_inicial, t, default_params(), path=str(tmp_path))
+    assert run.resumed_from == 48.0
+    np.testing.assert_array_equal(run.result, expected)
+    np.testing.assert_array_equal(np.load(tmp_path / 'trajectory.npy'), expected)
+    # Con otras entradas el directorio se sobrescribe
+    other = simulate_checkpointed(estado_inicial, t, racion_desde(1, 0.6), path=str(tmp_path))
+    assert other.resumed_from == 0.0
@@ -0,0 +1,52 @@
+# digestion_model/test_cli.py
+
+"""
+Pruebas de la CLI: salidas CSV/JSON/NPZ con una columna por pool, modo resumen
+y arranque sin importar numpy, scipy ni matplotlib para --help.
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+import numpy as np
+
+from cli import main
+from model import POOL_NAMES
+
+def test_csv_sistema(tmp_path):
+    out = tmp_path / 'sistema.csv'
+    assert main(['system', '--hours', '24', '--points', '5', '-o', str(out)]) == 0
+    header = out.read_text().splitlines()[0]
+    assert header == ','.join(['t'] + POOL_NAMES)
+    assert np.loadtxt(out, delimiter=',', skiprows=1).shape == (5, 31)
+
+def test_npz_y_json_compartimento(tmp_path):
+    main(['li', '--points', '4', '--format', 'npz', '-o', str(tmp_path / 'li.npz')])
+    with np.load(tmp_path / 'li.npz') as d:
+        assert d['result'].shape == (4, 13) and list(d['names'])[-1] == 'MM'
+
+    main(['si1', '--points', '3', '--format', 'json', '-o', str(tmp_path / 'si1.json')])
+    data = json.loads((tmp_path / 'si1.json').read_text())
+    assert len(data['t']) == 3 and data['DP'][0] == 1.0
+
+def test_resumen(tmp_path):
+    out = tmp_path / 'resumen.json'
+    main(['system', '--summary', '--hours', '24', '-o', str(out)])
+    metrics = json.loads(out.read_text())
+    assert {'digestibilidad_N', 'VFA', 'CH4'} <= set(metrics)
+    # Siempre acoplado: sin acoplar VFA sería 0 y las digestibilidades 1
+    assert metrics['VFA'] > 0 and metrics['digestibilidad_ileal_N'] < 1
+
+    main(['system', '--summary', '--hours', '24', '--format', 'csv', '-o', str(tmp_path / 'r.csv')])
+    header, row = (tmp_path / 'r.csv').read_text().splitlines()
+    assert header.split(',')[0] == 't' and 'VFA' in header.split(',')
+    assert float(row.split(',')[0]) == 24.0
+
+def test_arranque_perezoso():
+    code = ('import sys, cli; cli.build_parser(); '
+            'print(any(m in sys.modules for m in ["numpy", "scipy", "matplotlib"]))')
+    out = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True,
+                         cwd=os.path.dirname(os.path.abspath(__file__)))
+    assert out.stdout.strip() == 'False'
@@ -0,0 +1,56 @@
+# digestion_model/test_codegen.py
+
+"""
+Pruebas del lado derecho generado: coincidencia exacta con dSYSTEM_dt,
+reutilización del caché en disco y rechazo de parámetros por animal.
+"""
+
+from dataclasses import replace
+
+import numpy as np
+import pytest
+
+import codegen
+from herd import replicate_params
+from model import dSYSTEM_dt
+from parameters import default_params
+from simulation import simulate_piecewise
+
+def test_identico_a_dSYSTEM_dt():
+    base = default_params()
+    variantes = [base,
+                 replace(base, stomach=replace(base.stomach, FFEED=2.0, TFEED=0.5)),
+                 replace(base, li=replace(base.li, CLI_pa_kn=0.8))]
+    rng = np.random.default_rng(0)
+    out = np.empty(30)
+    for params in variantes:
+        rhs = codegen.fused_rhs(params, directory=None)
+        for _ in range(500):
+            y, t = rng.uniform(0, 3, 30), rng.uniform(0, 96)
+            np.testing.assert_array_equal(rhs(t, y, out), dSYSTEM_dt(y, t, params))
+
+def test_cache_en_disco(tmp_path, monkeypatch):
+    monkeypatch.setattr(codegen, '_loaded', {})
+    codegen.fused_rhs(directory=str(tmp_path))
+    archivos = list(tmp_path.glob('_fused_rhs_*.py'))
+    assert len(archivos) == 1
+
+    # Sin caché en memoria, el módulo se importa del disco sin regenerarlo
+    monkeypatch.setattr(codegen, '_loaded', {})
+    monkeypatch.setattr(codegen, 'generate_source', lambda params=None: pytest.fail('regenerado'))
+    rhs = codegen.fused_rhs(directory=str(tmp_path))
+    y = np.linspace(0.1, 3, 30)
+    np.testing.assert_array_equal(rhs(1.0, y, np.empty(30)), dSYSTEM_dt(y, 1.0))
+
+def test_parametros_por_animal():
+    params = replicate_params(3)
+    params.si1.CSI1_pa = np.array([1.0, 1.5, 2.0])
+    with pytest.raises(ValueError):
+        codegen.generate_source(params)
+
+def test_simulacion_fusionada():
+    t = np.linspace(0, 48, 200)
+    state0 = np.zeros(30)
+    state0[1:6] = [1.0, 0.5, 0.5, 2.0, 1.5]
+    np.testing.assert_array_equal(simulate_piecewise(state0, t, fused=True),
+                                  simulate_piecewise(state0, t))
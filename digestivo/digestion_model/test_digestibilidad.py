@@ -6,9 +6,9 @@ Se validan digestibilidades, producción microbiana, CH4 y estabilidad.
 """
 
 import numpy as np
-from scipy.integrate import odeint
 
-from model import dSYSTEM_dt, IDX
+from model import IDX
+from cache import cached_simulate
 
 def simulate_96h():
     """Simula 96h del sistema completo con condiciones iniciales razonables"""
@@ -18,7 +18,7 @@ def simulate_96h():
     state0[IDX['SI2']] = [0.5, 0.3, 0.3, 1.0, 0.8, 0, 0, 0]
     state0[IDX['LI']] = [0.3, 0.2, 0.2, 0.5, 0.8, 0.3, 0, 0, 0, 0, 0, 0, 0]
 
-    result = odeint(dSYSTEM_dt, state0, t)
+    result = cached_simulate(state0, t)
     return t, result
 
 def test_digestibilidad_proteica():
@@ -0,0 +1,106 @@
+# digestion_model/test_feeding.py
+
+"""
+Pruebas de FeedingSchedule: equivalencia con el horario original de StomachParams,
+comidas irregulares, horarios por animal y su uso en la simulación.
+"""
+
+from dataclasses import replace
+
+import numpy as np
+import pytest
+
+from cache import params_key
+from codegen import generate_source
+from feeding import FeedingSchedule
+from herd import stack_params
+from model import dSYSTEM_dt
+from parameters import default_params, stomach_params
+from simulation import feeding_breakpoints, simulate_piecewise
+
+def ingesta_original(t, p):
+    """Bucle del stomach.ingestion_schedule original."""
+    t_mod = t % 24
+    for inicio in np.linspace(0, 24, int(p.FFEED) + 1)[:-1]:
+        if inicio <= t_mod < inicio + p.TFEED:
+            return p.DMI / (p.FFEED * p.TFEED)
+    return 0.0
+
+def registro():
+    # Comedero: cinco visitas desordenadas, de distinto tamaño y duración
+    return FeedingSchedule.from_events(times=[30.0, 2.0, 9.5, 14.0, 50.0],
+                                       amounts=[0.6, 0.4, 0.3, 0.5, 0.2],
+                                       durations=[0.5, 0.2, 0.1, 0.25, 0.3])
+
+@pytest.mark.parametrize('TFEED', [0.25, 10.0, 30.0])
+def test_equivale_al_horario_original(TFEED):
+    # TFEED > 24/FFEED: ventanas superpuestas y más allá de las 24 h, como el original
+    p = replace(stomach_params, TFEED=TFEED)
+    schedule = FeedingSchedule.from_params(p)
+    t = np.concatenate([np.linspace(-5, 100, 4001), [0.0, 0.25, 8.0, 8.25, 24.0, 40.25]])
+    esperado = [ingesta_original(ti, p) for ti in t]
+    assert [schedule.intake(ti) for ti in t] == esperado
+    np.testing.assert_array_equal(schedule.intake(t), esperado)
+
+def test_comidas_irregulares():
+    schedule = registro()
+    assert schedule.intake(2.1) == pytest.approx(0.4 / 0.2)
+    assert schedule.intake(30.49) == pytest.approx(0.6 / 0.5)
+    assert schedule.intake(30.5) == 0.0 and schedule.intake(-1.0) == 0.0
+    t = np.linspace(-10, 60, 700001)
+    assert np.trapz(schedule.intake(t), t) == pytest.approx(2.0, rel=1e-4)
+    np.testing.assert_allclose(schedule.breakpoints(0, 40),
+                               [2.0, 2.2, 9.5, 9.6, 14.0, 14.25, 30.0, 30.5])
+    with pytest.raises(ValueError):
+        FeedingSchedule.from_events([1.0, 1.5], [0.5, 0.5], [1.0, 1.0])
+
+@pytest.mark.filterwarnings('error')
+def test_comida_de_duracion_nula():
+    # Registros de comedero con duración 0: tasa infinita y cantidad perdida si se aceptaran
+    with pytest.raises(ValueError):
+        FeedingSchedule.from_events([2.0, 9.5], [0.4, 0.3], [0.2, 0.0])
+    with pytest.raises(ValueError):
+        FeedingSchedule([2.0], [2.0], [1.0])
+
+def test_por_animal():
+    schedules = [registro(), FeedingSchedule.from_events([5.0], [1.0], [0.5]),
+                 FeedingSchedule.from_events([], [], [])]
+    herd = FeedingSchedule.stack(schedules)
+    t = np.linspace(0, 60, 1201)
+    esperado = np.stack([s.intake(t) for s in schedules], axis=1)
+    np.testing.assert_array_equal(herd.intake(t), esperado)
+    np.testing.assert_array_equal(herd.intake(5.2), [0.0, 2.0, 0.0])
+
+def test_rebano_desde_params():
+    params = stack_params([default_params(),
+                           replace(default_params(), stomach=replace(stomach_params, FFEED=2.0, DMI=2.0))])
+    t = np.linspace(0, 48, 961)
+    intake = params.stomach.compiled().intake(t)
+    np.testing.assert_array_equal(intake[:, 0], [ingesta_original(ti, stomach_params) for ti in t])
+    assert intake[:, 1].max() == 2.0 / (2.0 * 0.25)
+
+def test_simulacion_con_registro():
+    params = default_params()
+    params = replace(params, stomach=replace(params.stomach, schedule=registro()))
+    assert params_key(params) != params_key(default_params())
+    assert 9.6 in feeding_breakpoints(0, 60, params)
+    t = np.linspace(0, 60, 7)
+    S = simulate_piecewise(np.zeros(30), t, params)[:, 0]
+    # Contenido del estómago analítico: cada comida entra a tasa constante y vacía a k
+    k = stomach_params.CSTO_pa
+    analitico = sum(r / k * (np.exp(-k * np.clip(t - b, 0, None)) - np.exp(-k * np.clip(t - a, 0, None)))
+                    for a, b, r in zip(registro().starts, registro().ends, registro().rates))
+    np.testing.assert_allclose(S, analitico, rtol=1e-5, atol=1e-9)
+
+@pytest.mark.parametrize('n_meals', [5, 40])
+def test_codegen_con_registro(n_meals):
+    rng = np.random.default_rng(n_meals)
+    schedule = FeedingSchedule.from_events(np.arange(n_meals) * 1.5 + rng.uniform(0, 0.5, n_meals),
+                                           rng.uniform(0.1, 0.5, n_meals), 0.4)
+    params = default_params()
+    params = replace(params, stomach=replace(params.stomach, schedule=schedule))
+    namespace = {}
+    exec(generate_source(params), namespace)
+    y = rng.uniform(0, 1, 30)
+    for t in np.linspace(-1, 1.5 * n_meals + 2, 301):
+        np.testing.assert_array_equal(namespace['rhs'](t, y, np.empty(30)), dSYSTEM_dt(y, t, params))
@@ -0,0 +1,68 @@
+# digestion_model/test_gsa.py
+
+"""
+Pruebas del análisis de sensibilidad global: estimadores contra funciones con
+índices analíticos (lineal, Ishigami) y cribado de Morris / Sobol del modelo
+en horizontes cortos.
+"""
+
+import numpy as np
+import pytest
+from scipy.stats import qmc
+
+from accumulators import simulate_summary
+from gsa import (_elementary_effects, _sobol_indices, evaluate, morris, morris_trajectories,
+                 relative_bounds, sobol)
+from montecarlo import animal_params
+from parameters import default_params
+
+NAMES = ['si1.CSI1_DP_hyv', 'li.CLI_pa_0', 'stomach.CSTO_pa']
+
+def test_efectos_elementales_lineales():
+    a = np.array([3.0, -1.0, 0.0, 0.5])
+    paths = morris_trajectories(4, 10, levels=4, seed=1)
+    assert np.all((paths >= 0) & (paths <= 1))
+    assert np.all(np.count_nonzero(np.diff(paths, axis=1), axis=2) == 1)
+    EE = _elementary_effects(paths, (paths @ a).reshape(-1, 1))
+    np.testing.assert_allclose(EE[..., 0], np.broadcast_to(a, (10, 4)), atol=1e-12)
+
+def test_indices_ishigami():
+    d = 3
+    U = qmc.Sobol(2 * d, seed=0).random_base2(14)
+    A, B = U[:, :d], U[:, d:]
+    AB = np.repeat(A[None], d, axis=0)
+    AB[np.arange(d), :, np.arange(d)] = B.T
+
+    def f(u):
+        x = -np.pi + 2 * np.pi * u
+        return (np.sin(x[..., 0]) + 7 * np.sin(x[..., 1])**2
+                + 0.1 * x[..., 2]**4 * np.sin(x[..., 0]))[..., None]
+
+    S1, ST = _sobol_indices(f(A), f(B), f(AB))
+    np.testing.assert_allclose(S1[:, 0], [0.3139, 0.4424, 0.0], atol=0.01)
+    np.testing.assert_allclose(ST[:, 0], [0.5576, 0.4424, 0.2437], atol=0.01)
+
+def test_evaluacion_por_lotes():
+    bounds = relative_bounds(NAMES)
+    X = np.array([[lo for lo, hi in bounds.values()], [hi for lo, hi in bounds.values()]])
+    Y = evaluate(X, NAMES, hours=24, workers=1, batch_size=1)
+    np.testing.assert_allclose(evaluate(X, NAMES, hours=24, workers=1), Y, rtol=1e-5)
+    with pytest.raises(TypeError):
+        evaluate(X, NAMES, hours=24, workers=1, coupled=False)
+    for x, y in zip(X, Y):
+        p = animal_params(default_params(), NAMES, x)
+        m = simulate_summary(np.zeros(30), 24, params=p, coupled=True).metrics(p)
+        np.testing.assert_allclose(y, [m['digestibilidad_ileal_N'], m['VFA'], m['CH4']], rtol=1e-4)
+
+def test_morris_y_sobol_del_modelo():
+    bounds = relative_bounds(NAMES)
+    res = morris(bounds, trajectories=4, hours=24, workers=1, n_bootstrap=50)
+    assert res.mu_star.shape == res.mu_star_conf.shape == (3, 3)
+    assert res.X.shape == (4 * 4, 3)
+    # El pasaje de LI no afecta lo que ocurre antes del íleon
+    k = res.outputs.index('digestibilidad_ileal_N')
+    assert res.mu_star[1, k] == 0 and res.ranking('digestibilidad_ileal_N')[-1] == 'li.CLI_pa_0'
+
+    res = sobol(bounds, n=16, hours=24, workers=1, n_bootstrap=20)
+    assert res.X.shape == (16 * 5, 3) and res.S1.shape == res.ST_conf.shape == (3, 3)
+    assert res.ST[1, k] == 0 and np.all(res.ST >= 0)
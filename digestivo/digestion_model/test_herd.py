@@ -0,0 +1,94 @@
+# digestion_model/test_herd.py
+
+"""
+Pruebas del modo rebaño: la integración conjunta de N animales debe
+coincidir con N simulaciones individuales; el jacobiano por bloques (banda y
+disperso) debe coincidir con el denso.
+"""
+
+import numpy as np
+import pytest
+from dataclasses import replace
+from scipy.integrate import odeint
+
+from graph import CoupledSystem
+from model import dSYSTEM_dt, jac_SYSTEM
+from parameters import default_params
+from herd import (band_blocks, herd_bandwidths, jac_HERD, jac_HERD_blocks, jac_HERD_sparse,
+                  replicate_params, stack_params, simulate_herd)
+from simulation import simulate_piecewise
+
+def animales():
+    base = default_params()
+    a = replace(base, si1=replace(base.si1, CSI1_DP_hyv=0.30))
+    b = replace(base, li=replace(base.li, CLI_pa_0=0.05),
+                stomach=replace(base.stomach, DMI=2.0, FFEED=2.0))
+    return [base, a, b]
+
+def test_derivada_rebano_igual_a_escalar():
+    animals = animales()
+    herd_p = stack_params(animals)
+    rng = np.random.default_rng(0)
+    states = rng.uniform(0, 2, size=(len(animals), 30))
+    for t in [0.1, 3.0, 8.1, 17.0]:
+        batch = dSYSTEM_dt(states, t, herd_p)
+        assert batch.shape == states.shape
+        for i, p in enumerate(animals):
+            np.testing.assert_allclose(batch[i], dSYSTEM_dt(states[i], t, p), rtol=1e-12)
+
+def test_simulacion_rebano_igual_a_individual(estado_inicial):
+    animals = animales()
+    t = np.linspace(0, 48, 200)
+    state0 = np.tile(estado_inicial, (len(animals), 1))
+    res = simulate_herd(state0, t, stack_params(animals), rtol=1e-9, atol=1e-11)
+    assert res.shape == (len(t), len(animals), 30)
+    for i, p in enumerate(animals):
+        ref = odeint(dSYSTEM_dt, state0[i], t, args=(p,), rtol=1e-9, atol=1e-11)
+        np.testing.assert_allclose(res[:, i], ref, rtol=1e-5, atol=1e-6)
+
+def test_replicate_params():
+    p = replicate_params(4)
+    assert p.si1.CSI1_pa.shape == (4,)
+    assert np.all(p.li.CLI_pa_0 == default_params().li.CLI_pa_0)
+
+def banda_a_densa(band, ml, mu):
+    n = band.shape[1]
+    J = np.zeros((n, n))
+    for j in range(n):
+        for i in range(max(0, j - mu), min(n, j + ml + 1)):
+            J[i, j] = band[mu + i - j, j]
+    return J
+
+@pytest.mark.parametrize('coupled', [False, True])
+def test_jacobiano_por_bloques(coupled):
+    animals = animales()
+    herd_p = stack_params(animals)
+    y = np.random.default_rng(2).uniform(0.05, 2, size=(3, 30)).ravel()
+    system = CoupledSystem(herd_p, n_animals=3) if coupled else None
+    denso = np.zeros((90, 90))
+    for i, p in enumerate(animals):
+        J = jac_SYSTEM(y[30 * i:30 * (i + 1)], 5.0, p)
+        if coupled:
+            J = J + CoupledSystem(p).T.toarray()
+        denso[30 * i:30 * (i + 1), 30 * i:30 * (i + 1)] = J
+
+    ml, mu = herd_bandwidths(system)
+    assert (ml, mu) == ((21, 12) if coupled else (12, 12))
+    blocks = jac_HERD_blocks(y, 5.0, 3, herd_p, system)
+    np.testing.assert_allclose(banda_a_densa(band_blocks(blocks, 90, ml, mu), ml, mu), denso, atol=1e-14)
+    np.testing.assert_allclose(jac_HERD_sparse(y, 5.0, 3, herd_p, system).toarray(), denso, atol=1e-14)
+    if not coupled:
+        np.testing.assert_allclose(banda_a_densa(jac_HERD(y, 5.0, 3, herd_p), 12, 12), denso, atol=1e-14)
+
+def test_rebano_bdf_y_por_tramos(estado_inicial):
+    animals = animales()
+    t = np.linspace(0, 24, 25)
+    state0 = np.tile(estado_inicial, (len(animals), 1))
+    lsoda = simulate_herd(state0, t, stack_params(animals), rtol=1e-9, atol=1e-11)
+    bdf = simulate_herd(state0, t, stack_params(animals), method='BDF', rtol=1e-8, atol=1e-10)
+    np.testing.assert_allclose(bdf, lsoda, rtol=1e-4, atol=1e-5)
+
+    herd = simulate_piecewise(state0, t, stack_params(animals), coupled=True)
+    for i, p in enumerate(animals):
+        np.testing.assert_allclose(herd[:, i], simulate_piecewise(state0[i], t, p, coupled=True),
+                                   rtol=1e-5, atol=1e-6)
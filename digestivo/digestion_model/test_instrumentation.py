@@ -0,0 +1,56 @@
+# digestion_model/test_instrumentation.py
+
+"""
+Pruebas de la instrumentación: contadores coherentes con las estadísticas del
+integrador y restauración de las funciones originales al salir.
+"""
+
+import json
+
+import numpy as np
+
+import model
+import simulation
+from herd import simulate_herd
+from instrumentation import instrument, profile, solve_ivp
+from simulation import simulate_piecewise
+
+def test_contadores_por_tramos():
+    t = np.linspace(0, 24, 50)
+    state0 = np.zeros(30)
+    state0[1:6] = [1.0, 0.5, 0.5, 2.0, 1.5]
+    (result, stats), report = profile(simulate_piecewise, state0, t, full_output=True)
+
+    assert report.functions['dSYSTEM_dt'].calls == stats['nfe']
+    assert report.functions['dSI1_dt'].calls == stats['nfe']
+    assert report.functions['jac_SYSTEM'].calls == stats['nje']
+    assert report.solver.calls == stats['segments']
+    assert report.solver.steps == stats['nst']
+    json.dumps(report.as_dict())
+
+def test_restaura_funciones():
+    original = model.dSYSTEM_dt
+    with instrument():
+        assert simulation.dSYSTEM_dt is not original
+    assert simulation.dSYSTEM_dt is original and model.dSYSTEM_dt is original
+    assert model.dSI1_dt.__module__ == 'si1' and not hasattr(model.dSI1_dt, '__wrapped__')
+
+def test_solve_ivp():
+    state0 = np.zeros(30)
+    with instrument() as report:
+        sol = solve_ivp(lambda t, y: model.dSYSTEM_dt(y, t), (0, 24), state0, method='BDF',
+                        jac=lambda t, y: model.jac_SYSTEM(y, t))
+    assert report.solver.nfe == sol.nfev
+    assert report.functions['dSYSTEM_dt'].calls == sol.nfev
+    assert report.functions['jac_SYSTEM'].calls == sol.njev
+
+def test_rebano_bdf():
+    state0 = np.zeros((2, 30))
+    state0[:, 1:6] = [1.0, 0.5, 0.5, 2.0, 1.5]
+    t = np.linspace(0, 24, 25)
+    with instrument() as report:
+        simulate_herd(state0, t, method='BDF')
+        assert report.solver.calls == 1 and report.solver.nje > 0 and report.solver.nlu > 0
+        # Pasos desconocidos (t_eval): un odeint posterior no debe fallar al sumarlos
+        simulate_piecewise(state0[0], t)
+    assert report.solver.steps is None and report.solver.calls > 1
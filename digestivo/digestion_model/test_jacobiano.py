@@ -0,0 +1,41 @@
+# digestion_model/test_jacobiano.py
+
+"""
+Verifica el jacobiano analítico jac_SYSTEM contra diferencias finitas centradas,
+incluyendo ambas ramas de min(C_source, N_source) en LI.
+"""
+
+import numpy as np
+
+from model import dSYSTEM_dt, jac_SYSTEM, IDX
+
+def jacobiano_numerico(state, t, h=1e-7):
+    J = np.zeros((30, 30))
+    for j in range(30):
+        e = np.zeros(30)
+        e[j] = h
+        J[:, j] = (dSYSTEM_dt(state + e, t) - dSYSTEM_dt(state - e, t)) / (2 * h)
+    return J
+
+def test_jacobiano_vs_diferencias_finitas():
+    rng = np.random.default_rng(42)
+    for _ in range(5):
+        state = rng.uniform(0.01, 2.0, 30)
+        np.testing.assert_allclose(jac_SYSTEM(state, 1.0), jacobiano_numerico(state, 1.0), atol=1e-6)
+
+def test_jacobiano_ramas_min():
+    li = IDX['LI'].start
+    state = np.full(30, 0.5)
+    # Rama N limitante (polímeros nitrogenados escasos) y rama C limitante
+    for n_pool, c_pool in [(0.01, 2.0), (2.0, 0.01)]:
+        state[li:li + 3] = n_pool
+        state[li + 3:li + 6] = c_pool
+        np.testing.assert_allclose(jac_SYSTEM(state, 0.0), jacobiano_numerico(state, 0.0), atol=1e-6)
+
+def test_jacobiano_rebano():
+    rng = np.random.default_rng(0)
+    states = rng.uniform(0.01, 2.0, (3, 30))
+    J = jac_SYSTEM(states, 2.0)
+    assert J.shape == (3, 30, 30)
+    for i in range(3):
+        np.testing.assert_allclose(J[i], jac_SYSTEM(states[i], 2.0))
@@ -0,0 +1,86 @@
+# digestion_model/test_parameters.py
+
+"""
+Pruebas de la forma compilada de los parámetros: caché, invalidación al editar
+un campo y equivalencia entre el camino de un animal y el de rebaño; copias
+congeladas y parámetros por defecto por hilo (use_params).
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import FrozenInstanceError, replace
+
+import numpy as np
+import pytest
+
+from parameters import current_params, default_params, li_params, si1_params, use_params
+from herd import replicate_params
+from si1 import dSI1_dt
+from li import dLI_dt
+from simulacion_TOTAL import initial_state
+from simulation import simulate_piecewise
+
+def test_compilado_en_cache_e_invalidado():
+    p = replace(si1_params)
+    c = p.compiled()
+    assert p.compiled() is c
+    p.CSI1_DP_hyv = 0.8
+    c2 = p.compiled()
+    assert c2 is not c
+    assert c2.vmax[0, 0] == 0.8
+    assert c2.scalar[0][0] == 0.8
+
+def test_edicion_se_refleja_en_la_derivada():
+    p = replace(li_params)
+    state = np.full(13, 0.4)
+    antes = np.array(dLI_dt(state, 0.0, p))
+    p.CLI_EP_sc = p.CLI_EP_sc + 1.0
+    despues = np.array(dLI_dt(state, 0.0, p))
+    np.testing.assert_allclose(despues - antes, np.eye(13)[1], atol=1e-12)
+
+def test_compilado_por_animal():
+    herd = replicate_params(3)
+    c = herd.si1.compiled()
+    assert c.vmax.shape == (8, 3)
+    assert c.scalar is None
+    rng = np.random.default_rng(1)
+    X = rng.random((8, 3))
+    batch = dSI1_dt(X, 0.0, herd.si1)
+    for i in range(3):
+        np.testing.assert_allclose(batch[:, i], dSI1_dt(X[:, i], 0.0), rtol=1e-12)
+
+def test_copia_congelada():
+    herd = replicate_params(3).freeze()
+    assert herd.frozen and herd.freeze() is herd
+    with pytest.raises(FrozenInstanceError):
+        herd.si1.CSI1_DP_hyv = np.zeros(3)
+    with pytest.raises(FrozenInstanceError):
+        herd.si1 = si1_params
+    with pytest.raises(ValueError):
+        herd.si1.CSI1_DP_hyv[0] = 0.0
+    # replace devuelve un grupo editable; el original sigue igual
+    p = replace(herd.si1, CSI1_DP_hyv=np.ones(3))
+    p.CSI1_pa = 2.0
+    assert p.compiled().vmax[0, 0] == 1.0 and herd.si1.CSI1_DP_hyv[0] == si1_params.CSI1_DP_hyv
+    assert not si1_params.frozen
+
+def test_use_params_por_hilo():
+    t = np.linspace(0, 24, 25)
+    base = default_params()
+    escenarios = [replace(base, si1=replace(base.si1, CSI1_DP_hyv=v)) for v in (0.2, 0.4, 0.8)]
+    esperado = [simulate_piecewise(initial_state(), t, p) for p in escenarios]
+
+    def correr(p):
+        with use_params(p) as frozen:
+            assert current_params() is frozen and frozen.frozen
+            return simulate_piecewise(initial_state(), t)
+
+    with ThreadPoolExecutor(3) as pool:
+        for _ in range(2):
+            for out, ref in zip(pool.map(correr, escenarios * 2), esperado * 2):
+                np.testing.assert_array_equal(out, ref)
+
+    with use_params(escenarios[0]):
+        with use_params(escenarios[2]):
+            assert current_params().si1.CSI1_DP_hyv == 0.8
+        assert current_params().si1.CSI1_DP_hyv == 0.2
+    assert current_params().si1 is si1_params
@@ -0,0 +1,34 @@
+# digestion_model/test_periodic.py
+
+"""
+Pruebas del estado estacionario periódico: la órbita encontrada por disparo debe
+repetirse tras 24 h y coincidir con el límite de una integración larga.
+"""
+
+import numpy as np
+from dataclasses import replace
+
+from model import IDX
+from parameters import default_params
+from periodic import one_day_map, periodic_orbit, simulate_until_periodic
+
+def parametros_con_equilibrio():
+    # Con las secreciones por defecto de LI, EP y NAPN crecen sin límite
+    base = default_params()
+    return replace(base, li=replace(base.li, CLI_EP_sc=0.005, CLI_NAPN_sc=0.005))
+
+def test_orbita_periodica(estado_inicial):
+    params = parametros_con_equilibrio()
+    # SI2 vacío: con su contenido inicial la integración larga no llega a rtol en max_periods
+    state0 = estado_inicial
+    state0[IDX['SI2']] = 0.0
+    sol = periodic_orbit(state0, params)
+    assert sol.converged
+    assert sol.iterations <= 8
+    np.testing.assert_allclose(one_day_map(sol.state, params), sol.state, atol=1e-6)
+    assert np.all(np.abs(sol.multipliers) < 1)
+
+    t, result, converged = simulate_until_periodic(state0, params, rtol=1e-9, atol=1e-11)
+    assert converged
+    assert t[-1] % 24 == 0
+    np.testing.assert_allclose(result[-1], sol.state, atol=1e-6)
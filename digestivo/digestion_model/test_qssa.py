@@ -0,0 +1,51 @@
+# digestion_model/test_qssa.py
+
+"""
+Pruebas de la aproximación cuasi-estacionaria: los pools rápidos reconstruidos
+deben cerrar su balance, el lado derecho generado debe coincidir con el de Python,
+el jacobiano reducido con diferencias finitas y, pasada la capa inicial, la
+trayectoria debe seguir a la completa.
+"""
+
+import numpy as np
+import pytest
+
+from model import dSYSTEM_dt
+from parameters import default_params
+from qssa import FAST_INDEX, SLOW_INDEX, _Reduced, compare_qssa
+
+@pytest.mark.parametrize('coupled', [False, True])
+def test_pools_rapidos_en_equilibrio(coupled):
+    reduced = _Reduced(default_params(), coupled)
+    slow = np.random.default_rng(0).uniform(0.05, 2, size=len(SLOW_INDEX))
+    y = np.array(reduced.expand(slow))
+    dy = reduced.system.rhs(y, 3.0) if coupled else np.asarray(dSYSTEM_dt(y, 3.0, reduced.params))
+    np.testing.assert_allclose(dy[FAST_INDEX], 0.0, atol=1e-12)
+    np.testing.assert_array_equal(y[SLOW_INDEX], slow)
+
+@pytest.mark.parametrize('coupled', [False, True])
+def test_lado_derecho_generado(coupled):
+    fused, python = _Reduced(default_params(), coupled, fused=True), _Reduced(default_params(), coupled)
+    rng = np.random.default_rng(2)
+    for t_mid in [0.1, 3.0, 8.2, 30.0]:
+        slow = rng.uniform(0.0, 2, size=len(SLOW_INDEX))
+        np.testing.assert_allclose(fused.rhs(slow, t_mid, t_mid), python.rhs(slow, t_mid, t_mid),
+                                   rtol=1e-13, atol=1e-15)
+
+@pytest.mark.parametrize('coupled', [False, True])
+def test_jacobiano_reducido(coupled):
+    reduced = _Reduced(default_params(), coupled)
+    slow = np.random.default_rng(1).uniform(0.05, 2, size=len(SLOW_INDEX))
+    J = reduced.jac(slow, 3.0, 3.0)
+    h = 1e-7
+    for j in range(len(slow)):
+        e = np.zeros_like(slow)
+        e[j] = h
+        # rhs reutiliza su buffer de salida: copiar antes de la segunda evaluación
+        fd = (reduced.rhs(slow + e, 3.0, 3.0).copy() - reduced.rhs(slow - e, 3.0, 3.0)) / (2 * h)
+        np.testing.assert_allclose(J[:, j], fd, rtol=1e-5, atol=1e-7)
+
+def test_error_tras_capa_inicial(estado_inicial):
+    report = compare_qssa(estado_inicial, np.linspace(0, 48, 193), warmup=12.0)
+    assert report.max_rel_error.max() < 1e-4
+    assert report.stats_qssa['nst'] < report.stats_full['nst']
@@ -0,0 +1,65 @@
+# digestion_model/test_result.py
+
+"""
+Pruebas de SimulationResult: vistas sin copia por nombre, métricas memorizadas,
+almacenamiento float32 y resultados de rebaño.
+"""
+
+import numpy as np
+import pytest
+
+from model import IDX
+from result import SimulationResult, simulate
+
+def resultado(dtype=None):
+    t = np.linspace(0, 24, 200)
+    state0 = np.zeros(30)
+    state0[IDX['SI1']] = [1.0, 0.5, 0.5, 2.0, 1.5, 0, 0, 0]
+    state0[IDX['LI']] = [0.3, 0.2, 0.2, 0.5, 0.8, 0.3, 0, 0, 0, 0, 0, 0, 0]
+    return simulate(state0, t, dtype=dtype)
+
+def test_vistas_por_nombre():
+    res = resultado()
+    vfa = res.LI.VFA
+    assert np.shares_memory(vfa, res.y)
+    np.testing.assert_array_equal(vfa, res.y[:, IDX['LI'].start + 9])
+    np.testing.assert_array_equal(res.SI1[:, 'DP'], res.y[:, IDX['SI1'].start])
+    np.testing.assert_array_equal(res['LI.CH4'], res.LI.CH4)
+    assert np.shares_memory(res.SI2[:, ['ST', 'LD', 'SU']], res.y)
+    np.testing.assert_array_equal(res.STO.S, res.y[:, 0])
+    with pytest.raises(ValueError):
+        res.y[0, 0] = 1.0
+
+def test_metricas_memorizadas():
+    res = resultado()
+    t = res.t
+    esperado = 1 - np.trapz(res.LI.DP, t) / (np.trapz(res.SI1.DP, t) + 1e-9)
+    assert res.digestibilidad_proteica == pytest.approx(esperado)
+    assert res.integrals is res.integrals
+    valor, tiempo = res.peak('LI.MM')
+    assert valor == res.LI.MM.max() and res.LI.MM[t == tiempo][0] == valor
+
+def test_float32():
+    res64, res32 = resultado(), resultado(np.float32)
+    assert res32.y.dtype == np.float32 and res32.y.nbytes * 2 == res64.y.nbytes
+    np.testing.assert_allclose(res32.integrals, res64.integrals, rtol=1e-5, atol=1e-6)
+
+def test_rebano():
+    res = resultado()
+    y = np.stack([res.y, 2 * res.y], axis=1)
+    herd = SimulationResult(res.t, y)
+    assert herd.LI.VFA.shape == (len(res.t), 2)
+    np.testing.assert_allclose(herd.integral('LI.VFA'), [1, 2] * res.integral('LI.VFA'))
+    np.testing.assert_array_equal(herd.SI1[:, 1, 'ST'], 2 * res.SI1.ST)
+
+def test_array_del_llamador_sigue_escribible():
+    t = np.linspace(0, 1, 3)
+    y = np.zeros((3, 30))
+    res = SimulationResult(t, y)
+    assert np.shares_memory(res.y, y) and not res.y.flags.writeable
+    y[0, 0] = 1.0
+    assert res.y[0, 0] == 1.0
+    malo = np.zeros((2, 30))
+    with pytest.raises(ValueError):
+        SimulationResult(t, malo)
+    assert malo.flags.writeable
@@ -0,0 +1,70 @@
+# digestion_model/test_sensitivity.py
+
+"""
+Pruebas de las sensibilidades hacia adelante: derivadas parciales analíticas
+contra diferencias finitas de dSYSTEM_dt, y ∂estado/∂θ integrado contra
+diferencias finitas de simulaciones completas (incluido el salto de TFEED).
+"""
+
+from dataclasses import replace
+
+import numpy as np
+import pytest
+
+from model import PARAM_NAMES, dSYSTEM_dt, jac_params_SYSTEM
+from parameters import default_params
+from sensitivity import simulate_sensitivities
+from simulacion_TOTAL import initial_state
+from simulation import simulate_piecewise
+
+def perturbado(params, name, delta):
+    group, field = name.split('.')
+    g = getattr(params, group)
+    return replace(params, **{group: replace(g, **{field: getattr(g, field) + delta})})
+
+@pytest.mark.parametrize('t', [0.1, 5.0])
+@pytest.mark.parametrize('seed', [0, 1])
+def test_parciales_analiticas(t, seed):
+    params = default_params()
+    y = np.random.default_rng(seed).uniform(0.05, 2.0, 30)
+    D = jac_params_SYSTEM(y, t, params)
+    assert D.shape == (30, len(PARAM_NAMES)) == (30, 73)
+    f0 = np.array(dSYSTEM_dt(y, t, params))
+    for k, name in enumerate(PARAM_NAMES):
+        # Diferencia hacia adelante: FFEED se redondea hacia abajo a un entero
+        group, field = name.split('.')
+        h = 1e-7 * max(abs(getattr(getattr(params, group), field)), 1e-3)
+        fd = (np.array(dSYSTEM_dt(y, t, perturbado(params, name, h))) - f0) / h
+        np.testing.assert_allclose(D[:, k], fd, rtol=1e-5, atol=1e-6, err_msg=name)
+
+@pytest.mark.parametrize('coupled, name', [
+    (False, 'stomach.TFEED'), (False, 'si1.CSI1_DP_hyv'), (False, 'li.CLI_pa_kn'),
+    (False, 'microbial.CMM'), (True, 'stomach.CSTO_pa'), (True, 'diet.CDIET_DP'),
+])
+def test_sensibilidad_integrada(coupled, name):
+    params = default_params()
+    t = np.linspace(0, 30, 31)
+    res = simulate_sensitivities(initial_state(), t, params, coupled=coupled)
+    k = res.names.index(name)
+    np.testing.assert_allclose(res.y, simulate_piecewise(initial_state(), t, params, coupled=coupled),
+                               rtol=1e-6, atol=1e-6)
+
+    group, field = name.split('.')
+    h = 1e-4 * abs(getattr(getattr(params, group), field))
+    tol = dict(rtol=1e-10, atol=1e-12, coupled=coupled)
+    fd = (simulate_piecewise(initial_state(), t, perturbado(params, name, h), **tol)
+          - simulate_piecewise(initial_state(), t, perturbado(params, name, -h), **tol)) / (2 * h)
+    assert np.max(np.abs(res.S[:, :, k] - fd)) <= 1e-3 * np.max(np.abs(fd))
+
+def test_subconjunto_y_metricas():
+    t = np.linspace(0, 24, 97)
+    names = ['si1.CSI1_DP_hyv', 'li.CLI_DP_hyv', 'stomach.FFEED']
+    res = simulate_sensitivities(initial_state(), t, names=names)
+    assert res.S.shape == (len(t), 30, 3) and res.of('LI.CH4').shape == (len(t), 3)
+    full = simulate_sensitivities(initial_state(), t)
+    np.testing.assert_allclose(res.S, full.S[:, :, [full.names.index(n) for n in names]],
+                               rtol=1e-5, atol=1e-6)
+    # La digestibilidad mejora si aumenta la hidrólisis de DP en LI
+    assert res.digestibilidad_proteica[1] > 0
+    with pytest.raises(KeyError):
+        simulate_sensitivities(initial_state(), t, names=['diet.CDIET_DP'])
@@ -0,0 +1,53 @@
+# digestion_model/test_simulation.py
+
+"""
+Pruebas del driver por tramos: bordes de comidas y conservación de la ingesta
+del estómago con cualquier resolución de salida.
+"""
+
+import numpy as np
+import pytest
+
+from parameters import stomach_params
+from herd import replicate_params, simulate_herd
+from simulation import IntegrationError, feeding_breakpoints, simulate_piecewise
+
+def estomago_analitico(t_final):
+    """Contenido del estómago partiendo de S=0, sumando comida a comida."""
+    T, f, DMI, k = (stomach_params.TFEED, stomach_params.FFEED,
+                    stomach_params.DMI, stomach_params.CSTO_pa)
+    r = DMI / (f * T)
+    S = 0.0
+    for day in range(int(np.ceil(t_final / 24)) + 1):
+        for inicio in day * 24 + np.linspace(0, 24, int(f) + 1)[:-1]:
+            fin = min(inicio + T, t_final)
+            if fin <= inicio:
+                continue
+            S += r / k * (np.exp(-k * (t_final - fin)) - np.exp(-k * (t_final - inicio)))
+    return S
+
+def test_bordes_de_alimentacion():
+    edges = feeding_breakpoints(0, 24)
+    np.testing.assert_allclose(edges, [0.25, 8.0, 8.25, 16.0, 16.25])
+
+def test_ninguna_comida_perdida():
+    state0 = np.zeros(30)
+    for n_out in [2, 5, 20, 2000]:
+        t = np.linspace(0, 96.1, n_out)
+        result = simulate_piecewise(state0, t)
+        np.testing.assert_allclose(result[-1, 0], estomago_analitico(96.1), rtol=1e-5)
+
+def test_rebano_por_tramos():
+    params = replicate_params(2)
+    params.stomach.FFEED[1] = 2.0
+    state0 = np.zeros((2, 30))
+    t = np.linspace(0, 48, 50)
+    result = simulate_piecewise(state0, t, params)
+    ref = simulate_herd(state0, t, params, hmax=0.05, mxstep=10**6)
+    np.testing.assert_allclose(result, ref, atol=1e-5)
+
+@pytest.mark.filterwarnings('ignore::scipy.integrate.ODEintWarning')
+def test_falla_de_odeint_no_se_propaga():
+    # Con mxstep=5 el primer tramo no puede completarse
+    with pytest.raises(IntegrationError, match=r'tramo \[0, 0.25\]'):
+        simulate_piecewise(np.ones(30), np.linspace(0, 24, 5), mxstep=5)
@@ -0,0 +1,54 @@
+# digestion_model/test_steady_state.py
+
+"""
+Pruebas del estado estacionario algebraico: el equilibrio debe anular dy/dt,
+coincidir con el límite de una integración larga con alimentación continua y
+cerrar el balance de masa; sin equilibrio debe informarlo.
+"""
+
+from dataclasses import replace
+
+import numpy as np
+import pytest
+
+from parameters import default_params
+from simulation import simulate_piecewise
+from steady_state import steady_state
+
+def parametros_con_equilibrio():
+    # Con los valores por defecto las secreciones de LI y la fibra se acumulan sin límite
+    base = default_params()
+    return replace(base, li=replace(base.li, CLI_EP_sc=0.005, CLI_NAPN_sc=0.005,
+                                    CLI_OM_0=0.02, CLI_DDF_hyv=0.4))
+
+@pytest.mark.filterwarnings('error')
+@pytest.mark.parametrize('coupled', [True, False])
+def test_equilibrio_igual_a_integracion_larga(coupled):
+    sol = steady_state(parametros_con_equilibrio(), coupled=coupled)
+    assert sol.converged and sol.stable and sol.iterations <= 3
+    assert sol.residual < 1e-10 and np.all(sol.state >= 0)
+
+    # Salida horaria: un solo intervalo de 2000 h agota el mxstep de odeint
+    t = np.linspace(0.0, 2000.0, 2001)
+    res = simulate_piecewise(np.zeros(30), t, sol.params, coupled=coupled, rtol=1e-10, atol=1e-12)
+    np.testing.assert_allclose(res[-1], sol.state, rtol=1e-6, atol=1e-8)
+
+def test_flujos_y_digestibilidades():
+    sol = steady_state(parametros_con_equilibrio(), intake=0.08)
+    f, d = sol.fluxes, sol.params.diet
+    assert f['STO.ingestion'] == pytest.approx(0.08)
+    # En equilibrio el vaciado gástrico iguala la ingestión
+    assert f['STO.pas.S'] == pytest.approx(0.08, rel=1e-9)
+    # Balance de SI1: lo que entra del estómago (más la secreción de lípidos) sale
+    # por hidrólisis o pasaje a SI2
+    secrecion = {'DP': 0.0, 'ST': 0.0, 'LD': sol.params.si1.CSI1_LD_sc}
+    for pool in ['DP', 'ST', 'LD']:
+        entrada = 0.08 * getattr(d, f'CDIET_{pool}') + secrecion[pool]
+        assert f[f'SI1.hyd.{pool}'] + f[f'SI1.pas.{pool}'] == pytest.approx(entrada, rel=1e-8)
+    m = sol.metrics
+    assert 0 < m['digestibilidad_ileal_N'] < 1 and 0 < m['digestibilidad_N'] < 1
+    assert 0 < m['digestibilidad_ileal_C'] < 1 and m['VFA'] > m['CH4'] > 0
+
+def test_sin_equilibrio():
+    sol = steady_state(default_params(), max_iter=10)
+    assert not sol.converged and sol.iterations == 10
@@ -0,0 +1,54 @@
+# digestion_model/test_stepper.py
+
+"""
+Pruebas del integrador de paso fijo: con las raciones del horario por defecto
+debe reproducir simulate_piecewise, avanzar en el mismo array sin reservar
+memoria por paso y rechazar pasos inestables.
+"""
+
+import tracemalloc
+
+import numpy as np
+import pytest
+
+from parameters import default_params
+from simulation import simulate_piecewise
+from stepper import Stepper
+
+@pytest.mark.parametrize('coupled', [False, True])
+def test_igual_a_simulacion_por_tramos(coupled, estado_inicial):
+    params = default_params()
+    dt, steps = 1 / 60, 24 * 60
+    # Ración de cada minuto según el horario (las comidas empiezan y terminan en minutos enteros)
+    schedule = params.stomach.compiled()
+    intakes = [float(schedule.intake((i + 0.5) * dt)) for i in range(steps)]
+    res = Stepper(params, coupled=coupled).run(estado_inicial, dt, intakes)
+
+    t = np.arange(0, steps + 1, 60) * dt
+    ref = simulate_piecewise(estado_inicial, t, params, coupled=coupled, rtol=1e-10, atol=1e-12)
+    # Error de truncamiento de RK4 con dt = 1 min (|λ dt| ≈ 1.3 en los pools solubles)
+    np.testing.assert_allclose(res[::60], ref, rtol=1e-5, atol=1e-5)
+
+def test_paso_en_el_lugar_sin_reservas(estado_inicial):
+    stepper = Stepper(coupled=True)
+    state = estado_inicial
+    assert stepper.step(state, 1 / 60, 2.0) is state
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        for _ in range(1000):
+            stepper.step(state, 1 / 60, 2.0)
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    # Sólo los objetos transitorios de una evaluación (la lista de y.tolist()), sin crecer
+    assert current - before < 256 and peak - before < 2048
+
+def test_paso_inestable(estado_inicial):
+    stepper = Stepper()
+    assert 1 / 60 < stepper.max_stable_dt < 0.1
+    with pytest.raises(ValueError):
+        stepper.step(estado_inicial, 2 * stepper.max_stable_dt, 0.0)
+    latency = stepper.latency(steps=200)
+    assert 0 < latency['mean_us'] <= latency['max_us']